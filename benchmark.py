@@ -0,0 +1,360 @@
+# benchmark.py
+# Micro-benchmarks for performance-sensitive parts of the simulation, and a scenario suite
+# that is compared against a stored baseline to catch regressions.
+# Usage: python benchmark.py [--radius 50 100 200] [--seed 1234]
+#        python benchmark.py --suite [--baseline benchmark_baseline.json] [--threshold 0.25]
+#        python benchmark.py --suite --save-baseline benchmark_baseline.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # The suite draws frames; no display needed
+import numpy as np
+import terrain
+import pathfinding
+from map import GameMap
+from spatial_index import UnitGrid
+from unit import Worker
+from unit_store import UnitStore, stored_class
+from building import TownHall
+from scheduler import EventScheduler
+from constants import TILE_SIZE, BUILDING_TOWNHALL, RESOURCE_NONE, RESOURCE_WOOD, GAME_AREA_WIDTH, SCREEN_HEIGHT
+
+BASELINE_PATH = 'benchmark_baseline.json' # Default baseline of the scenario suite
+REGRESSION_THRESHOLD = 0.25 # A case regressed if it got slower than baseline * (1 + threshold)
+SUITE_REPEATS = 3 # Every suite case reports the best of this many runs
+NOISE_FLOOR_MS = 0.005 # Slowdowns smaller than this are timer noise, whatever the ratio
+
+
+def _time_call(func, *args):
+    """Runs func(*args) once. Returns (result, elapsed_seconds)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_terrain(radius: int, seed: int) -> dict:
+    """Compares per-cell and vectorized terrain classification for one radius."""
+    (loop_terrain, loop_biome), loop_s = _time_call(terrain.classify_terrain_loop, radius, seed)
+    (vec_terrain, vec_biome), vec_s = _time_call(terrain.classify_terrain, radius, seed)
+    identical = (np.array_equal(np.asarray(loop_terrain, dtype=np.uint8), vec_terrain) and
+                 np.array_equal(np.asarray(loop_biome, dtype=np.uint8), vec_biome))
+    return {'radius': radius, 'loop_s': loop_s, 'vectorized_s': vec_s, 'identical': identical}
+
+
+def bench_map(radius: int, seed: int) -> dict:
+    """Times full GameMap construction and reports the memory used per tile."""
+    game_map, build_s = _time_call(lambda: GameMap(radius, True, seed, lazy=False))
+    tiles = game_map.diameter * game_map.diameter
+    return {'radius': radius, 'build_s': build_s, 'bytes_per_tile': game_map.grid.nbytes / tiles}
+
+
+def bench_lazy_map(radius: int, seed: int, explored: int = 256) -> dict:
+    """
+    Up-front vs lazy GameMap: build time, then the time to generate an explored
+    square around the center on the lazy map (which must match the full map there).
+    """
+    full_map, full_s = _time_call(lambda: GameMap(radius, True, seed, lazy=False))
+    lazy_map, lazy_s = _time_call(lambda: GameMap(radius, True, seed, lazy=True))
+    low, high = radius - explored // 2, radius + explored // 2
+    _, explore_s = _time_call(lazy_map.ensure_generated, low, low, high, high)
+    window = (slice(max(0, low), high + 1), slice(max(0, low), high + 1))
+    identical = all(np.array_equal(getattr(full_map.grid, name)[window], getattr(lazy_map.grid, name)[window])
+                    for name in full_map.grid.LAYER_NAMES)
+    return {'radius': radius, 'full_s': full_s, 'lazy_s': lazy_s, 'explore_s': explore_s,
+            'generated': lazy_map.generated.mean(), 'identical': identical}
+
+
+def bench_respawns(radius: int, seed: int, frames: int = 600) -> dict:
+    """Depletes every resource tile on the map, then times respawn updates at 60 FPS game time."""
+    game_map = GameMap(radius, seed=seed)
+    ys, xs = np.nonzero(game_map.grid.resource_type != 0)
+    for x, y in zip(xs.tolist(), ys.tolist()):
+        tile = game_map.get_tile(x, y)
+        tile.gather_resource(tile.resource_amount)
+        game_map.mark_for_respawn(x, y)
+    pending = len(game_map.respawns)
+    start = time.perf_counter()
+    for frame in range(1, frames + 1):
+        game_map.update_respawns(frame * 1000.0 / 60, 1.0)
+    elapsed = time.perf_counter() - start
+    return {'radius': radius, 'pending': pending, 'frame_us': elapsed / frames * 1e6}
+
+
+def bench_paths(radius: int, seed: int, trips: int = 200) -> dict:
+    """Times A* trips from random walkable tiles to a few shared goals, uncached vs through the PathCache."""
+    game_map = GameMap(radius, seed=seed)
+    rng = random.Random(seed)
+    ys, xs = np.nonzero(game_map.grid.walkable)
+    tiles = list(zip(xs.tolist(), ys.tolist()))
+    goals = rng.sample(tiles, 4)
+    pairs = []
+    while len(pairs) < trips:
+        start, goal = rng.choice(tiles), rng.choice(goals)
+        if game_map.is_reachable(*start, *goal): pairs.append((start, goal))
+    _, uncached_s = _time_call(lambda: [pathfinding.find_path(game_map.grid, start, goal) for start, goal in pairs])
+    _, cached_s = _time_call(lambda: [game_map.find_path(*start, *goal) for start, goal in pairs])
+    return {'radius': radius, 'trips': trips, 'uncached_ms': uncached_s / trips * 1000,
+            'cached_ms': cached_s / trips * 1000}
+
+
+class _Dot:
+    """Stand-in unit for the unit query benchmark."""
+    def __init__(self, grid_x: int, grid_y: int):
+        self.type = 0; self.grid_x = grid_x; self.grid_y = grid_y
+
+
+def bench_unit_queries(units: int, seed: int, map_size: int = 201, radius: int = 15, queries: int = 2000) -> dict:
+    """Times 'everything within radius tiles' queries: a scan of all units vs the UnitGrid."""
+    rng = random.Random(seed)
+    dots = [_Dot(rng.randrange(map_size), rng.randrange(map_size)) for _ in range(units)]
+    unit_grid = UnitGrid()
+    for dot in dots: unit_grid.add(dot, dot.grid_x, dot.grid_y)
+    centers = [(rng.randrange(map_size), rng.randrange(map_size)) for _ in range(queries)]
+    radius_sq = radius * radius
+
+    def scan():
+        return [sum(1 for d in dots if (d.grid_x - x)**2 + (d.grid_y - y)**2 < radius_sq) for x, y in centers]
+    def hashed():
+        return [sum(1 for d in unit_grid.query(x, y, radius) if (d.grid_x - x)**2 + (d.grid_y - y)**2 < radius_sq)
+                for x, y in centers]
+    scan_counts, scan_s = _time_call(scan)
+    hashed_counts, hashed_s = _time_call(hashed)
+    return {'units': units, 'scan_us': scan_s / queries * 1e6, 'grid_us': hashed_s / queries * 1e6,
+            'identical': scan_counts == hashed_counts}
+
+
+def bench_unit_movement(units: int, seed: int, map_size: int = 201, frames: int = 30) -> dict:
+    """Times every unit walking towards its own point: scalar move_towards vs one UnitStore.step per frame."""
+    def walk(batched: bool) -> tuple[float, list]:
+        rng = random.Random(seed)
+        unit_grid = UnitGrid(); store = UnitStore() if batched else None
+        unit_class = stored_class(Worker) if batched else Worker
+        walkers = []
+        for _ in range(units):
+            unit = unit_class(rng.randrange(map_size), rng.randrange(map_size), 1.0); unit.attach_to(unit_grid)
+            if store is not None: unit.attach_store(store)
+            walkers.append((unit, rng.uniform(0, map_size * TILE_SIZE), rng.uniform(0, map_size * TILE_SIZE)))
+        start = time.perf_counter()
+        for _ in range(frames):
+            for unit, target_x, target_y in walkers: unit.move_towards(target_x, target_y, 1 / 60)
+            if store is not None: store.step(1 / 60)
+        return time.perf_counter() - start, [(unit.grid_x, unit.grid_y) for unit, _, _ in walkers]
+
+    scalar_s, scalar_tiles = walk(False)
+    batched_s, batched_tiles = walk(True)
+    return {'units': units, 'scalar_ms': scalar_s / frames * 1000, 'batched_ms': batched_s / frames * 1000,
+            'identical': scalar_tiles == batched_tiles}
+
+
+# --- Scenario suite ---
+# Each scenario returns {case name: milliseconds per operation}, best of SUITE_REPEATS runs.
+
+def _best_ms(func, operations: int = 1, repeats: int = SUITE_REPEATS, setup=None) -> float:
+    """Best wall time of repeats calls of func (each after an untimed setup()), in ms per operation."""
+    best = float('inf')
+    for _ in range(repeats):
+        if setup is not None: setup()
+        best = min(best, _time_call(func)[1])
+    return best / operations * 1000
+
+
+def _walkable_tiles(game_map: GameMap, count: int, rng: random.Random) -> list[tuple[int, int]]:
+    ys, xs = np.nonzero(game_map.grid.walkable)
+    return rng.sample(list(zip(xs.tolist(), ys.tolist())), count)
+
+
+def scenario_map_generation(seed: int) -> dict[str, float]:
+    """Full (up-front) GameMap construction at several radii."""
+    return {f"map generation r={radius}": _best_ms(lambda: GameMap(radius, True, seed, lazy=False))
+            for radius in (50, 100, 200)}
+
+
+def scenario_nearest_queries(seed: int, queries: int = 500) -> dict[str, float]:
+    """find_nearest_resource / find_nearest_building latency from random walkable tiles."""
+    results = {}
+    for radius in (50, 100, 200):
+        game_map = GameMap(radius, seed=seed); rng = random.Random(seed)
+        for x, y in _walkable_tiles(game_map, 4, rng): game_map.get_tile(x, y).set_building(TownHall(x, y))
+        starts = _walkable_tiles(game_map, queries, rng)
+        game_map.find_nearest_building(*starts[0], BUILDING_TOWNHALL) # Builds the distance field
+        results[f"nearest resource r={radius}"] = _best_ms(
+            lambda: [game_map.find_nearest_resource(x, y, RESOURCE_WOOD) for x, y in starts], queries)
+        results[f"nearest building r={radius}"] = _best_ms(
+            lambda: [game_map.find_nearest_building(x, y, BUILDING_TOWNHALL) for x, y in starts], queries)
+    return results
+
+
+def _game_with_units(seed: int, units: int):
+    """Headless Game with 'units' extra workers and as many enemies; the Town Hall can't fall."""
+    import game # Imports pygame and opens the (dummy) display
+    g = game.Game(seed)
+    g.town_hall.hp = g.town_hall.max_hp = 10**9
+    rng = random.Random(seed)
+    for unit_class, units_list in ((g.worker_class, g.workers), (g.enemy_class, g.enemies)):
+        for x, y in _walkable_tiles(g.game_map, units, rng):
+            unit = unit_class(x, y, 1.0); g._add_unit(unit); units_list.append(unit)
+    g.population_cap = g.population = len(g.workers)
+    return g
+
+
+def scenario_game_update(seed: int, steps: int = 20) -> dict[str, float]:
+    """One one-tick Game frame (advance: queued path searches, then step) with 10/100/1000 workers and as many enemies."""
+    results = {}
+    for units in (10, 100, 1000):
+        g = _game_with_units(seed, units)
+        for _ in range(5): g.advance(g.timestep_ms) # Warm caches: paths, distance fields
+        results[f"game update {units}+{units} units"] = _best_ms(lambda: [g.advance(g.timestep_ms) for _ in range(steps)], steps)
+    return results
+
+
+def scenario_respawns(seed: int, frames: int = 300) -> dict[str, float]:
+    """
+    update_respawns per 60 FPS frame with every resource of the map pending: while
+    nothing is due yet, and while all of them come due spread over the timed frames.
+    """
+    results = {}
+    frame_ms = 1000.0 / 60
+    for radius in (100, 200, 400):
+        game_map = GameMap(radius, seed=seed, lazy=False)
+        ys, xs = np.nonzero(game_map.grid.resource_type != RESOURCE_NONE)
+        resource_tiles = list(zip(xs.tolist(), ys.tolist()))
+
+        def deplete(first_due: float):
+            rng = random.Random(seed); game_map.respawns = EventScheduler()
+            for x, y in resource_tiles:
+                tile = game_map.get_tile(x, y)
+                if tile.resource_amount > 0: tile.gather_resource(tile.resource_amount)
+                game_map.respawns.schedule((x, y), first_due + rng.random() * frames * frame_ms)
+
+        def run_frames():
+            for frame in range(1, frames + 1): game_map.update_respawns(frame * frame_ms, 1.0)
+        results[f"respawn frame r={radius} (none due)"] = _best_ms(
+            run_frames, frames, setup=lambda: deplete(frames * frame_ms + 1))
+        results[f"respawn frame r={radius} (draining)"] = _best_ms(run_frames, frames, setup=lambda: deplete(0))
+    return results
+
+
+def scenario_render(seed: int, frames: int = 30) -> dict[str, float]:
+    """Game.draw of a full frame (100 workers and enemies), with a still and a panning camera, then zoomed out."""
+    g = _game_with_units(seed, 100)
+    g.draw() # Renders the visible map chunks once
+    results = {'render frame (still camera)': _best_ms(lambda: [g.draw() for _ in range(frames)], frames)}
+    def pan():
+        for _ in range(frames):
+            g.camera_x = (g.camera_x + 8) % max(1, g.game_map.width_pixels - GAME_AREA_WIDTH); g.draw()
+    results['render frame (panning camera)'] = _best_ms(pan, frames)
+    for tile_px in (16, 4): # A scaled chunk level and an overview level
+        while g.tile_px > tile_px: g.zoom(-1, GAME_AREA_WIDTH // 2, SCREEN_HEIGHT // 2)
+        g.draw()
+        results[f"render frame (zoomed out, {tile_px} px/tile)"] = _best_ms(lambda: [g.draw() for _ in range(frames)], frames)
+    return results
+
+
+SCENARIOS = (scenario_map_generation, scenario_nearest_queries, scenario_game_update, scenario_respawns,
+             scenario_render)
+
+
+def run_suite(seed: int) -> dict[str, float]:
+    """Runs every scenario (their console output is swallowed). Returns {case: ms per operation}."""
+    results = {}
+    for scenario in SCENARIOS:
+        with contextlib.redirect_stdout(io.StringIO()): results.update(scenario(seed))
+    return results
+
+
+def compare_to_baseline(results: dict[str, float], baseline: dict[str, float],
+                        threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """
+    Prints every case next to its baseline. Returns the cases slower than
+    baseline * (1 + threshold) by more than NOISE_FLOOR_MS.
+    """
+    regressions = []
+    print(f"{'case':<44} {'baseline (ms)':>14} {'now (ms)':>10} {'ratio':>7}")
+    for name, ms in results.items():
+        base = baseline.get(name)
+        if base is None: print(f"{name:<44} {'-':>14} {ms:>10.4f} {'new':>7}"); continue
+        ratio = ms / max(base, 1e-12)
+        flag = ''
+        if ratio > 1 + threshold and ms - base > NOISE_FLOOR_MS: flag = '  REGRESSION'; regressions.append(name)
+        print(f"{name:<44} {base:>14.4f} {ms:>10.4f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def suite_main(args):
+    results = run_suite(args.seed)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+        print(f"Baseline with {len(results)} cases written to {args.save_baseline}")
+        return 0
+    try:
+        with open(args.baseline) as f: baseline = json.load(f)
+    except OSError:
+        print(f"No baseline at {args.baseline}; results only (write one with --save-baseline).")
+        baseline = {'seed': args.seed, 'results': {}}
+    if baseline.get('seed') != args.seed: print(f"Warning: baseline was recorded with seed {baseline.get('seed')}")
+    regressions = compare_to_baseline(results, baseline['results'], args.threshold)
+    if regressions: print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+    else: print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Civ Sim performance benchmarks")
+    parser.add_argument('--radius', type=int, nargs='+', default=[50, 100, 200],
+                        help="Map radii to generate terrain for")
+    parser.add_argument('--seed', type=int, default=1234, help="Map seed")
+    parser.add_argument('--suite', action='store_true', help="Run the scenario suite against a baseline instead")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON to compare the suite with")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Write the suite results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown reported as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+    if args.suite: sys.exit(suite_main(args))
+
+    print(f"{'radius':>8} {'loop (s)':>10} {'vector (s)':>11} {'speedup':>8}  identical")
+    for radius in args.radius:
+        result = bench_terrain(radius, args.seed)
+        speedup = result['loop_s'] / max(result['vectorized_s'], 1e-9)
+        print(f"{radius:>8} {result['loop_s']:>10.3f} {result['vectorized_s']:>11.3f} "
+              f"{speedup:>7.1f}x  {result['identical']}")
+
+    print(f"\n{'radius':>8} {'GameMap (s)':>12} {'bytes/tile':>11}")
+    for radius in args.radius:
+        result = bench_map(radius, args.seed)
+        print(f"{radius:>8} {result['build_s']:>12.3f} {result['bytes_per_tile']:>11.1f}")
+
+    print(f"\n{'radius':>8} {'full map (s)':>13} {'lazy map (s)':>13} {'explore 256x256 (s)':>20} {'generated':>10}  identical")
+    for radius in (500, 1000):
+        result = bench_lazy_map(radius, args.seed)
+        print(f"{radius:>8} {result['full_s']:>13.3f} {result['lazy_s']:>13.4f} {result['explore_s']:>20.3f} "
+              f"{result['generated']:>9.1%}  {result['identical']}")
+
+    print(f"\n{'radius':>8} {'pending':>9} {'respawn update (us/frame)':>26}")
+    for radius in args.radius:
+        result = bench_respawns(radius, args.seed)
+        print(f"{radius:>8} {result['pending']:>9} {result['frame_us']:>26.1f}")
+
+    print(f"\n{'units':>8} {'scan (us/query)':>16} {'grid (us/query)':>16}  identical")
+    for units in (10, 100, 1000):
+        result = bench_unit_queries(units, args.seed)
+        print(f"{units:>8} {result['scan_us']:>16.1f} {result['grid_us']:>16.1f}  {result['identical']}")
+
+    print(f"\n{'units':>8} {'scalar (ms/frame)':>18} {'batched (ms/frame)':>19}  same tiles")
+    for units in (100, 1000, 10000):
+        result = bench_unit_movement(units, args.seed)
+        print(f"{units:>8} {result['scalar_ms']:>18.2f} {result['batched_ms']:>19.2f}  {result['identical']}")
+
+    print(f"\n{'radius':>8} {'A* (ms/trip)':>13} {'cached (ms/trip)':>17}")
+    for radius in args.radius:
+        result = bench_paths(radius, args.seed)
+        print(f"{radius:>8} {result['uncached_ms']:>13.2f} {result['cached_ms']:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
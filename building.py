@@ -1,6 +1,4 @@
 # building.py
-# Needs pygame for drawing
-import pygame
 from constants import * # Import necessary constants
 
 class Building:
@@ -13,11 +11,12 @@ class Building:
         self.hp = BUILDING_HP.get(building_type, 100)
         self.max_hp = self.hp
 
-    def draw(self, surface: pygame.Surface, camera_x: int, camera_y: int):
-        """Draws the building and its HP bar."""
-        screen_x = self.x * TILE_SIZE - camera_x
-        screen_y = self.y * TILE_SIZE - camera_y
-        size = TILE_SIZE
+    def draw(self, surface: 'pygame.Surface', camera_x: int, camera_y: int, tile_px: int = TILE_SIZE):
+        """Draws the building and its HP bar at tile_px screen pixels per tile."""
+        import pygame # Only needed when rendering; headless simulations never import it
+        screen_x = self.x * tile_px - camera_x
+        screen_y = self.y * tile_px - camera_y
+        size = tile_px
 
         # Culling
         if not pygame.Rect(screen_x, screen_y, size, size).colliderect(surface.get_rect()):
@@ -31,13 +30,13 @@ class Building:
 
         # Draw building representation
         pygame.draw.rect(surface, color, (screen_x, screen_y, size, size))
-        pygame.draw.rect(surface, BLACK, (screen_x, screen_y, size, size), 2)
+        pygame.draw.rect(surface, BLACK, (screen_x, screen_y, size, size), max(1, size // 16))
 
         # Draw HP bar if damaged
         if self.hp < self.max_hp and self.max_hp > 0: # Avoid division by zero
             hp_ratio = max(0, self.hp / self.max_hp)
             bar_width = size * 0.8
-            bar_height = 5
+            bar_height = max(2, size * 5 // 32)
             bar_x = screen_x + (size - bar_width) / 2
             bar_y = screen_y - bar_height - 3
 
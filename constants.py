@@ -104,6 +104,8 @@ WORKER_GATHER_RATE = 1 # amount per gather action
 WORKER_GATHER_TIME = 500 # ms per gather action
 WORKER_SPEED = 1.8 # tiles per second
 WORKER_SPAWN_TIME = 10 * 1000 # ms
+WORKER_IDLE_RETRY_TIME = 1000 # ms an idle worker waits before searching for resources again
+WORKER_TOWNHALL_RETRY_TIME = 3000 # ms a worker that can't reach a Town Hall waits before looking again
 
 # Enemy Constants
 ENEMY_HP = 50
@@ -112,12 +114,34 @@ ENEMY_ATTACK_RATE = 1000 # ms between attacks
 ENEMY_SPAWN_TIME_BASE = 20 * 1000 # ms
 ENEMY_SPEED = 1.2 # tiles per second
 ENEMY_SCAN_RADIUS_SQ = (15 * TILE_SIZE) ** 2 # Squared pixel distance
+ENEMY_IDLE_SCAN_TIME = 250 # ms between target scans of an idle enemy
 
 # Initial Game Settings
 INITIAL_RESOURCES = {'Wood': 100, 'Food': 100, 'Stone': 50, 'Iron': 10, 'Water': 100}
 INITIAL_POPULATION_CAP = 5
 FOOD_CONSUMPTION_RATE_BASE = 0.1 # Per person per second
 WATER_CONSUMPTION_RATE_BASE = 0.05 # Per person per second
+DEFAULT_MAP_RADIUS = 50
+SIM_TIMESTEP_MS = 50 # Fixed game-time step of Simulation runs (the interactive game ticks at it too)
+GAME_TICK_BUDGET_MS = 20 # Wall time per frame the interactive game may spend on ticks; the backlog beyond is dropped
+GAME_MAX_FRAME_MS = 250 # A longer frame (a stall, a moved window) only advances the game by this much
+LOD_UPDATE_INTERVAL_MS = 250 # Longest time between updates of a worker walking far from the view and from enemies
+LOD_MARGIN_TILES = 4 # Workers this far beyond the view or an enemy's scan radius still get every update
+
+# Map Rendering
+MAP_CHUNK_TILES = 16 # Side length (in tiles) of one pre-rendered / lazily generated map chunk
+MAP_CHUNK_CACHE_SIZE = 64 # Chunk surfaces kept in memory (1 MB each at TILE_SIZE 32)
+ZOOM_TILE_SIZES = (32, 16, 8, 4, 2, 1) # Mouse wheel zoom steps, in screen pixels per tile (the first is TILE_SIZE)
+MAP_DETAIL_MIN_TILE_PX = 16 # Zoomed out further, the map is drawn from the overview and entities as points
+MAP_OVERVIEW_PAGE_TILES = 256 # Side length (in tiles) of one page of the one-pixel-per-tile overview
+MAP_OVERVIEW_CACHE_PAGES = 64 # Overview pages kept in memory (256 KB each)
+
+QUICKSAVE_PATH = 'quicksave.civsave' # F5 saves here, F9 loads it
+
+# Profiler (F3 toggles the overlay)
+PROFILER_WINDOW_FRAMES = 120 # Frames kept for the rolling per-phase statistics
+PROFILER_HISTOGRAM_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33) # Upper bounds of the phase time histogram buckets
+PROFILER_OVERLAY_ALPHA = 180 # Background opacity of the overlay
 
 # Map Generation Constants
 NOISE_SCALE = 0.03 # Lower = larger features
@@ -130,10 +154,16 @@ TEMP_THRESHOLD_LOW = -0.2 # For Arctic
 TEMP_THRESHOLD_HIGH = 0.3 # For Desert
 MOISTURE_THRESHOLD_LOW = -0.1 # For Desert
 MOISTURE_THRESHOLD_HIGH = 0.1 # For Forest
+MAP_LAZY_RADIUS = 500 # Maps at least this large generate chunks on first access instead of up front
+MAP_LAZY_EXPLORE_MARGIN = 32 # Lazy maps: tiles around units (and path searches) generated ahead of time
+MAP_LAZY_START_RADIUS = 64 # Lazy maps: the starting tile is picked within this distance of the center
+MAP_LAZY_ENEMY_SPAWN_RADIUS = 128 # Lazy maps: enemies spawn at this distance from the center, not the world edge
 
 # UI Constants
 UI_DEFAULT_FONT_SIZE = 24
 UI_SMALL_FONT_SIZE = 20
 UI_SLIDER_HEIGHT = 15
 UI_PADDING = 10
-UI_BUTTON_SIZE = 40
\ No newline at end of file
+UI_BUTTON_SIZE = 40
+UI_TEXT_CACHE_SIZE = 256 # Rendered text surfaces kept by the UI (least recently used are dropped)
+MINIMAP_SIZE = SIDE_PANEL_WIDTH - UI_PADDING * 2 # Side length (in pixels) of the minimap at the bottom of the side panel
\ No newline at end of file
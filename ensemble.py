@@ -0,0 +1,125 @@
+# ensemble.py
+# Runs many independent headless simulations in parallel, sweeping slider values and seeds.
+# Usage: python ensemble.py [--seeds 8] [--consumption 0.5 1 2] [--respawn 1] [--monster-spawn 1 2]
+#                           [--minutes 60] [--radius 50] [--workers 8] [--out ensemble.csv]
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import time
+from constants import * # Import constants
+from simulation import Simulation, SimulationParams
+
+SWEPT_PARAMS = ('sim_speed', 'consumption', 'respawn', 'monster_spawn') # SimulationParams fields
+SAMPLE_MINUTES = 5 # Game minutes between two points of the resource curve
+RESOURCE_COLUMNS = tuple(INITIAL_RESOURCES) # Resources recorded on the curve, in column order
+
+
+def make_jobs(seeds: list[int], sweep: dict[str, list[float]], radius: int, minutes: float,
+              sample_minutes: float = SAMPLE_MINUTES, batched: bool = False) -> list[dict]:
+    """One job per combination of swept parameter values and seed (seeds vary fastest)."""
+    jobs = []
+    values = [sweep.get(name, [1.0]) for name in SWEPT_PARAMS]
+    for combination in itertools.product(*values):
+        for seed in seeds:
+            jobs.append({'run': len(jobs), 'seed': seed, 'radius': radius, 'minutes': minutes,
+                         'sample_minutes': sample_minutes, 'batched': batched,
+                         **dict(zip(SWEPT_PARAMS, combination))})
+    return jobs
+
+
+def curve_columns(minutes: float, sample_minutes: float = SAMPLE_MINUTES) -> list[str]:
+    """Column names of the resource curve: one per resource and sample time (e.g. 'food_15m')."""
+    samples = int(minutes // sample_minutes)
+    return [f"{name.lower()}_{i * sample_minutes:g}m" for i in range(samples + 1) for name in RESOURCE_COLUMNS]
+
+
+def result_columns(minutes: float, sample_minutes: float = SAMPLE_MINUTES) -> list[str]:
+    return (['run', 'seed', *SWEPT_PARAMS, 'radius', 'survived', 'survival_minutes', 'peak_population',
+             'final_population', 'enemies', 'buildings', 'wall_seconds'] + curve_columns(minutes, sample_minutes))
+
+
+def run_world(job: dict) -> dict:
+    """
+    Runs one simulation to the end of the job's time (or game over) and returns its
+    result row: outcome metrics, plus the stockpile of every resource each sample
+    interval. After a game over, the remaining samples repeat the stockpile at the
+    moment of the fall.
+    Simulations print as they go; that output is dropped.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        params = SimulationParams(**{name: job[name] for name in SWEPT_PARAMS})
+        sim = Simulation(job['radius'], params, batched_units=job['batched'], seed=job['seed'])
+        end_ms = job['minutes'] * 60000; sample_ms = job['sample_minutes'] * 60000
+        peak_population = sim.population
+        curve = [dict(sim.resources)]
+        while sim.game_time_ms < end_ms and not sim.game_over:
+            sim.step()
+            if sim.population > peak_population: peak_population = sim.population
+            if sim.game_time_ms >= len(curve) * sample_ms: curve.append(dict(sim.resources))
+    samples = int(job['minutes'] // job['sample_minutes']) + 1
+    final = dict(sim.resources) # Stockpile when the run ended (the fall, for a game over)
+    curve += [final] * (samples - len(curve))
+
+    row = {name: job[name] for name in ('run', 'seed', *SWEPT_PARAMS, 'radius')}
+    row.update(survived=not sim.game_over, survival_minutes=round(sim.game_time_ms / 60000, 3),
+               peak_population=peak_population, final_population=sim.population, enemies=len(sim.enemies),
+               buildings=len(sim.buildings), wall_seconds=round(time.perf_counter() - start, 3))
+    for i, resources in enumerate(curve[:samples]):
+        for name in RESOURCE_COLUMNS:
+            row[f"{name.lower()}_{i * job['sample_minutes']:g}m"] = round(resources.get(name, 0), 2)
+    return row
+
+
+def run_ensemble(jobs: list[dict], path: str, workers: int | None = None) -> int:
+    """
+    Runs jobs across a pool of worker processes and appends each result row to the CSV
+    at path as soon as its run finishes (rows are in completion order; 'run' is the job
+    index). Runs share nothing, so the speedup is close to linear in the number of cores.
+    Returns the number of runs written.
+    """
+    if not jobs: return 0
+    columns = result_columns(jobs[0]['minutes'], jobs[0]['sample_minutes'])
+    workers = workers or os.cpu_count() or 1
+    written = 0
+    with open(path, 'w', newline='') as f, multiprocessing.Pool(min(workers, len(jobs))) as pool:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        for row in pool.imap_unordered(run_world, jobs):
+            writer.writerow(row); f.flush(); written += 1
+            print(f"[{written}/{len(jobs)}] run {row['run']} seed {row['seed']}: "
+                  f"{'survived' if row['survived'] else 'fell at %.1f min' % row['survival_minutes']}, "
+                  f"peak population {row['peak_population']} ({row['wall_seconds']:.1f} s)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of headless simulations in parallel")
+    parser.add_argument('--seeds', type=int, default=4, help="Seeds per parameter combination")
+    parser.add_argument('--first-seed', type=int, default=1, help="First seed (seeds are consecutive)")
+    parser.add_argument('--minutes', type=float, default=60, help="Game time to simulate per run")
+    parser.add_argument('--radius', type=int, default=DEFAULT_MAP_RADIUS, help="Map radius")
+    parser.add_argument('--sample-minutes', type=float, default=SAMPLE_MINUTES,
+                        help="Game minutes between resource curve samples")
+    parser.add_argument('--batched', action='store_true', help="Keep units in a NumPy UnitStore")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--out', default='ensemble.csv', help="Results CSV, one row per run")
+    for name in SWEPT_PARAMS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs='+', default=[1.0], dest=name,
+                            help=f"{name.replace('_', ' ').capitalize()} multiplier(s) to sweep")
+    args = parser.parse_args()
+
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    jobs = make_jobs(seeds, {name: getattr(args, name) for name in SWEPT_PARAMS}, args.radius, args.minutes,
+                     args.sample_minutes, args.batched)
+    start = time.perf_counter()
+    written = run_ensemble(jobs, args.out, args.workers)
+    print(f"{written} runs written to {args.out} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
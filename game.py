@@ -1,21 +1,24 @@
 # game.py
 import pygame
 import sys
-import random
-import math
+import time
+import numpy as np
 from constants import * # Import ALL constants
-# Import specific classes needed
-from map import GameMap
 # Building base class *IS* needed for isinstance checks
-from building import Building, TownHall, House # Import specific building types AND BASE CLASS
-from unit import Unit, Worker, Enemy # Import specific unit types (Unit needed for isinstance)
+from building import Building, TownHall # Import specific building types AND BASE CLASS
+from unit import Unit # Unit needed for isinstance
 from ui import UI
+from simulation import Simulation, SimulationParams
+from pathfinding import PATH_REQUEST_BUDGET_MS
+import savegame
+from map_renderer import Minimap, draw_points
 
-class Game:
-    """Main game class orchestrating all game components and logic."""
+class Game(Simulation):
+    """Interactive game: a Simulation plus window, input, camera and drawing."""
+    paths_each_step = False # advance() runs queued path searches once per frame, however many ticks it runs
 
-    def __init__(self):
-        """Initializes Pygame, game state, map, UI, and starting objects."""
+    def __init__(self, seed: int | None = None):
+        """Initializes Pygame, game state, map, UI, and starting objects. seed fixes map and spawns."""
         pygame.init()
         pygame.font.init()
 
@@ -28,22 +31,14 @@ class Game:
             print(f"ERROR initializing font: {e}. Using fallback.")
             self.font = pygame.font.SysFont(pygame.font.get_default_font(), 24)
 
-        self.resources = INITIAL_RESOURCES.copy()
-        self.population = 0
-        self.population_cap = INITIAL_POPULATION_CAP
-        self.game_time_ms = 0
-        self.last_consumption_check_time = 0
-        self.last_enemy_spawn_time = 0
-
-        self.map_radius = 50
-        print(f"Initializing Game with map radius: {self.map_radius}")
-        self.game_map = GameMap(self.map_radius)
-        self.buildings: list[Building] = [] # Use base Building type hint now
-        self.workers: list[Worker] = []
-        self.enemies: list[Enemy] = []
-
         self.ui = UI()
+        try:
+            super().__init__(DEFAULT_MAP_RADIUS, self.read_slider_params(), seed=seed,
+                             path_budget_ms=PATH_REQUEST_BUDGET_MS, # Bursts of path searches are spread over frames
+                             lod=True) # Workers walking off screen, away from enemies, are updated less often
+        except RuntimeError as e: Game.quit_game(str(e))
 
+        self.tile_px = TILE_SIZE # Zoom: screen pixels per tile (one of ZOOM_TILE_SIZES); the camera is in screen pixels
         self.camera_x = (self.game_map.width_pixels - GAME_AREA_WIDTH) // 2
         self.camera_y = (self.game_map.height_pixels - SCREEN_HEIGHT) // 2
         self.dragging = False
@@ -53,75 +48,76 @@ class Game:
         self.build_mode = False
         self.building_to_place_type = None
         self.build_ghost_pos = None
+        self.show_profiler = False # F3: frame profiler overlay (profiling runs only while it is shown)
+        self.tick_accumulator_ms = 0.0 # Game time not yet simulated: less than one tick after each frame
+        self.previous_positions: dict[Unit, tuple[float, float]] = {} # Unit positions before the last tick
+        self.minimap: Minimap | None = None # Built on the first draw (and again for a loaded map)
 
-        self._spawn_initial_town_hall()
-        self.population = len(self.workers) # Correct initial population
-        self.clamp_camera()
+        self.center_camera_on(self.town_hall.x, self.town_hall.y)
         print("Game initialization complete.")
 
-    def _spawn_initial_town_hall(self):
-        """Finds a suitable location and spawns the starting Town Hall and worker."""
-        print("Attempting to spawn initial Town Hall...")
-        start_tile = self.game_map.get_random_walkable_tile()
-        if not start_tile: Game.quit_game("CRITICAL ERROR: No valid starting tile found!")
-
-        town_hall = TownHall(start_tile.x, start_tile.y)
-        if start_tile.set_building(town_hall):
-            self.buildings.append(town_hall)
-            print(f"Spawned Town Hall at ({start_tile.x}, {start_tile.y})")
-            self.center_camera_on(start_tile.x, start_tile.y) # Center camera
-
-            initial_sim_speed = self.ui.sliders['sim_speed'].get_value()
-            if not self.try_spawn_worker(town_hall, initial_sim_speed):
-                 print("Warning: Could not spawn initial worker.")
-        else: Game.quit_game("CRITICAL ERROR: Failed to place TH on selected tile!")
-
-    def try_spawn_worker(self, town_hall: TownHall, current_sim_speed: float) -> bool:
-        """Attempts to spawn a worker near the town hall."""
-        if self.population >= self.population_cap: return False
-
-        spawn_tile = None
-        for r in range(1, 4):
-            possible_spawns = []
-            for dx in range(-r, r + 1):
-                for dy in range(-r, r + 1):
-                     if abs(dx) != r and abs(dy) != r: continue
-                     check_x, check_y = town_hall.x + dx, town_hall.y + dy
-                     tile = self.game_map.get_tile(check_x, check_y)
-                     if tile and tile.walkable and tile.building is None and tile.resource_type == RESOURCE_NONE:
-                         occupied = any(u.grid_x == check_x and u.grid_y == check_y
-                                        for u in self.workers + self.enemies)
-                         if not occupied: possible_spawns.append(tile)
-            if possible_spawns:
-                spawn_tile = random.choice(possible_spawns); break
-
-        if spawn_tile:
-            new_worker = Worker(spawn_tile.x, spawn_tile.y, current_sim_speed)
-            self.workers.append(new_worker); self.population += 1
-            return True
-        return False
+    def read_slider_params(self) -> SimulationParams:
+        """Current UI slider values as simulation parameters."""
+        sliders = self.ui.sliders
+        return SimulationParams(sim_speed=sliders['sim_speed'].get_value(),
+                                consumption=sliders['consumption'].get_value(),
+                                respawn=sliders['respawn'].get_value(),
+                                monster_spawn=sliders['monster_spawn'].get_value())
 
     def center_camera_on(self, grid_x: int, grid_y: int):
          """Centers the camera view on a specific grid coordinate."""
-         self.camera_x = grid_x * TILE_SIZE - GAME_AREA_WIDTH // 2
-         self.camera_y = grid_y * TILE_SIZE - SCREEN_HEIGHT // 2
+         self.camera_x = grid_x * self.tile_px - GAME_AREA_WIDTH // 2
+         self.camera_y = grid_y * self.tile_px - SCREEN_HEIGHT // 2
          self.clamp_camera()
 
+    def zoom(self, steps: int, screen_x: int, screen_y: int):
+        """Zooms in (steps > 0) or out through ZOOM_TILE_SIZES, keeping the map point under (screen_x, screen_y) in place."""
+        level = ZOOM_TILE_SIZES.index(self.tile_px)
+        tile_px = ZOOM_TILE_SIZES[max(0, min(len(ZOOM_TILE_SIZES) - 1, level - steps))]
+        if tile_px == self.tile_px: return
+        grid_x = (screen_x + self.camera_x) / self.tile_px; grid_y = (screen_y + self.camera_y) / self.tile_px
+        self.tile_px = tile_px
+        self.camera_x = round(grid_x * tile_px - screen_x); self.camera_y = round(grid_y * tile_px - screen_y)
+        self.clamp_camera()
+        if self.dragging: # Keep dragging from here at the new zoom
+            self.drag_start_pos = (screen_x, screen_y); self.drag_start_camera = (self.camera_x, self.camera_y)
+        if self.build_mode: self.build_ghost_pos = self.screen_to_grid(screen_x, screen_y)
+
     def run(self):
         """Main game loop."""
         while True:
             dt_ms_realtime = self.clock.tick(60)
-            dt_realtime = dt_ms_realtime / 1000.0
-            current_sim_speed = max(0.01, self.ui.sliders['sim_speed'].get_value())
-            dt_simulated = dt_realtime * current_sim_speed
-            dt_ms_simulated = dt_ms_realtime * current_sim_speed
-            self.game_time_ms += dt_ms_simulated
-
-            for unit in self.workers + self.enemies: unit.set_speed_modifier(current_sim_speed)
+            self.params = self.read_slider_params()
+            current_sim_speed = max(0.01, self.params.sim_speed)
+            dt_ms_simulated = min(dt_ms_realtime, GAME_MAX_FRAME_MS) * current_sim_speed
 
-            self.handle_events()
-            self.update(dt_simulated, dt_ms_simulated)
+            with self.profiler.phase('events'): self.handle_events()
+            with self.profiler.phase('update'): self.profiler.count('ticks', self.advance(dt_ms_simulated))
             self.draw()
+            self.profiler.end_frame()
+
+    def advance(self, dt_ms_simulated: float) -> int:
+        """
+        Runs as many fixed ticks (timestep_ms of game time each) as the game time owed
+        covers, so the sim speed slider sets how many ticks run per second, not how big
+        they are. Ticks stop once GAME_TICK_BUDGET_MS of wall time is used; the rest of the
+        backlog is dropped, so an overloaded game runs slower instead of falling behind
+        further every frame. Remembers unit positions before the last tick, which draw()
+        interpolates from. Queued path searches run once per frame, right before the first
+        tick, within path_budget_ms; frames without a tick skip them, as their results only
+        last until the next search pass and no worker would read them. Returns the ticks run.
+        """
+        self.tick_accumulator_ms += dt_ms_simulated
+        ticks = int(self.tick_accumulator_ms // self.timestep_ms)
+        if ticks and self.path_budget_ms is not None: self.process_path_requests()
+        deadline = time.perf_counter() + GAME_TICK_BUDGET_MS / 1000
+        for tick in range(ticks):
+            if tick == ticks - 1: self.previous_positions = {unit: (unit.x, unit.y) for unit in self.workers + self.enemies}
+            self.step(); self.tick_accumulator_ms -= self.timestep_ms
+            if tick < ticks - 1 and time.perf_counter() >= deadline: # Over budget: drop the backlog
+                self.tick_accumulator_ms %= self.timestep_ms; self.previous_positions = {}
+                return tick + 1
+        return ticks
 
     def handle_events(self):
         """Processes all user input and system events."""
@@ -135,10 +131,19 @@ class Game:
             if ui_result:
                 if ui_result.get('type') == 'build_button_click':
                     self.handle_build_button_click(ui_result.get('building'))
+                elif ui_result.get('type') == 'minimap_click' and self.minimap is not None:
+                    self.center_camera_on(*self.minimap.to_grid(*ui_result['pos']))
                 continue # UI handled event
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE: self.cancel_build_mode(); continue
+                if event.key == pygame.K_F3: self.toggle_profiler(); continue
+                if event.key == pygame.K_F5: self.quick_save(); continue
+                if event.key == pygame.K_F9: self.quick_load(); continue
+
+            if event.type == pygame.MOUSEWHEEL: # Zoom around the mouse
+                if mouse_in_game_area: self.zoom(event.y, mouse_pos[0], mouse_pos[1])
+                continue
 
             # Build Mode Clicks
             if self.build_mode and mouse_in_game_area and event.type == pygame.MOUSEBUTTONDOWN:
@@ -171,6 +176,27 @@ class Game:
                     self.camera_x = self.drag_start_camera[0] - dx; self.camera_y = self.drag_start_camera[1] - dy
                     self.clamp_camera()
 
+    def toggle_profiler(self):
+        """Shows or hides the profiler overlay; statistics start over each time it is shown."""
+        self.show_profiler = not self.show_profiler
+        self.profiler.enabled = self.show_profiler
+        if self.show_profiler: self.profiler.reset()
+
+    def quick_save(self):
+        try:
+            savegame.save_game(self, QUICKSAVE_PATH); print(f"Game saved to {QUICKSAVE_PATH}.")
+        except OSError as e: print(f"ERROR: Could not save game: {e}")
+
+    def quick_load(self):
+        """Replaces the running game with the quick save, including the slider settings."""
+        try: savegame.restore(self, QUICKSAVE_PATH)
+        except (OSError, savegame.SaveFormatError) as e: print(f"ERROR: Could not load game: {e}"); return
+        for name in ('sim_speed', 'consumption', 'respawn', 'monster_spawn'):
+            self.ui.sliders[name].val = getattr(self.params, name)
+        self.cancel_build_mode(); self.previous_positions = {}
+        if self.town_hall: self.center_camera_on(self.town_hall.x, self.town_hall.y)
+        print(f"Game loaded from {QUICKSAVE_PATH}.")
+
     def handle_build_button_click(self, building_type: int | None):
         """Logic for when a build button is clicked."""
         if building_type is None: return
@@ -197,52 +223,12 @@ class Game:
             self.build_mode = False; self.building_to_place_type = None; self.build_ghost_pos = None
 
     def update(self, dt_simulated: float, dt_ms_simulated: float):
-        """Updates game state."""
-        consumption_mod = self.ui.sliders['consumption'].get_value()
-        respawn_mod = self.ui.sliders['respawn'].get_value()
-        monster_spawn_mod = self.ui.sliders['monster_spawn'].get_value()
-        current_sim_speed = self.ui.sliders['sim_speed'].get_value()
-
-        # --- Updates ---
-        # Town Hall Spawning
-        for building in self.buildings:
-            if isinstance(building, TownHall):
-                building.worker_spawn_timer -= dt_ms_simulated
-                if building.worker_spawn_timer <= 0:
-                    self.try_spawn_worker(building, current_sim_speed)
-                    building.worker_spawn_timer = WORKER_SPAWN_TIME
-
-        # Worker Updates
-        for worker in self.workers:
-            worker.update(dt_simulated, self.game_map, self.buildings, self.resources, self.population)
-
-        # Resource Consumption
-        if self.game_time_ms - self.last_consumption_check_time >= 1000:
-            time_passed = (self.game_time_ms - self.last_consumption_check_time) / 1000.0
-            food_need = self.population * FOOD_CONSUMPTION_RATE_BASE * consumption_mod * time_passed
-            water_need = self.population * WATER_CONSUMPTION_RATE_BASE * consumption_mod * time_passed
-            self.resources['Food'] = max(0, self.resources['Food'] - food_need)
-            self.resources['Water'] = max(0, self.resources['Water'] - water_need)
-            self.last_consumption_check_time = self.game_time_ms
-
-        # Resource Respawns
-        self.game_map.update_respawns(dt_ms_simulated, respawn_mod)
-
-        # Enemy Spawning
-        time_since_spawn = self.game_time_ms - self.last_enemy_spawn_time
-        spawn_interval = ENEMY_SPAWN_TIME_BASE / max(0.01, monster_spawn_mod)
-        if time_since_spawn >= spawn_interval:
-             self.spawn_enemy(current_sim_speed)
-             self.last_enemy_spawn_time = self.game_time_ms
-
-        # Enemy Updates (Pass only needed info: buildings, workers)
-        # --- CORRECTION: Enemy update in unit.py was changed to need buildings and workers ---
-        for enemy in self.enemies:
-            # The enemy update method expects buildings and workers list
-            enemy.update(dt_simulated, self.buildings, self.workers)
-
-        # Cleanup Dead Entities
-        self.cleanup_entities()
+        """Updates game state, then the interactive bits (game over screen, build ghost)."""
+        tile_px = self.tile_px
+        self.lod_view = (self.camera_x // tile_px, self.camera_y // tile_px,
+                         (self.camera_x + GAME_AREA_WIDTH) // tile_px, (self.camera_y + SCREEN_HEIGHT) // tile_px)
+        super().update(dt_simulated, dt_ms_simulated)
+        if self.game_over: self.handle_game_over()
 
         # Update Build Ghost (if mouse stationary)
         if self.build_mode and not self.dragging and not any(pygame.mouse.get_pressed()):
@@ -250,30 +236,6 @@ class Game:
              current_ghost_pos = self.screen_to_grid(mouse_pos[0], mouse_pos[1]) if mouse_pos[0] < GAME_AREA_WIDTH else None
              if current_ghost_pos != self.build_ghost_pos: self.build_ghost_pos = current_ghost_pos
 
-    def cleanup_entities(self):
-        """Removes dead units/buildings and updates state."""
-        initial_pop = self.population
-
-        self.workers = [w for w in self.workers if w.hp > 0]
-        self.enemies = [e for e in self.enemies if e.hp > 0]
-        destroyed = [b for b in self.buildings if b.hp <= 0]
-        self.buildings = [b for b in self.buildings if b.hp > 0]
-
-        self.population = len(self.workers) # Recalculate population
-
-        pop_cap_loss = 0
-        game_over = False
-        for b in destroyed:
-            tile = self.game_map.get_tile(b.x, b.y)
-            if tile: tile.remove_building()
-            if b.type == BUILDING_HOUSE: pop_cap_loss += HOUSE_POP_BONUS
-            elif b.type == BUILDING_TOWNHALL: game_over = True
-
-        if pop_cap_loss > 0:
-            self.population_cap = max(INITIAL_POPULATION_CAP, self.population_cap - pop_cap_loss)
-
-        if game_over: self.handle_game_over()
-
     def handle_game_over(self):
         """Displays game over message and quits."""
         print("\n--- GAME OVER --- Your Town Hall was destroyed!")
@@ -287,105 +249,104 @@ class Game:
         except Exception as e: print(f"Error showing game over screen: {e}")
         Game.quit_game()
 
-    def spawn_enemy(self, current_sim_speed: float):
-        """Spawns an enemy near map edge."""
-        attempts = 0; max_attempts = 50
-        center_x, center_y = self.game_map.radius, self.game_map.radius
-        while attempts < max_attempts:
-            angle = random.uniform(0, 2 * math.pi)
-            dist = self.map_radius * random.uniform(0.80, 0.98)
-            sx = int(center_x + dist * math.cos(angle))
-            sy = int(center_y + dist * math.sin(angle))
-            sx = max(0, min(self.game_map.diameter - 1, sx))
-            sy = max(0, min(self.game_map.diameter - 1, sy))
-            tile = self.game_map.get_tile(sx, sy)
-            if tile and tile.walkable and tile.building is None and tile.resource_type == RESOURCE_NONE:
-                if not any(u.grid_x == sx and u.grid_y == sy for u in self.workers + self.enemies):
-                    self.enemies.append(Enemy(sx, sy, current_sim_speed)); return
-            attempts += 1
-
     def clamp_camera(self):
-        """Keeps camera within map bounds."""
-        max_x = max(0, self.game_map.width_pixels - GAME_AREA_WIDTH)
-        max_y = max(0, self.game_map.height_pixels - SCREEN_HEIGHT)
-        self.camera_x = max(0, min(int(self.camera_x), max_x))
-        self.camera_y = max(0, min(int(self.camera_y), max_y))
+        """Keeps camera within map bounds; a map smaller than the view (zoomed out) is centered in it."""
+        map_pixels = self.game_map.diameter * self.tile_px
+        for axis, view in (('camera_x', GAME_AREA_WIDTH), ('camera_y', SCREEN_HEIGHT)):
+            if map_pixels <= view: setattr(self, axis, (map_pixels - view) // 2)
+            else: setattr(self, axis, max(0, min(int(getattr(self, axis)), map_pixels - view)))
 
     def screen_to_grid(self, screen_x: int, screen_y: int) -> tuple[int, int] | tuple[None, None]:
         """Converts screen pixel coords to map grid coords."""
         if not (0 <= screen_x < GAME_AREA_WIDTH and 0 <= screen_y < SCREEN_HEIGHT): return None, None
         world_x = screen_x + self.camera_x; world_y = screen_y + self.camera_y
-        grid_x = int(world_x // TILE_SIZE); grid_y = int(world_y // TILE_SIZE)
+        grid_x = int(world_x // self.tile_px); grid_y = int(world_y // self.tile_px)
         if 0 <= grid_x < self.game_map.diameter and 0 <= grid_y < self.game_map.diameter: return grid_x, grid_y
         return None, None
 
-    def can_place_building(self, grid_x: int | None, grid_y: int | None, building_type: int | None) -> bool:
-        """Checks if building placement is valid."""
-        if grid_x is None or grid_y is None or building_type is None: return False
-        tile = self.game_map.get_tile(grid_x, grid_y)
-        if not tile or tile.terrain_type != TERRAIN_GROUND or not tile.walkable: return False
-        cost = BUILDING_COSTS.get(building_type, {})
-        if not all(self.resources.get(res, 0) >= amount for res, amount in cost.items()): return False
-        return True
-
-    def place_building(self, grid_x: int, grid_y: int, building_type: int) -> bool:
-        """Places building, deducts cost, updates state. Returns True on success."""
-        if not self.can_place_building(grid_x, grid_y, building_type): return False
-        tile = self.game_map.get_tile(grid_x, grid_y)
-        if not tile: return False
-
-        cost = BUILDING_COSTS.get(building_type, {}); new_building: Building | None = None # Use base type hint
-        for res, amount in cost.items(): self.resources[res] -= amount
-
-        if building_type == BUILDING_HOUSE: new_building = House(grid_x, grid_y)
-        # Add elif for other types...
-
-        if new_building and tile.set_building(new_building):
-            self.buildings.append(new_building)
-            print(f"Placed {BUILDING_NAMES.get(building_type, 'Building')} at ({grid_x},{grid_y}).")
-            if building_type == BUILDING_HOUSE:
-                self.population_cap += HOUSE_POP_BONUS
-                print(f"Pop Cap: {self.population_cap}")
-            return True
-        else: # Placement failed or unknown type
-            for res, amount in cost.items(): self.resources[res] += amount # Refund
-            if not new_building: print(f"ERROR: Unknown building type {building_type}.")
-            else: print("CRITICAL ERROR: Failed tile.set_building after validation!")
-            return False
-
     def draw(self):
         """Draws the entire game screen."""
         game_area_surface = self.screen.subsurface(pygame.Rect(0, 0, GAME_AREA_WIDTH, SCREEN_HEIGHT))
         game_area_surface.fill(DARK_BLUE)
 
         # 1. Map Base
-        self.game_map.draw(game_area_surface, self.camera_x, self.camera_y)
+        tile_px = self.tile_px
+        with self.profiler.phase('map draw'): self.game_map.draw(game_area_surface, self.camera_x, self.camera_y, tile_px)
 
-        # 2. Sorted Game Objects
-        # Combine lists using base types Unit and Building for sorting key check
-        drawable_entities: list[Unit | Building] = self.buildings + self.workers + self.enemies
-        # Sort by bottom y-coordinate
-        drawable_entities.sort(key=lambda obj: obj.y + TILE_SIZE if isinstance(obj, Building) else obj.y + TILE_SIZE/2)
-        for entity in drawable_entities:
-            entity.draw(game_area_surface, self.camera_x, self.camera_y)
+        # 2. Game Objects
+        with self.profiler.phase('entities'):
+            if tile_px >= MAP_DETAIL_MIN_TILE_PX: self.draw_entities(game_area_surface)
+            else: self.draw_entity_points(game_area_surface) # Zoomed far out: plain dots, drawn in bulk
 
         # 3. Build Ghost
         if self.build_mode and self.build_ghost_pos:
             gx, gy = self.build_ghost_pos
             if gx is not None and gy is not None:
-                scr_x = gx * TILE_SIZE - self.camera_x; scr_y = gy * TILE_SIZE - self.camera_y
-                if pygame.Rect(scr_x, scr_y, TILE_SIZE, TILE_SIZE).colliderect(game_area_surface.get_rect()):
-                    ghost_surf = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+                scr_x = gx * tile_px - self.camera_x; scr_y = gy * tile_px - self.camera_y
+                if pygame.Rect(scr_x, scr_y, tile_px, tile_px).colliderect(game_area_surface.get_rect()):
+                    ghost_surf = pygame.Surface((tile_px, tile_px), pygame.SRCALPHA)
                     is_valid = self.can_place_building(gx, gy, self.building_to_place_type)
                     color = (*GREEN[:3], 128) if is_valid else (*RED[:3], 128) # Use GREEN constant
-                    pygame.draw.rect(ghost_surf, color, (0, 0, TILE_SIZE, TILE_SIZE))
-                    pygame.draw.rect(ghost_surf, WHITE, (0, 0, TILE_SIZE, TILE_SIZE), 1)
+                    pygame.draw.rect(ghost_surf, color, (0, 0, tile_px, tile_px))
+                    pygame.draw.rect(ghost_surf, WHITE, (0, 0, tile_px, tile_px), 1)
                     game_area_surface.blit(ghost_surf, (scr_x, scr_y))
 
         # --- Draw UI ---
-        self.ui.draw(self.screen, self.resources, self.population, self.population_cap)
+        with self.profiler.phase('minimap'): minimap = self.draw_minimap()
+        with self.profiler.phase('ui'): self.ui.draw(self.screen, self.resources, self.population, self.population_cap, minimap)
+        if self.show_profiler: self.ui.draw_overlay(game_area_surface, self.profiler.report())
+
+        with self.profiler.phase('flip'): pygame.display.flip()
 
-        pygame.display.flip()
+    def draw_entities(self, surface):
+        """Draws buildings and units sorted by their bottom edge, units interpolated between ticks."""
+        tile_px = self.tile_px
+        # Combine lists using base types Unit and Building for sorting key check
+        drawable_entities: list[Unit | Building] = self.buildings + self.workers + self.enemies
+        # Sort by bottom y-coordinate
+        drawable_entities.sort(key=lambda obj: obj.y + TILE_SIZE if isinstance(obj, Building) else obj.y + TILE_SIZE/2)
+        # Units are drawn between their positions before and after the last tick, by how far into the next one we are
+        alpha = min(1.0, self.tick_accumulator_ms / self.timestep_ms); previous = self.previous_positions
+        for entity in drawable_entities:
+            if isinstance(entity, Building): entity.draw(surface, self.camera_x, self.camera_y, tile_px); continue
+            start = previous.get(entity) if previous else None
+            position = None if start is None else (start[0] + (entity.x - start[0]) * alpha, start[1] + (entity.y - start[1]) * alpha)
+            entity.draw(surface, self.camera_x, self.camera_y, position, tile_px)
+
+    def entity_points(self) -> list[tuple[np.ndarray, np.ndarray, tuple[int, int, int], bool]]:
+        """
+        Current positions of buildings (tile centers) and units, in tiles, grouped by the
+        color they are drawn as points in: [(xs, ys, color, is_building)].
+        """
+        points = []
+        for building_type, color in ((BUILDING_TOWNHALL, ORANGE_TOWNHALL), (BUILDING_HOUSE, BROWN_STONE)):
+            buildings = [building for building in self.buildings if building.type == building_type]
+            xs = np.fromiter((building.x for building in buildings), float, len(buildings))
+            ys = np.fromiter((building.y for building in buildings), float, len(buildings))
+            points.append((xs + 0.5, ys + 0.5, color, True))
+        for units, color in ((self.workers, GREEN), (self.enemies, RED)):
+            xs = np.fromiter((unit.x for unit in units), float, len(units))
+            ys = np.fromiter((unit.y for unit in units), float, len(units))
+            points.append((xs / TILE_SIZE, ys / TILE_SIZE, color, False))
+        return points
+
+    def draw_entity_points(self, surface):
+        """Draws every building and unit as a colored square at its current position (far zoom levels)."""
+        tile_px = self.tile_px
+        building_size = max(3, tile_px); unit_size = max(2, tile_px * 2 // 3)
+        for xs, ys, color, is_building in self.entity_points():
+            draw_points(surface, xs * tile_px - self.camera_x, ys * tile_px - self.camera_y,
+                        color, building_size if is_building else unit_size)
+
+    def draw_minimap(self):
+        """This frame's minimap image: the cached terrain with buildings, units and the view's outline on top."""
+        if self.minimap is None or self.minimap.game_map is not self.game_map: # New game or loaded save
+            self.minimap = Minimap(self.game_map)
+        points = [(xs, ys, color, 3 if is_building else 2) for xs, ys, color, is_building in self.entity_points()]
+        tile_px = self.tile_px
+        view = (self.camera_x / tile_px, self.camera_y / tile_px,
+                (self.camera_x + GAME_AREA_WIDTH) / tile_px, (self.camera_y + SCREEN_HEIGHT) / tile_px)
+        return self.minimap.draw(points, view)
 
     @staticmethod
     def quit_game(message: str | None = None):
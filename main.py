@@ -16,7 +16,8 @@ if __name__ == '__main__':
     print("Starting Python Civ Sim Prototype...")
     game_instance = None # Initialize to None
     try:
-        game_instance = Game() # Create an instance of the game
+        seed = int(sys.argv[1]) if len(sys.argv) > 1 else None # Optional: python main.py <seed>
+        game_instance = Game(seed) # Create an instance of the game
         game_instance.run()    # Start the main game loop
 
     # Catch specific Pygame errors first if possible
@@ -1,125 +1,176 @@
 # map.py
-import pygame
-import random
-import noise # Perlin noise
 import math
-import collections # For deque in BFS
 from constants import * # Import constants
-from tile import Tile   # Import Tile class
+import numpy as np
+from tile import Tile, TileGrid # Tile views over array-backed grid storage
+import terrain # Noise fields and terrain/biome classification
+from spatial_index import ResourceClaims, ResourceIndex, UnitGrid
+from navigation import DistanceField, RegionIndex
+from scheduler import EventScheduler
+from pathfinding import PathCache, PathRequestQueue
 # Need Building base class for type hinting / isinstance check in find_nearest
 from building import Building
+from random_streams import RandomStreams, new_seed
 
 class GameMap:
-    def __init__(self, radius: int):
+    """
+    The world: tile grid plus the indexes kept in sync with it.
+
+    Terrain and resources are generated per chunk of MAP_CHUNK_TILES x MAP_CHUNK_TILES
+    tiles, each chunk from its own random stream, so a map is the same whether it is
+    generated up front or lazily. Lazy maps (the default from MAP_LAZY_RADIUS up)
+    start out empty and generate a chunk on first access: get_tile, drawing, path
+    searches, and units entering the area (MAP_LAZY_EXPLORE_MARGIN tiles ahead of them).
+    Their layers are zero-filled arrays the OS only backs with memory once written, so
+    memory and startup time follow the explored area instead of the map size.
+    """
+    def __init__(self, radius: int, vectorized: bool = True, seed: int | None = None, grid: TileGrid | None = None,
+                 lazy: bool | None = None, generated: np.ndarray | None = None):
+        """
+        Generates the map from seed, or wraps an existing grid (e.g. from a save) without generating.
+        lazy defaults to radius >= MAP_LAZY_RADIUS; generated is the chunk mask of a saved lazy grid.
+        """
         self.radius = radius
+        self.seed = seed if seed is not None else new_seed() # Same seed, same map, resources and respawns
+        self.random = RandomStreams(self.seed)
+        self.vectorized = vectorized # False = per-cell reference generation (slow, for comparison)
         self.diameter = radius * 2 + 1
-        self.tiles: list[list[Tile | None]] = [[None for _ in range(self.diameter)] for _ in range(self.diameter)]
-        self.pending_respawn_tiles: set[tuple[int, int]] = set()
-        self._generate_map()
+        self.lazy = radius >= MAP_LAZY_RADIUS if lazy is None else lazy
+        self.noise_seed = self.random.stream('terrain').randint(0, 10000) # Noise offsets
+        chunks = -(-self.diameter // MAP_CHUNK_TILES)
+        self.generated = np.zeros((chunks, chunks), dtype=bool) # [cy, cx] -> chunk generated (lazy maps)
+        self.grid: TileGrid | None = None # Created by _generate_map
+        self.respawns = EventScheduler() # (x, y) -> game time at which the tile's resource grows back
+        self.respawn_rate_modifier = 1.0 # Slider value the scheduled due times were computed with
+        self.game_time_ms = 0.0 # Last game time passed to update_respawns
+        if grid is None: self._generate_map()
+        else:
+            self.grid = grid; self.generated[:] = True if generated is None else generated
+        windows = self.generated_windows() if self.lazy else None # Lazy maps: index only what exists
+        self.resource_index = ResourceIndex(self.grid, areas=windows) # Kept in sync through grid notifications
+        self.claims = ResourceClaims() # Resource amounts promised to inbound workers
+        self.building_fields: dict[int, DistanceField] = {} # building type -> distance field, built on first use
+        self.regions = RegionIndex(self.grid, windows) # Connected walkable regions, for early-out on unreachable targets
+        self.paths = PathCache(self.grid, self.regions) # A* routes shared by all units
+        self.path_requests: PathRequestQueue | None = None # Queued unit searches, once process_path_requests is used
+        self.unit_grid = UnitGrid() # Units by tile, kept current by Unit.update_grid_pos
+        if self.lazy: self.unit_grid.on_bucket_entered = self._explore_around
+        self.building_grid = UnitGrid() # Buildings by tile, for radius queries
+        self.renderer = None # MapRenderer, created on the first draw (headless runs never need one)
         self.width_pixels = self.diameter * TILE_SIZE
         self.height_pixels = self.diameter * TILE_SIZE
 
-    # --- _generate_map, _generate_noise_map, _place_initial_resources remain the same ---
     def _generate_map(self):
-        """Generates the entire map procedurally using noise."""
-        seed = random.randint(0, 10000)
-        center_x, center_y = self.radius, self.radius
-        print(f"Generating map with radius {self.radius} (Diameter: {self.diameter}), Seed: {seed}")
-
-        elevation_map = self._generate_noise_map(seed + 0)
-        temperature_map = self._generate_noise_map(seed + 1)
-        moisture_map = self._generate_noise_map(seed + 2)
-
-        for y in range(self.diameter):
-            for x in range(self.diameter):
-                dist_from_center = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                dist_ratio = dist_from_center / max(1, self.radius)
-
-                elevation = elevation_map[y][x]
-                edge_start_ratio = 1.0 - WATER_EDGE_PERCENT
-                if dist_ratio > edge_start_ratio and WATER_EDGE_PERCENT > 0:
-                    edge_factor = (dist_ratio - edge_start_ratio) / WATER_EDGE_PERCENT
-                    elevation -= edge_factor * 0.8 # Make edges water
-
-                temp = temperature_map[y][x]
-                moisture = moisture_map[y][x]
-
-                # Determine Terrain Type
-                if elevation < ELEVATION_THRESHOLD:
-                    terrain_type = TERRAIN_WATER
-                    if temp < TEMP_THRESHOLD_LOW - 0.1: terrain_type = TERRAIN_ICE
-                else: terrain_type = TERRAIN_GROUND
-
-                # Determine Biome
-                biome = BIOME_WATER
-                if terrain_type == TERRAIN_GROUND:
-                    if temp < TEMP_THRESHOLD_LOW: biome = BIOME_ARCTIC
-                    elif temp > TEMP_THRESHOLD_HIGH and moisture < MOISTURE_THRESHOLD_LOW: biome = BIOME_DESERT
-                    elif moisture > MOISTURE_THRESHOLD_HIGH: biome = BIOME_FOREST
-                    else: biome = BIOME_FOREST # Default ground biome
-                elif terrain_type == TERRAIN_ICE: biome = BIOME_ARCTIC
-
-                self.tiles[y][x] = Tile(x, y, terrain_type, biome)
-
-        self._place_initial_resources()
-        print("Map generation complete.")
+        """Generates the entire map procedurally using noise (lazy maps: just the empty grid)."""
+        if self.lazy:
+            print(f"Lazy map with radius {self.radius} (Diameter: {self.diameter}), Seed: {self.seed}")
+            self.grid = TileGrid.empty(self.diameter, self.diameter)
+            return
+        print(f"Generating map with radius {self.radius} (Diameter: {self.diameter}), Seed: {self.seed}")
+
+        if self.vectorized:
+            terrain_grid, biome_grid = terrain.classify_terrain(self.radius, self.noise_seed)
+        else:
+            terrain_grid, biome_grid = terrain.classify_terrain_loop(self.radius, self.noise_seed)
+            terrain_grid = np.array(terrain_grid, dtype=np.uint8); biome_grid = np.array(biome_grid, dtype=np.uint8)
+        self.grid = TileGrid(terrain_grid, biome_grid)
 
-    def _generate_noise_map(self, seed_offset: int) -> list[list[float]]:
-        """Generates a 2D noise map using Perlin noise."""
-        map_data = [[0.0 for _ in range(self.diameter)] for _ in range(self.diameter)]
-        for y in range(self.diameter):
-            for x in range(self.diameter):
-                map_data[y][x] = noise.pnoise2(
-                    x * NOISE_SCALE, y * NOISE_SCALE,
-                    octaves=NOISE_OCTAVES, persistence=NOISE_PERSISTENCE,
-                    lacunarity=NOISE_LACUNARITY, base=seed_offset
-                )
-        return map_data
-
-    def _place_initial_resources(self):
-        """Places starting resources based on biome."""
         print("Placing initial resources...")
-        for y in range(self.diameter):
-            for x in range(self.diameter):
-                tile = self.tiles[y][x]
-                if tile and tile.terrain_type == TERRAIN_GROUND:
-                    prob = random.random()
-                    res_type = RESOURCE_NONE
-                    min_r, max_r = 0, 0
-                    amount_mod = 1.0
-
-                    if tile.biome == BIOME_FOREST:
-                        if prob < RESOURCE_SPAWN_DENSITY * 2.5:
-                             res_type = RESOURCE_WOOD if random.random() < 0.7 else RESOURCE_FOOD
-                    elif tile.biome == BIOME_DESERT:
-                        if prob < RESOURCE_SPAWN_DENSITY * 1.8:
-                             res_type = RESOURCE_STONE if random.random() < 0.6 else RESOURCE_IRON
-                    elif tile.biome == BIOME_ARCTIC:
-                         if prob < RESOURCE_SPAWN_DENSITY * 0.3:
-                             res_type = RESOURCE_STONE
-                             amount_mod = 0.5
-
-                    if res_type != RESOURCE_NONE and res_type in RESOURCE_BASE_AMOUNT:
-                        min_r, max_r = RESOURCE_BASE_AMOUNT[res_type]
-                        amount = random.randint(int(min_r * amount_mod), int(max_r * amount_mod))
-                        tile.set_resource(res_type, max(1, amount))
-
-        print("Resource placement finished.")
+        for cy in range(self.generated.shape[0]):
+            for cx in range(self.generated.shape[1]): self._place_initial_resources(cx, cy)
+        self.generated[:] = True
+        print("Map generation complete.")
+
+    def _chunk_window(self, cx: int, cy: int) -> tuple[int, int, int, int]:
+        """(x0, y0, x1, y1) tile window of a chunk; chunks on the last row/column may be cut off."""
+        x0, y0 = cx * MAP_CHUNK_TILES, cy * MAP_CHUNK_TILES
+        return x0, y0, min(self.diameter, x0 + MAP_CHUNK_TILES), min(self.diameter, y0 + MAP_CHUNK_TILES)
+
+    def generated_windows(self) -> list[tuple[int, int, int, int]]:
+        """Tile windows of every generated chunk, row by row."""
+        return [self._chunk_window(cx, cy) for cy, cx in np.argwhere(self.generated).tolist()]
+
+    def _generate_chunk(self, cx: int, cy: int):
+        """Lazy maps: generates one chunk's terrain and resources and tells the grid's listeners."""
+        window = self._chunk_window(cx, cy)
+        terrain_grid, biome_grid = terrain.classify_terrain(self.radius, self.noise_seed, window)
+        self.grid.set_terrain(window[0], window[1], terrain_grid, biome_grid)
+        self._place_initial_resources(cx, cy)
+        self.generated[cy, cx] = True
+        self.grid.notify_area(*window)
+
+    def ensure_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """Lazy maps: generates every missing chunk overlapping tiles x0..x1, y0..y1 (inclusive, clipped)."""
+        if not self.lazy: return
+        last = self.generated.shape[0] - 1
+        cx0 = max(0, x0 // MAP_CHUNK_TILES); cx1 = min(last, x1 // MAP_CHUNK_TILES)
+        cy0 = max(0, y0 // MAP_CHUNK_TILES); cy1 = min(last, y1 // MAP_CHUNK_TILES)
+        if cx0 > cx1 or cy0 > cy1 or self.generated[cy0:cy1 + 1, cx0:cx1 + 1].all(): return
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                if not self.generated[cy, cx]: self._generate_chunk(cx, cy)
+
+    def _explore_around(self, x: int, y: int):
+        """UnitGrid callback on lazy maps: keeps the area around a unit generated."""
+        margin = MAP_LAZY_EXPLORE_MARGIN
+        self.ensure_generated(x - margin, y - margin, x + margin, y + margin)
+
+    def _place_initial_resources(self, cx: int, cy: int):
+        """Places a chunk's starting resources based on biome, from the chunk's own random stream."""
+        grid = self.grid
+        x0, y0, x1, y1 = self._chunk_window(cx, cy)
+        ground_ys, ground_xs = np.nonzero(grid.terrain[y0:y1, x0:x1] == TERRAIN_GROUND) # Row-major within the chunk
+        if not len(ground_ys): return
+        ground_ys += y0; ground_xs += x0
+        biomes = grid.biome[ground_ys, ground_xs].tolist()
+        rng = self.random.derived(f'resources/{cx},{cy}')
+        placed_ys, placed_xs, placed_types, placed_amounts = [], [], [], []
+        for y, x, biome in zip(ground_ys.tolist(), ground_xs.tolist(), biomes):
+            prob = rng.random()
+            res_type = RESOURCE_NONE
+            amount_mod = 1.0
+
+            if biome == BIOME_FOREST:
+                if prob < RESOURCE_SPAWN_DENSITY * 2.5:
+                     res_type = RESOURCE_WOOD if rng.random() < 0.7 else RESOURCE_FOOD
+            elif biome == BIOME_DESERT:
+                if prob < RESOURCE_SPAWN_DENSITY * 1.8:
+                     res_type = RESOURCE_STONE if rng.random() < 0.6 else RESOURCE_IRON
+            elif biome == BIOME_ARCTIC:
+                 if prob < RESOURCE_SPAWN_DENSITY * 0.3:
+                     res_type = RESOURCE_STONE
+                     amount_mod = 0.5
+
+            if res_type != RESOURCE_NONE and res_type in RESOURCE_BASE_AMOUNT:
+                min_r, max_r = RESOURCE_BASE_AMOUNT[res_type]
+                amount = rng.randint(int(min_r * amount_mod), int(max_r * amount_mod))
+                placed_ys.append(y); placed_xs.append(x)
+                placed_types.append(res_type); placed_amounts.append(max(1, amount))
+
+        # Equivalent of Tile.set_resource for every placed tile, applied to the layers at once
+        grid.resource_type[placed_ys, placed_xs] = placed_types
+        grid.resource_amount[placed_ys, placed_xs] = placed_amounts
+        grid.resource_original_type[placed_ys, placed_xs] = placed_types
+        grid.walkable[placed_ys, placed_xs] = False
 
     def get_tile(self, x: int, y: int) -> Tile | None:
-        """Safely retrieves a tile at given grid coordinates."""
+        """Safely retrieves a tile at given grid coordinates (generating its chunk on lazy maps)."""
         if 0 <= x < self.diameter and 0 <= y < self.diameter:
-            return self.tiles[y][x]
+            if self.lazy and not self.generated[y // MAP_CHUNK_TILES, x // MAP_CHUNK_TILES]:
+                self._generate_chunk(x // MAP_CHUNK_TILES, y // MAP_CHUNK_TILES)
+            return Tile(self.grid, x, y)
         return None
 
     def get_random_walkable_tile(self, avoid_edge_percent=0.2) -> Tile | None:
-        """Finds a random suitable starting tile."""
+        """Finds a random suitable starting tile (on lazy maps, within MAP_LAZY_START_RADIUS of the center)."""
         attempts = 0; max_attempts = 1000
         min_dist_ratio = 0.0; max_dist_ratio = 1.0 - avoid_edge_percent
         center_x, center_y = self.radius, self.radius
+        span = min(self.radius, MAP_LAZY_START_RADIUS) if self.lazy else self.radius
+        rng = self.random.stream('spawns')
 
         while attempts < max_attempts:
-            x = random.randint(0, self.diameter - 1); y = random.randint(0, self.diameter - 1)
+            x = rng.randint(center_x - span, center_x + span); y = rng.randint(center_y - span, center_y + span)
             tile = self.get_tile(x, y)
             if tile and tile.walkable and tile.building is None and tile.resource_type == RESOURCE_NONE:
                 dist_ratio = math.sqrt((x - center_x)**2 + (y - center_y)**2) / max(1, self.radius)
@@ -134,7 +185,7 @@ class GameMap:
                      if abs(dx) < r and abs(dy) < r: continue
                      x, y = center_x + dx, center_y + dy
                      if 0 <= x < self.diameter and 0 <= y < self.diameter:
-                         tile = self.tiles[y][x]
+                         tile = self.get_tile(x, y)
                          if tile.walkable and tile.building is None and tile.resource_type == RESOURCE_NONE:
                              print(f"Fallback search found tile at ({x},{y}).")
                              return tile
@@ -143,100 +194,120 @@ class GameMap:
         return None
 
     def find_nearest_resource(self, start_x: int, start_y: int, resource_type: int, max_search_radius=20) -> Tile | None:
-        """Finds the nearest tile with the specified resource using BFS."""
+        """
+        Finds the nearest tile with the specified resource using the resource index.
+        Distance is measured in grid steps (Manhattan), ignoring obstacles, but only
+        resources a unit at the start could walk up to, and that are not fully claimed
+        by workers already heading there, are considered.
+        """
         if resource_type == RESOURCE_NONE: return None
-        q = collections.deque([(start_x, start_y, 0)]); visited = set([(start_x, start_y)])
-        while q:
-            x, y, dist = q.popleft()
-            if dist >= max_search_radius: continue
-            tile = self.get_tile(x, y)
-            if tile and tile.resource_type == resource_type and tile.resource_amount > 0: return tile
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) not in visited:
-                    neighbor_tile = self.get_tile(nx, ny)
-                    if neighbor_tile:
-                        can_path = neighbor_tile.walkable or \
-                                   (neighbor_tile.resource_type == resource_type and neighbor_tile.resource_amount > 0)
-                        if can_path: visited.add((nx, ny)); q.append((nx, ny, dist + 1))
+        start_regions = self.regions.regions_near(start_x, start_y)
+        if not start_regions: return None # Boxed in: nothing is reachable
+        claimed = self.claims.claimed; resource_amount = self.grid.resource_amount
+        def acceptable(x, y):
+            if claimed and claimed.get((x, y), 0) >= resource_amount[y, x]: return False
+            return not start_regions.isdisjoint(self.regions.regions_near(x, y))
+        found = self.resource_index.nearest(start_x, start_y, resource_type, max_search_radius, accept=acceptable)
+        return self.get_tile(*found) if found else None
+
+    def unclaimed_amount(self, x: int, y: int) -> int:
+        """Resource left on tile (x, y) that no worker has claimed yet."""
+        return max(0, int(self.grid.resource_amount[y, x]) - self.claims.claimed_at(x, y))
+
+    def is_reachable(self, from_x: int, from_y: int, to_x: int, to_y: int) -> bool:
+        """True if a unit at (from_x, from_y) can walk onto or next to (to_x, to_y)."""
+        return self.regions.is_reachable(from_x, from_y, to_x, to_y)
+
+    def find_path(self, start_x: int, start_y: int, goal_x: int, goal_y: int) -> list[tuple[int, int]] | None:
+        """
+        Tile waypoints of a shortest walk from start into the goal tile, or None if it is unreachable.
+        On lazy maps the search only sees the generated area: the box around start and goal
+        (plus MAP_LAZY_EXPLORE_MARGIN) is generated first.
+        """
+        if self.lazy:
+            margin = MAP_LAZY_EXPLORE_MARGIN
+            self.ensure_generated(min(start_x, goal_x) - margin, min(start_y, goal_y) - margin,
+                                  max(start_x, goal_x) + margin, max(start_y, goal_y) + margin)
+        return self.paths.find_path(start_x, start_y, goal_x, goal_y)
+
+    def process_path_requests(self, budget_ms: float) -> int:
+        """
+        Runs queued searches for up to budget_ms of wall time. The first call creates the
+        queue; from then on workers request nearest resources and paths through it and
+        wait for the answers instead of searching on the spot. Returns the searches run.
+        """
+        if self.path_requests is None: self.path_requests = PathRequestQueue(self._run_search)
+        return self.path_requests.process(budget_ms)
+
+    def _run_search(self, key: tuple):
+        """
+        PathRequestQueue search. ('path', start_x, start_y, goal_x, goal_y) -> find_path's
+        waypoints; ('resource', x, y, types) -> (x, y) of the nearest resource of the first
+        type in types that has one in range, or None.
+        """
+        if key[0] == 'path': return self.find_path(*key[1:])
+        _, x, y, resource_types = key
+        for resource_type in resource_types:
+            tile = self.find_nearest_resource(x, y, resource_type)
+            if tile: return tile.x, tile.y
         return None
 
+    def search_stats(self) -> dict[str, int]:
+        """Running totals of path searches (A*) and BFS runs (distance fields, region splits) and their nodes."""
+        bfs = [field.stats for field in self.building_fields.values()] + [self.regions.stats]
+        stats = {'astar_calls': self.paths.stats.searches, 'astar_nodes': self.paths.stats.expanded,
+                 'bfs_calls': sum(s.searches for s in bfs), 'bfs_nodes': sum(s.expanded for s in bfs)}
+        if self.path_requests is not None:
+            stats.update(path_queued=self.path_requests.searched, path_merged=self.path_requests.merged)
+        return stats
+
+    def get_building_field(self, building_type: int, max_distance: int) -> DistanceField:
+        """Returns the cached distance field towards buildings of a type, creating or widening it if needed."""
+        field = self.building_fields.get(building_type)
+        if field is None:
+            field = DistanceField(self.grid, building_type, max_distance)
+            self.building_fields[building_type] = field
+        elif field.max_distance < max_distance:
+            field.max_distance = max_distance; field.rebuild()
+        return field
+
     def find_nearest_building(self, start_x: int, start_y: int, building_type: int, max_search_radius=40) -> Building | None:
         """
-        Finds the nearest building of the specified type using BFS.
-        Allows pathing through walkable tiles OR the target building tile itself.
+        Finds the nearest building of the specified type within max_search_radius steps.
+        Paths go through walkable tiles into the building tile itself. Answered by a
+        lookup in the shared distance field instead of a BFS per call.
         """
-        q = collections.deque([(start_x, start_y, 0)])
-        visited = set([(start_x, start_y)])
-        while q:
-            x, y, dist = q.popleft()
-            if dist >= max_search_radius: continue
-
-            tile = self.get_tile(x, y)
-            # Check if current tile has the target building
-            if tile and tile.building and tile.building.type == building_type:
-                return tile.building # Found it
-
-            # Explore neighbors
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) not in visited:
-                     neighbor_tile = self.get_tile(nx, ny)
-                     if neighbor_tile:
-                         # --- MODIFIED BFS PATHING LOGIC ---
-                         # Can path through walkable tiles OR the specific target building tile
-                         is_target_building_tile = (neighbor_tile.building and
-                                                    neighbor_tile.building.type == building_type)
-                         if neighbor_tile.walkable or is_target_building_tile:
-                         # --- END MODIFICATION ---
-                            visited.add((nx, ny))
-                            q.append((nx, ny, dist + 1))
+        if not self.regions.regions_near(start_x, start_y): return None # Boxed in: skip the field lookup
+        found = self.get_building_field(building_type, max_search_radius).lookup(start_x, start_y)
+        if found and found[0] < max_search_radius: return found[1]
         return None # Not found
 
 
     def mark_for_respawn(self, x: int, y: int):
-        """Adds a depleted tile's coordinates to the set needing respawn checks."""
+        """Schedules a depleted tile's resource to grow back."""
         if 0 <= x < self.diameter and 0 <= y < self.diameter:
             tile = self.get_tile(x, y)
-            if tile and tile.resource_original_type != RESOURCE_NONE and tile.resource_type == RESOURCE_NONE:
-                self.pending_respawn_tiles.add((x, y))
-
-    def update_respawns(self, dt_ms_simulated: float, respawn_rate_modifier: float):
-        """Checks tiles marked for respawn, manages timers, and respawns resources."""
-        if not self.pending_respawn_tiles: return
-
-        processed_coords = set()
-        for x, y in list(self.pending_respawn_tiles): # Iterate copy
-            tile = self.get_tile(x, y)
-            if not tile: processed_coords.add((x,y)); continue
-
-            is_eligible = (tile.terrain_type == TERRAIN_GROUND and
-                           tile.building is None and
-                           tile.resource_type == RESOURCE_NONE and
-                           tile.resource_original_type != RESOURCE_NONE)
-
-            if not is_eligible:
-                tile.resource_respawn_timer = 0; tile.resource_original_type = RESOURCE_NONE
-                processed_coords.add((x, y)); continue
-
-            if tile.resource_respawn_timer <= 0: tile.start_respawn_timer(respawn_rate_modifier)
-
-            if tile.resource_respawn_timer > 0:
-                if tile.update_respawn_timer(dt_ms_simulated):
-                     tile.respawn_resource() # Handles internal state reset
-                     processed_coords.add((x, y))
-
-        self.pending_respawn_tiles -= processed_coords
-
-    def draw(self, surface, camera_x: int, camera_y: int):
-        """Draws the visible portion of the map's tiles and resources."""
-        import pygame
-        start_col = max(0, camera_x // TILE_SIZE)
-        end_col = min(self.diameter, (camera_x + GAME_AREA_WIDTH) // TILE_SIZE + 2)
-        start_row = max(0, camera_y // TILE_SIZE)
-        end_row = min(self.diameter, (camera_y + SCREEN_HEIGHT) // TILE_SIZE + 2)
-
-        for y in range(start_row, end_row):
-            for x in range(start_col, end_col):
-                tile = self.get_tile(x, y)
-                if tile: tile.draw(surface, camera_x, camera_y)
\ No newline at end of file
+            if tile and tile.resource_original_type != RESOURCE_NONE and tile.resource_type == RESOURCE_NONE \
+               and (x, y) not in self.respawns:
+                # Higher modifier = faster respawn (shorter time)
+                delay = RESOURCE_RESPAWN_TIME_BASE / max(0.1, self.respawn_rate_modifier)
+                self.respawns.schedule((x, y), self.game_time_ms + delay)
+
+    def update_respawns(self, game_time_ms: float, respawn_rate_modifier: float):
+        """Respawns resources whose due time has passed. Only due tiles are touched."""
+        self.game_time_ms = game_time_ms
+        if respawn_rate_modifier != self.respawn_rate_modifier:
+            # Slider moved: pending respawns keep their progress and finish at the new rate
+            factor = max(0.1, self.respawn_rate_modifier) / max(0.1, respawn_rate_modifier)
+            self.respawn_rate_modifier = respawn_rate_modifier
+            if factor != 1.0: self.respawns.rescale(game_time_ms, factor)
+
+        for x, y in self.respawns.pop_due(game_time_ms):
+            self.get_tile(x, y).respawn_resource(self.random.stream('respawns')) # Re-checks eligibility; forgets the resource if blocked
+
+    def draw(self, surface, camera_x: int, camera_y: int, tile_px: int = TILE_SIZE):
+        """Draws the visible portion of the map's tiles and resources from cached surfaces, at tile_px pixels per tile."""
+        if self.renderer is None:
+            from map_renderer import MapRenderer # Imports pygame: only loaded once something is drawn
+            self.renderer = MapRenderer(self)
+        self.renderer.draw(surface, camera_x, camera_y, tile_px)
\ No newline at end of file
@@ -0,0 +1,283 @@
+# map_renderer.py
+# Cached rendering of the map: terrain and resources are drawn once into chunk surfaces.
+import collections
+import numpy as np
+import pygame
+from constants import * # Import constants
+from tile import Tile, TILE_CHANGE_RESOURCE, TILE_CHANGE_BUILDING
+
+
+class SurfaceCache:
+    """
+    Least recently used surfaces keyed by cell (chunk or overview page coordinates),
+    each with the tiles changed since it was last drawn.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.surfaces: collections.OrderedDict = collections.OrderedDict() # cell -> Surface, oldest first
+        self.dirty: dict[tuple[int, int], set[tuple[int, int]]] = {} # cell -> tiles to repaint
+
+    def __contains__(self, key) -> bool:
+        return key in self.surfaces
+
+    def __len__(self) -> int:
+        return len(self.surfaces)
+
+    def get(self, key):
+        """The cell's surface (now the most recently used), or None."""
+        surface = self.surfaces.get(key)
+        if surface is not None: self.surfaces.move_to_end(key)
+        return surface
+
+    def add(self, key, surface):
+        """Caches a freshly drawn surface, dropping the least recently used one if full."""
+        self.surfaces[key] = surface; self.dirty.pop(key, None)
+        if len(self.surfaces) > self.max_entries:
+            old_key, _ = self.surfaces.popitem(last=False)
+            self.dirty.pop(old_key, None)
+
+    def mark_dirty(self, key, x: int, y: int):
+        """Queues tile (x, y) for repainting on the cell's surface, if it is cached."""
+        if key in self.surfaces: self.dirty.setdefault(key, set()).add((x, y))
+
+    def pop_dirty(self, key) -> set[tuple[int, int]] | None:
+        return self.dirty.pop(key, None)
+
+    def drop(self, key):
+        self.surfaces.pop(key, None); self.dirty.pop(key, None)
+
+    def clear(self):
+        self.surfaces.clear(); self.dirty.clear()
+
+
+class MapRenderer:
+    """
+    Draws a GameMap from pre-rendered surfaces of MAP_CHUNK_TILES x MAP_CHUNK_TILES tiles.
+
+    A chunk is rendered tile by tile the first time it comes into view. After that,
+    tile changes reported by the TileGrid only mark those tiles dirty, and they are
+    repainted on the chunk surface before its next blit. A frame is then one blit
+    per visible chunk. At most MAP_CHUNK_CACHE_SIZE chunk surfaces are kept; the least
+    recently drawn ones are dropped and re-rendered if they come back into view.
+
+    Zoomed out to tile_px pixels per tile, chunks are smoothscaled copies of the full
+    size ones (mipmaps; each level may use as much memory as the full size cache).
+    Below MAP_DETAIL_MIN_TILE_PX the map is drawn from the overview instead: pages of
+    MAP_OVERVIEW_PAGE_TILES tiles at one pixel per tile, filled straight from the tile
+    arrays and scaled up to the view, so a frame costs the same however many tiles are
+    in view. The overview doesn't generate lazy maps; unexplored parts stay black.
+    """
+    def __init__(self, game_map, chunk_tiles: int = MAP_CHUNK_TILES, max_chunks: int = MAP_CHUNK_CACHE_SIZE):
+        self.game_map = game_map
+        self.grid = game_map.grid
+        self.chunk_tiles = chunk_tiles
+        self.max_chunks = max_chunks
+        self.chunks: dict[int, SurfaceCache] = {} # tile_px -> chunk surfaces at that zoom
+        self.pages = SurfaceCache(MAP_OVERVIEW_CACHE_PAGES) # Overview pages
+        self._tile_surface = None # Scratch surface for repainting one tile of a scaled chunk
+        self.grid.add_listener(self)
+
+    def tile_changed(self, x: int, y: int, change: int):
+        """TileGrid listener: queues the tile for repainting wherever it is cached."""
+        if not change & (TILE_CHANGE_RESOURCE | TILE_CHANGE_BUILDING): return
+        key = (x // self.chunk_tiles, y // self.chunk_tiles)
+        for chunks in self.chunks.values(): chunks.mark_dirty(key, x, y)
+        self.pages.mark_dirty((x // MAP_OVERVIEW_PAGE_TILES, y // MAP_OVERVIEW_PAGE_TILES), x, y)
+
+    def area_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """TileGrid listener: drops cached chunks overlapping a freshly generated window and fills it in on the overview."""
+        size = self.chunk_tiles
+        for chunks in self.chunks.values():
+            for key in [key for key in chunks.surfaces if x0 // size <= key[0] <= (x1 - 1) // size
+                        and y0 // size <= key[1] <= (y1 - 1) // size]:
+                chunks.drop(key)
+        page_tiles = MAP_OVERVIEW_PAGE_TILES
+        for (px, py), page in self.pages.surfaces.items():
+            window = (max(x0, px * page_tiles), max(y0, py * page_tiles),
+                      min(x1, (px + 1) * page_tiles), min(y1, (py + 1) * page_tiles))
+            if window[0] < window[2] and window[1] < window[3]: self._paint_page(page, px, py, *window)
+
+    def invalidate(self):
+        """Drops every cached chunk and overview page (e.g. after the whole map changed)."""
+        self.chunks.clear(); self.pages.clear()
+
+    def draw(self, surface, camera_x: int, camera_y: int, tile_px: int = TILE_SIZE):
+        """
+        Draws the part of the map in view at tile_px screen pixels per tile (one of
+        ZOOM_TILE_SIZES); the camera is the view's top-left in screen pixels at that zoom.
+        """
+        if tile_px < MAP_DETAIL_MIN_TILE_PX: self._draw_overview(surface, camera_x, camera_y, tile_px); return
+        view_width, view_height = surface.get_size()
+        size = self.chunk_tiles * tile_px
+        max_chunk = (self.game_map.diameter - 1) // self.chunk_tiles
+        start_cx = max(0, camera_x // size); end_cx = min(max_chunk, (camera_x + view_width) // size)
+        start_cy = max(0, camera_y // size); end_cy = min(max_chunk, (camera_y + view_height) // size)
+        tiles = self.chunk_tiles # Lazy maps: generate what comes into view first
+        self.game_map.ensure_generated(start_cx * tiles, start_cy * tiles,
+                                       (end_cx + 1) * tiles - 1, (end_cy + 1) * tiles - 1)
+        for cy in range(start_cy, end_cy + 1):
+            for cx in range(start_cx, end_cx + 1):
+                surface.blit(self._get_chunk(cx, cy, tile_px), (cx * size - camera_x, cy * size - camera_y))
+
+    def _get_chunk(self, cx: int, cy: int, tile_px: int = TILE_SIZE):
+        key = (cx, cy)
+        chunks = self.chunks.get(tile_px)
+        if chunks is None: chunks = self.chunks[tile_px] = SurfaceCache(self.max_chunks * (TILE_SIZE // tile_px) ** 2)
+        chunk = chunks.get(key)
+        if chunk is None:
+            if tile_px == TILE_SIZE: chunk = self._render_chunk(cx, cy)
+            else:
+                size = self.chunk_tiles * tile_px
+                chunk = pygame.transform.smoothscale(self._get_chunk(cx, cy), (size, size))
+            chunks.add(key, chunk)
+        else:
+            dirty = chunks.pop_dirty(key)
+            if dirty:
+                origin_x, origin_y = cx * self.chunk_tiles * TILE_SIZE, cy * self.chunk_tiles * TILE_SIZE
+                for x, y in dirty:
+                    if tile_px == TILE_SIZE: Tile(self.grid, x, y).draw(chunk, origin_x, origin_y); continue
+                    if self._tile_surface is None: self._tile_surface = pygame.Surface((TILE_SIZE, TILE_SIZE)).convert(chunk)
+                    Tile(self.grid, x, y).draw(self._tile_surface, x * TILE_SIZE, y * TILE_SIZE)
+                    chunk.blit(pygame.transform.smoothscale(self._tile_surface, (tile_px, tile_px)),
+                               ((x - cx * self.chunk_tiles) * tile_px, (y - cy * self.chunk_tiles) * tile_px))
+        return chunk
+
+    def _render_chunk(self, cx: int, cy: int):
+        chunk_pixels = self.chunk_tiles * TILE_SIZE
+        chunk = pygame.Surface((chunk_pixels, chunk_pixels))
+        if pygame.display.get_surface() is not None: chunk = chunk.convert() # Match the display format for fast blits
+        chunk.fill(DARK_BLUE) # Outside the map (last row/column of chunks)
+        origin_x, origin_y = cx * chunk_pixels, cy * chunk_pixels
+        for y in range(cy * self.chunk_tiles, min(self.grid.height, (cy + 1) * self.chunk_tiles)):
+            for x in range(cx * self.chunk_tiles, min(self.grid.width, (cx + 1) * self.chunk_tiles)):
+                Tile(self.grid, x, y).draw(chunk, origin_x, origin_y)
+        return chunk
+
+    def _draw_overview(self, surface, camera_x: int, camera_y: int, tile_px: int):
+        """Draws the view from the overview pages, the visible part of each scaled up to tile_px pixels per tile."""
+        view_width, view_height = surface.get_size()
+        x0 = max(0, camera_x // tile_px); x1 = min(self.grid.width, (camera_x + view_width) // tile_px + 1)
+        y0 = max(0, camera_y // tile_px); y1 = min(self.grid.height, (camera_y + view_height) // tile_px + 1)
+        page_tiles = MAP_OVERVIEW_PAGE_TILES
+        for py in range(y0 // page_tiles, (y1 - 1) // page_tiles + 1):
+            for px in range(x0 // page_tiles, (x1 - 1) // page_tiles + 1):
+                left = max(x0, px * page_tiles); right = min(x1, (px + 1) * page_tiles)
+                top = max(y0, py * page_tiles); bottom = min(y1, (py + 1) * page_tiles)
+                part = self._get_page(px, py).subsurface((left - px * page_tiles, top - py * page_tiles,
+                                                          right - left, bottom - top))
+                if tile_px > 1: part = pygame.transform.scale(part, ((right - left) * tile_px, (bottom - top) * tile_px))
+                surface.blit(part, (left * tile_px - camera_x, top * tile_px - camera_y))
+
+    def _get_page(self, px: int, py: int):
+        key = (px, py)
+        page = self.pages.get(key)
+        if page is None:
+            page_tiles = MAP_OVERVIEW_PAGE_TILES
+            page = pygame.Surface((page_tiles, page_tiles))
+            if pygame.display.get_surface() is not None: page = page.convert()
+            page.fill(DARK_BLUE) # Outside the map
+            self._paint_page(page, px, py, px * page_tiles, py * page_tiles,
+                             min(self.grid.width, (px + 1) * page_tiles), min(self.grid.height, (py + 1) * page_tiles))
+            self.pages.add(key, page)
+        else:
+            dirty = self.pages.pop_dirty(key)
+            if dirty:
+                origin_x, origin_y = px * MAP_OVERVIEW_PAGE_TILES, py * MAP_OVERVIEW_PAGE_TILES
+                for x, y in dirty:
+                    tile = Tile(self.grid, x, y)
+                    page.set_at((x - origin_x, y - origin_y), tile.resource_color or tile.color)
+        return page
+
+    def _paint_page(self, page, px: int, py: int, x0: int, y0: int, x1: int, y1: int):
+        """Fills tiles [y0:y1, x0:x1] of an overview page from the tile arrays."""
+        origin_x, origin_y = px * MAP_OVERVIEW_PAGE_TILES, py * MAP_OVERVIEW_PAGE_TILES
+        pygame.surfarray.blit_array(page.subsurface((x0 - origin_x, y0 - origin_y, x1 - x0, y1 - y0)),
+                                    overview_colors(self.game_map, np.arange(x0, x1), np.arange(y0, y1)))
+
+
+class Minimap:
+    """
+    The whole map shrunk to a size x size surface for the side panel. Each minimap pixel
+    shows one sampled tile (pixel i shows tile i * diameter // size, so big maps skip tiles
+    and small ones repeat them). The terrain image is built once from the tile arrays;
+    after that only the pixels of tiles whose resource changed are repainted, and freshly
+    generated parts of lazy maps are filled in. Every frame, draw() copies it and plots
+    buildings and units as points, plus the outline of the main view.
+    """
+    def __init__(self, game_map, size: int = MINIMAP_SIZE):
+        self.game_map = game_map
+        self.grid = game_map.grid
+        self.size = size
+        self.tiles = np.arange(size) * game_map.diameter // size # Tile sampled by each pixel column (and row)
+        self.terrain = pygame.Surface((size, size))
+        if pygame.display.get_surface() is not None: self.terrain = self.terrain.convert()
+        pygame.surfarray.blit_array(self.terrain, overview_colors(game_map, self.tiles, self.tiles))
+        self.frame = self.terrain.copy() # Terrain plus this frame's points
+        self.grid.add_listener(self)
+
+    def _pixels(self, start: int, end: int) -> range:
+        """Pixel columns (or rows) sampling a tile in [start, end)."""
+        diameter, size = self.game_map.diameter, self.size
+        return range(-(-start * size // diameter), -(-end * size // diameter))
+
+    def tile_changed(self, x: int, y: int, change: int):
+        """TileGrid listener: repaints the pixels showing the tile, if any do (it may not be sampled)."""
+        if not change & TILE_CHANGE_RESOURCE: return
+        columns = self._pixels(x, x + 1); rows = self._pixels(y, y + 1)
+        if not columns or not rows: return
+        tile = Tile(self.grid, x, y)
+        self.terrain.fill(tile.resource_color or tile.color, (columns.start, rows.start, len(columns), len(rows)))
+
+    def area_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """TileGrid listener: paints the pixels sampling a freshly generated window."""
+        columns = self._pixels(x0, x1); rows = self._pixels(y0, y1)
+        if not columns or not rows: return
+        pygame.surfarray.blit_array(self.terrain.subsurface((columns.start, rows.start, len(columns), len(rows))),
+                                    overview_colors(self.game_map, self.tiles[columns.start:columns.stop],
+                                                    self.tiles[rows.start:rows.stop]))
+
+    def to_grid(self, pixel_x: int, pixel_y: int) -> tuple[int, int]:
+        """The tile shown at a minimap pixel."""
+        last = self.size - 1
+        return int(self.tiles[max(0, min(last, pixel_x))]), int(self.tiles[max(0, min(last, pixel_y))])
+
+    def draw(self, points, view: tuple[float, float, float, float]):
+        """
+        Returns this frame's minimap: the terrain with every (xs, ys, color, size) group of points
+        on top (tile coordinates) and the outline of view (x0, y0, x1, y1 in tiles).
+        """
+        scale = self.size / self.game_map.diameter
+        self.frame.blit(self.terrain, (0, 0))
+        for xs, ys, color, size in points: draw_points(self.frame, xs * scale, ys * scale, color, size)
+        x0, y0, x1, y1 = (int(value * scale) for value in view)
+        pygame.draw.rect(self.frame, WHITE, (x0, y0, max(2, x1 - x0), max(2, y1 - y0)), 1)
+        return self.frame
+
+
+def overview_colors(game_map, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    One pixel per tile of columns xs and rows ys, as an (x, y, 3) array ready for
+    pygame.surfarray (black where a lazy map isn't generated yet).
+    """
+    colors = game_map.grid.colors(xs, ys)
+    if game_map.lazy:
+        generated = game_map.generated[np.ix_(ys // MAP_CHUNK_TILES, xs // MAP_CHUNK_TILES)]
+        colors[~generated] = BLACK
+    return colors.transpose(1, 0, 2)
+
+
+def draw_points(surface, xs: np.ndarray, ys: np.ndarray, color: tuple[int, int, int], size: int):
+    """
+    Plots a size x size square centered on every (xs, ys) surface pixel, one array
+    assignment per pixel of the square (entities at a far zoom). Points off the surface are skipped.
+    """
+    if not len(xs): return
+    width, height = surface.get_size()
+    xs = np.floor(xs).astype(np.intp) - size // 2; ys = np.floor(ys).astype(np.intp) - size // 2
+    pixels = pygame.surfarray.pixels2d(surface); mapped = surface.map_rgb(color)
+    for dy in range(size):
+        for dx in range(size):
+            px = xs + dx; py = ys + dy
+            inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            pixels[px[inside], py[inside]] = mapped
+    del pixels # Unlocks the surface
\ No newline at end of file
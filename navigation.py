@@ -0,0 +1,371 @@
+# navigation.py
+# Cached, incrementally repaired navigation data shared by all units.
+import collections # For deque in BFS
+import heapq
+import numpy as np
+from constants import * # Import constants
+from tile import TileGrid, TILE_CHANGE_BUILDING, TILE_CHANGE_WALKABLE
+
+NEIGHBOR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+# 4-neighbors of a cell in clockwise order, each paired with the diagonal that follows it
+_RING = [((0, -1), (1, -1)), ((1, 0), (1, 1)), ((0, 1), (-1, 1)), ((-1, 0), (-1, -1))]
+
+
+class SearchStats:
+    """Running totals of graph searches (A*, BFS): how many ran and how many nodes they expanded."""
+    __slots__ = ('searches', 'expanded')
+
+    def __init__(self):
+        self.searches = 0; self.expanded = 0
+
+    def add(self, expanded: int):
+        self.searches += 1; self.expanded += expanded
+
+
+def label_components(walkable: np.ndarray) -> np.ndarray:
+    """
+    Labels 4-connected components of walkable cells with positive labels (0 for unwalkable).
+    Vectorized union-find: every round hooks the larger root of each
+    straddling edge onto the smaller one, then pointer-jumps to flatten.
+    """
+    height, width = walkable.shape
+    idx = np.arange(height * width, dtype=np.int64).reshape(height, width)
+    parent = np.arange(height * width, dtype=np.int64)
+    horizontal = walkable[:, :-1] & walkable[:, 1:]
+    vertical = walkable[:-1, :] & walkable[1:, :]
+    a = np.concatenate((idx[:, :-1][horizontal], idx[:-1, :][vertical]))
+    b = np.concatenate((idx[:, 1:][horizontal], idx[1:, :][vertical]))
+    while True:
+        root_a = parent[a]; root_b = parent[b]
+        differ = root_a != root_b
+        if not differ.any(): break
+        a = a[differ]; b = b[differ]; root_a = root_a[differ]; root_b = root_b[differ]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent): break
+            parent = jumped
+    labels = parent.reshape(height, width).astype(np.int32) + 1
+    labels[~walkable] = 0
+    return labels
+
+
+def _window_edges(x0: int, y0: int, x1: int, y1: int):
+    """Yields (inside, outside) cell pairs across the border of the window [y0:y1, x0:x1]."""
+    for x in range(x0, x1):
+        yield (x, y0), (x, y0 - 1)
+        yield (x, y1 - 1), (x, y1)
+    for y in range(y0, y1):
+        yield (x0, y), (x0 - 1, y)
+        yield (x1 - 1, y), (x1, y)
+
+
+class RegionIndex:
+    """
+    Connected regions of walkable tiles, for O(1) reachability checks.
+
+    labels[y, x] holds a positive region label (0 if unwalkable). Labels joined later
+    are linked in a small union-find (merged), so region_of() resolves a label
+    to its representative. The index listens to its TileGrid:
+      * a tile becoming walkable joins the regions around it (union),
+      * a tile becoming unwalkable may split its region. A local test on its
+        eight neighbors rules that out in the common case; otherwise a BFS is
+        run from each side in lockstep until the sides meet (no split) or one
+        side runs out of cells, which then gets a fresh label.
+    A freshly generated window of a lazy map is labeled on its own and joined to
+    the regions across its border.
+    version increases whenever connectivity changes, for caches keyed on it.
+    """
+    def __init__(self, grid: TileGrid, areas: list[tuple[int, int, int, int]] | None = None):
+        """areas: the (x0, y0, x1, y1) windows to label, if not the whole grid (a partly generated lazy map)."""
+        self.grid = grid
+        self.merged: dict[int, int] = {} # label -> label it was joined into
+        self.next_label = grid.width * grid.height + 1 # Fresh labels for split-off regions
+        self.version = 0
+        self.stats = SearchStats() # Split-check BFS runs
+        if areas is None: self.labels = label_components(grid.walkable)
+        else:
+            self.labels = np.zeros(grid.walkable.shape, dtype=np.int32) # Untouched pages cost no memory
+            for area in areas: self.area_generated(*area)
+        grid.add_listener(self)
+
+    def _find(self, label: int) -> int:
+        merged = self.merged
+        root = label
+        while root in merged: root = merged[root]
+        while label != root: # Path compression
+            merged[label], label = root, merged[label]
+        return root
+
+    def region_of(self, x: int, y: int) -> int:
+        """Region of a walkable tile, or -1 for unwalkable / out-of-bounds tiles."""
+        if not (0 <= x < self.grid.width and 0 <= y < self.grid.height): return -1
+        label = int(self.labels[y, x])
+        return self._find(label) if label > 0 else -1
+
+    def regions_near(self, x: int, y: int) -> set[int]:
+        """Regions a unit on (x, y) can enter: its own, or its walkable neighbors' if the tile is blocked."""
+        region = self.region_of(x, y)
+        if region >= 0: return {region}
+        regions = set()
+        for dx, dy in NEIGHBOR_OFFSETS:
+            region = self.region_of(x + dx, y + dy)
+            if region >= 0: regions.add(region)
+        return regions
+
+    def is_reachable(self, from_x: int, from_y: int, to_x: int, to_y: int) -> bool:
+        """True if a unit on (from_x, from_y) can walk onto or next to (to_x, to_y)."""
+        return not self.regions_near(from_x, from_y).isdisjoint(self.regions_near(to_x, to_y))
+
+    def tile_changed(self, x: int, y: int, change: int):
+        """TileGrid listener: merges or splits regions when walkability flips."""
+        if not change & TILE_CHANGE_WALKABLE: return
+        if self.grid.walkable[y, x]: self._on_opened(x, y)
+        else: self._on_blocked(x, y)
+
+    def area_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """TileGrid listener: labels a generated window and joins it to the regions around it."""
+        window = label_components(self.grid.walkable[y0:y1, x0:x1])
+        window[window > 0] += self.next_label
+        self.next_label += window.size + 1
+        self.labels[y0:y1, x0:x1] = window
+        for (ix, iy), (ox, oy) in _window_edges(x0, y0, x1, y1):
+            inside = self.region_of(ix, iy); outside = self.region_of(ox, oy)
+            if inside >= 0 and outside >= 0 and inside != outside:
+                self.merged[max(inside, outside)] = min(inside, outside)
+        self.version += 1
+
+    def _on_opened(self, x: int, y: int):
+        neighbor_regions = set()
+        for dx, dy in NEIGHBOR_OFFSETS:
+            region = self.region_of(x + dx, y + dy)
+            if region >= 0: neighbor_regions.add(region)
+        if not neighbor_regions:
+            self.labels[y, x] = self.next_label; self.next_label += 1
+            self.version += 1
+            return
+        root = min(neighbor_regions)
+        self.labels[y, x] = root
+        for region in neighbor_regions:
+            if region != root: self.merged[region] = root
+        if len(neighbor_regions) > 1: self.version += 1
+
+    def _on_blocked(self, x: int, y: int):
+        self.labels[y, x] = 0
+        walkable = self.grid.walkable
+        width, height = self.grid.width, self.grid.height
+        def is_open(cx, cy): return 0 <= cx < width and 0 <= cy < height and walkable[cy, cx]
+
+        # Open 4-neighbors stay connected around the blocked tile when the diagonal between two adjacent ones is open
+        sides = [(x + sx, y + sy) for (sx, sy), _ in _RING]
+        side_open = [is_open(cx, cy) for cx, cy in sides]
+        diagonal_open = [is_open(x + dx, y + dy) for _, (dx, dy) in _RING] # Between side i and side i + 1
+        group_of = list(range(4))
+        for i in range(4):
+            j = (i + 1) % 4
+            if side_open[i] and side_open[j] and diagonal_open[i]:
+                old_group, new_group = group_of[j], group_of[i]
+                group_of = [new_group if g == old_group else g for g in group_of]
+        seeds = [sides[i] for i in range(4) if side_open[i] and group_of.index(group_of[i]) == i]
+        if len(seeds) > 1: self._split(seeds)
+
+    def _split(self, seeds: list[tuple[int, int]]):
+        """Grows one BFS per seed in lockstep. Fronts that meet are joined; a front that runs dry is its own region."""
+        walkable = self.grid.walkable
+        width, height = self.grid.width, self.grid.height
+        owner: dict[tuple[int, int], int] = {}
+        fronts = []
+        for i, seed in enumerate(seeds):
+            owner[seed] = i
+            fronts.append(collections.deque([seed]))
+        group_of = list(range(len(seeds))) # Front index -> id of the group of fronts it has met
+        def group(i):
+            while group_of[i] != i: i = group_of[i]
+            return i
+        visited_by_group: dict[int, list[tuple[int, int]]] = {i: [seed] for i, seed in enumerate(seeds)}
+        active = set(range(len(seeds)))
+        expanded = 0
+
+        while len({group(i) for i in active}) > 1:
+            for i in list(active):
+                if i not in active: continue
+                q = fronts[i]
+                if not q:
+                    active.discard(i)
+                    g = group(i)
+                    if not any(group(j) == g for j in active):
+                        # Whole group exhausted without meeting the rest: it is a separate region
+                        self._relabel(visited_by_group[g])
+                    continue
+                cx, cy = q.popleft(); expanded += 1
+                for dx, dy in NEIGHBOR_OFFSETS:
+                    n = (cx + dx, cy + dy)
+                    if not (0 <= n[0] < width and 0 <= n[1] < height) or not walkable[n[1], n[0]]: continue
+                    other = owner.get(n)
+                    if other is None:
+                        owner[n] = i; q.append(n)
+                        visited_by_group[group(i)].append(n)
+                    else:
+                        gi, go = group(i), group(other)
+                        if gi != go: # Fronts met: same region after all
+                            group_of[go] = gi
+                            visited_by_group[gi].extend(visited_by_group.pop(go))
+        self.stats.add(expanded)
+
+    def _relabel(self, cells: list[tuple[int, int]]):
+        label = self.next_label; self.next_label += 1
+        labels = self.labels
+        for cx, cy in cells: labels[cy, cx] = label
+        self.version += 1
+
+
+class DistanceField:
+    """
+    Multi-source distance/flow field towards every building of one type.
+
+    dist[(x, y)] is the number of steps from (x, y) to the nearest such building,
+    moving through walkable tiles only (the building tile itself is the source);
+    source[(x, y)] is that building. Distances are only stored below
+    max_distance, matching the bounded BFS this replaces.
+
+    The field is built once and then repaired locally from TileGrid
+    notifications: placing or removing a building of this type adds or removes
+    a source, and any walkability flip re-evaluates the tile and propagates the
+    resulting increase or decrease to the cells that depend on it.
+    """
+    def __init__(self, grid: TileGrid, building_type: int, max_distance: int):
+        self.grid = grid
+        self.building_type = building_type
+        self.max_distance = max_distance
+        self.dist: dict[tuple[int, int], int] = {}
+        self.source: dict[tuple[int, int], object] = {} # (x, y) -> nearest Building
+        self.stats = SearchStats() # Propagation BFS runs
+        self.rebuild()
+        grid.add_listener(self)
+
+    def rebuild(self):
+        """Recomputes the whole field with a multi-source BFS from every matching building."""
+        self.dist.clear(); self.source.clear()
+        q = collections.deque()
+        for (x, y), building in self.grid.buildings.items():
+            if building.type == self.building_type:
+                self.dist[(x, y)] = 0; self.source[(x, y)] = building
+                q.append((x, y))
+        self._propagate_decrease(q)
+
+    def lookup(self, x: int, y: int) -> tuple[int, object] | None:
+        """
+        Returns (distance, building) for a unit standing on (x, y), or None if no
+        building is within max_distance. A unit may stand on a tile that is not
+        walkable (e.g. a resource respawned under it); it then needs one step
+        onto a neighbor first, exactly like the BFS it replaces.
+        """
+        d = self.dist.get((x, y))
+        if d is not None: return d, self.source[(x, y)]
+        best = None
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nd = self.dist.get((x + dx, y + dy))
+            if nd is not None and nd + 1 < self.max_distance and (best is None or nd + 1 < best[0]):
+                best = (nd + 1, self.source[(x + dx, y + dy)])
+        return best
+
+    def next_step(self, x: int, y: int) -> tuple[int, int] | None:
+        """Follows the flow field: returns the neighbor of (x, y) one step closer to the nearest source."""
+        best = None; best_d = self.dist.get((x, y), self.max_distance)
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nd = self.dist.get((x + dx, y + dy))
+            if nd is not None and nd < best_d:
+                best = (x + dx, y + dy); best_d = nd
+        return best
+
+    def tile_changed(self, x: int, y: int, change: int):
+        """TileGrid listener: repairs the field around (x, y) after a building or walkability change."""
+        if not change & (TILE_CHANGE_BUILDING | TILE_CHANGE_WALKABLE): return
+        old = self.dist.get((x, y))
+        new = self._evaluate(x, y)
+        if new is not None and (old is None or new[0] < old):
+            self.dist[(x, y)] = new[0]; self.source[(x, y)] = new[1]
+            self._propagate_decrease(collections.deque([(x, y)]))
+        elif old is not None and (new is None or new[0] > old):
+            # Blocked, or a source was removed: everything derived through this cell must be re-derived
+            self._propagate_increase(x, y)
+
+    def area_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """TileGrid listener: extends the field into a generated window (no buildings yet) from its border."""
+        q = collections.deque(outside for _, outside in _window_edges(x0, y0, x1, y1) if outside in self.dist)
+        self._propagate_decrease(q)
+
+    def _is_source(self, x: int, y: int):
+        building = self.grid.buildings.get((x, y))
+        return building if building is not None and building.type == self.building_type else None
+
+    def _evaluate(self, x: int, y: int) -> tuple[int, object] | None:
+        """Correct (distance, source) for one cell given its neighbors' current values."""
+        building = self._is_source(x, y)
+        if building is not None: return 0, building
+        if not self.grid.walkable[y, x]: return None
+        best = None
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nd = self.dist.get((x + dx, y + dy))
+            if nd is not None and nd + 1 < self.max_distance and (best is None or nd + 1 < best[0]):
+                best = (nd + 1, self.source[(x + dx, y + dy)])
+        return best
+
+    def _propagate_decrease(self, q: collections.deque):
+        """BFS outward from cells whose distance just dropped (or new sources)."""
+        dist = self.dist; source = self.source; walkable = self.grid.walkable
+        height, width = self.grid.height, self.grid.width
+        expanded = 0
+        while q:
+            x, y = q.popleft(); expanded += 1
+            nd = dist[(x, y)] + 1
+            if nd >= self.max_distance: continue
+            origin = source[(x, y)]
+            for dx, dy in NEIGHBOR_OFFSETS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height) or not walkable[ny, nx]: continue
+                current = dist.get((nx, ny))
+                if current is None or nd < current:
+                    dist[(nx, ny)] = nd; source[(nx, ny)] = origin
+                    q.append((nx, ny))
+        self.stats.add(expanded)
+
+    def _propagate_increase(self, x: int, y: int):
+        """
+        Handles a cell whose distance went up (blocked, or lost its source):
+        drops every cell that may have derived its distance through it, then
+        re-relaxes those cells from the unaffected cells around them.
+        """
+        affected = {(x, y)}; q = collections.deque([(x, y)])
+        expanded = 0
+        while q:
+            cx, cy = q.popleft(); expanded += 1
+            d = self.dist.get((cx, cy))
+            if d is None: continue
+            for dx, dy in NEIGHBOR_OFFSETS:
+                n = (cx + dx, cy + dy)
+                if n not in affected and self.dist.get(n) == d + 1:
+                    affected.add(n); q.append(n)
+        for cell in affected:
+            self.dist.pop(cell, None); self.source.pop(cell, None)
+
+        # Seed from the unaffected boundary, then relax back into the affected region
+        heap = []
+        for cx, cy in affected:
+            best = self._evaluate(cx, cy)
+            if best is not None:
+                heap.append((best[0], cx, cy, id(best[1]), best[1]))
+        heapq.heapify(heap)
+        while heap:
+            d, cx, cy, _, building = heapq.heappop(heap); expanded += 1
+            current = self.dist.get((cx, cy))
+            if current is not None and current <= d: continue
+            self.dist[(cx, cy)] = d; self.source[(cx, cy)] = building
+            if d + 1 >= self.max_distance: continue
+            for dx, dy in NEIGHBOR_OFFSETS:
+                nx, ny = cx + dx, cy + dy
+                if (nx, ny) not in affected or not self.grid.walkable[ny, nx]: continue
+                current = self.dist.get((nx, ny))
+                if current is None or d + 1 < current:
+                    heapq.heappush(heap, (d + 1, nx, ny, id(building), building))
+        self.stats.add(expanded)
\ No newline at end of file
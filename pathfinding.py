@@ -0,0 +1,187 @@
+# pathfinding.py
+# A* over walkable tiles, with a cache of search trees shared by all units.
+import collections
+import heapq
+import time
+from constants import * # Import constants
+from tile import TileGrid, TILE_CHANGE_WALKABLE
+from navigation import NEIGHBOR_OFFSETS, RegionIndex, SearchStats
+
+PATH_CACHE_SIZE = 64 # Number of (region, goal) search trees kept
+PATH_REQUEST_BUDGET_MS = 2.0 # Wall time per frame (not per tick) the interactive game spends on queued searches
+
+
+def find_path(grid: TileGrid, start: tuple[int, int], goal: tuple[int, int],
+              known: dict[tuple[int, int], tuple[int, tuple[int, int] | None]] | None = None,
+              stats: SearchStats | None = None) -> list[tuple[int, int]] | None:
+    """
+    A* over walkable tiles (4-connected, unit cost, Manhattan heuristic).
+
+    Returns the waypoints from the first step after start up to and including goal,
+    [] if start == goal, or None if goal cannot be reached. The goal itself may be
+    unwalkable (a resource or building tile): the path then ends by stepping into it.
+    known maps tiles with an already known route to goal to (distance, next tile);
+    reaching one of them finishes the search, and the route is followed from there.
+    stats, if given, is told about the search and the number of nodes it expanded.
+    """
+    if start == goal: return []
+    walkable = grid.walkable
+    width, height = grid.width, grid.height
+    goal_x, goal_y = goal
+    known = known or {}
+
+    g_score = {start: 0}
+    came_from: dict[tuple[int, int], tuple[int, int]] = {}
+    counter = 0 # Tie-break so equal f-scores pop in push order (no tuple comparisons of tiles)
+    open_heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), counter, start, False)]
+    expanded = 0
+    while open_heap:
+        _, _, node, is_exit = heapq.heappop(open_heap); expanded += 1
+        if is_exit or node == goal: # Reached the goal, or a tile whose route to it is known
+            path = [node]
+            while path[-1] in came_from and came_from[path[-1]] != start: path.append(came_from[path[-1]])
+            path.reverse()
+            step = known.get(node, (0, None))[1]
+            while step is not None:
+                path.append(step); step = known[step][1] if step in known else None
+            if stats is not None: stats.add(expanded)
+            return path
+        g = g_score[node]
+        x, y = node
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height): continue
+            neighbor = (nx, ny)
+            if neighbor != goal and not walkable[ny, nx]: continue
+            new_g = g + 1
+            if new_g >= g_score.get(neighbor, new_g + 1): continue
+            g_score[neighbor] = new_g; came_from[neighbor] = node
+            counter += 1
+            if neighbor in known: # Exact remaining cost is known: queue it as a finish
+                heapq.heappush(open_heap, (new_g + known[neighbor][0], counter, neighbor, True))
+            else:
+                heapq.heappush(open_heap, (new_g + abs(nx - goal_x) + abs(ny - goal_y), counter, neighbor, False))
+    if stats is not None: stats.add(expanded)
+    return None
+
+
+class PathCache:
+    """
+    LRU cache of A* results keyed by (start region, goal tile).
+
+    Each entry is a search tree: tile -> (distance to goal, next tile towards goal),
+    grown by every path found for that key. A unit starting on a tile already in the
+    tree gets its path without searching; other starts search only until they hit
+    the tree. The cache listens to its TileGrid: a tile becoming unwalkable drops
+    every tree routed through it, and a tile becoming walkable drops the trees it
+    could offer a shortcut to, so cached routes stay shortest paths.
+    """
+    def __init__(self, grid: TileGrid, regions: RegionIndex, max_entries: int = PATH_CACHE_SIZE):
+        self.grid = grid
+        self.regions = regions
+        self.max_entries = max_entries
+        self.trees: collections.OrderedDict = collections.OrderedDict() # (region, goal) -> tree, oldest first
+        self.hits = 0; self.misses = 0
+        self.stats = SearchStats() # A* runs on cache misses
+        grid.add_listener(self)
+
+    def find_path(self, start_x: int, start_y: int, goal_x: int, goal_y: int) -> list[tuple[int, int]] | None:
+        """Returns the waypoints from (start_x, start_y) to (goal_x, goal_y), or None if unreachable."""
+        if not self.regions.is_reachable(start_x, start_y, goal_x, goal_y): return None
+        start, goal = (start_x, start_y), (goal_x, goal_y)
+        key = (min(self.regions.regions_near(start_x, start_y)), goal)
+        tree = self.trees.get(key)
+        if tree is None:
+            tree = {goal: (0, None)}
+            self.trees[key] = tree
+            if len(self.trees) > self.max_entries: self.trees.popitem(last=False)
+        else:
+            self.trees.move_to_end(key)
+
+        if start in tree:
+            self.hits += 1
+            path = []
+            step = tree[start][1]
+            while step is not None: path.append(step); step = tree[step][1]
+            return path
+
+        self.misses += 1
+        path = find_path(self.grid, start, goal, tree, self.stats)
+        if path is None: return None
+        # Record the new part of the route in the tree; path ends at goal, so distances are just positions
+        route = [start] + path
+        for i, tile in enumerate(route[:-1]):
+            if tile in tree: break
+            tree[tile] = (len(route) - 1 - i, route[i + 1])
+        return path
+
+    def tile_changed(self, x: int, y: int, change: int):
+        """TileGrid listener: drops trees that the walkability change may have made wrong or suboptimal."""
+        if not change & TILE_CHANGE_WALKABLE: return
+        if self.grid.walkable[y, x]:
+            # Stale only if some route could get shorter through (x, y), by a Manhattan lower bound
+            stale = []
+            for key, tree in self.trees.items():
+                goal_x, goal_y = key[1]
+                via = abs(x - goal_x) + abs(y - goal_y)
+                if any(abs(tx - x) + abs(ty - y) + via < distance for (tx, ty), (distance, _) in tree.items()):
+                    stale.append(key)
+        else:
+            stale = [key for key, tree in self.trees.items() if (x, y) in tree and key[1] != (x, y)]
+        for key in stale: del self.trees[key]
+
+    def area_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """TileGrid listener: new terrain may shorten any cached route, so every tree is dropped."""
+        self.clear()
+
+    def clear(self):
+        self.trees.clear()
+
+
+class PathRequestQueue:
+    """
+    Searches requested by units, run in batches under a per-frame time budget.
+
+    A request is a hashable key that search() understands, e.g. ('path', start_x,
+    start_y, goal_x, goal_y). A unit calls request() every step until it returns the
+    result; until then it waits. Identical requests are merged into one search.
+    process() runs pending searches in request order until budget_ms of wall time is
+    used (always at least one, so the queue keeps moving), and keeps their results
+    until the next process() call, so every unit waiting on a merged request gets it.
+    """
+    def __init__(self, search):
+        self.search = search # search(key) -> result
+        self.pending: dict[tuple, None] = {} # Requests in arrival order
+        self.results: dict[tuple, object] = {} # Found by the last process()
+        self.requests = 0; self.merged = 0; self.searched = 0 # Running totals
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def request(self, key: tuple) -> tuple[bool, object]:
+        """Returns (True, result) once the search ran, (False, None) while it is queued."""
+        if key in self.results: return True, self.results[key]
+        self.requests += 1
+        if key in self.pending: self.merged += 1
+        else: self.pending[key] = None
+        return False, None
+
+    def discard_result(self, key: tuple):
+        """Forgets a result found to be stale, so the next request for key searches again."""
+        self.results.pop(key, None)
+
+    def process(self, budget_ms: float) -> int:
+        """Runs queued searches until budget_ms is spent. Returns how many ran."""
+        self.results = {}
+        if not self.pending: return 0
+        deadline = time.perf_counter() + budget_ms / 1000
+        searched = 0
+        while self.pending:
+            key = next(iter(self.pending)); del self.pending[key]
+            self.results[key] = self.search(key); searched += 1
+            if time.perf_counter() >= deadline: break
+        self.searched += searched
+        return searched
+
+    def clear(self):
+        self.pending.clear(); self.results.clear()
\ No newline at end of file
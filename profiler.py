@@ -0,0 +1,139 @@
+# profiler.py
+# Lightweight per-phase frame profiler: rolling timings and counters for the game loop.
+import collections
+import contextlib
+import time
+from constants import * # Import constants
+
+_NO_PHASE = contextlib.nullcontext() # Shared, reusable 'with' target of a disabled profiler
+
+
+class _PhaseTimer:
+    """Context manager adding the time spent inside it to one phase of the current frame."""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'FrameProfiler', name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        frame_times = self.profiler._frame_times; frame_calls = self.profiler._frame_calls
+        frame_times[self.name] = frame_times.get(self.name, 0.0) + elapsed
+        frame_calls[self.name] = frame_calls.get(self.name, 0) + 1
+
+
+class FrameProfiler:
+    """
+    Rolling per-phase timings and counters over the last `window` frames.
+
+    Code is measured with `with profiler.phase('workers'): ...`; a phase entered more
+    than once in a frame adds up (phases may nest, each times itself). count() adds to
+    a per-frame counter, and track(getter) samples running totals (e.g. A* searches and
+    the nodes they expanded) once per frame and records how much each one grew.
+    end_frame() closes a frame and pushes its numbers into the rolling windows that
+    stats(), histogram() and report() read. While disabled, phase() hands out a shared
+    no-op context and nothing is recorded. Enabling the profiler or reset() restarts the
+    tracked totals from their current values, so the next frame only counts its own growth.
+    """
+    def __init__(self, window: int = PROFILER_WINDOW_FRAMES, enabled: bool = False):
+        self.window = window
+        self._enabled = enabled
+        self.frames = 0 # Frames recorded since the last reset
+        self.times: dict[str, collections.deque] = {} # Phase -> seconds per frame
+        self.calls: dict[str, collections.deque] = {} # Phase -> times entered per frame
+        self.counts: dict[str, collections.deque] = {} # Counter -> amount per frame
+        self._timers: dict[str, _PhaseTimer] = {}
+        self._trackers: list = [] # [getter, totals at the end of the last frame]
+        self._frame_times: dict[str, float] = {}
+        self._frame_calls: dict[str, int] = {}
+        self._frame_counts: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        if enabled and not self._enabled: self._rebase_trackers() # Don't count what grew while disabled
+        self._enabled = enabled
+
+    def phase(self, name: str):
+        """Context manager timing one phase of the current frame."""
+        if not self._enabled: return _NO_PHASE
+        timer = self._timers.get(name)
+        if timer is None: timer = self._timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def count(self, name: str, amount: int = 1):
+        """Adds amount to a counter of the current frame."""
+        if self._enabled: self._frame_counts[name] = self._frame_counts.get(name, 0) + amount
+
+    def track(self, getter):
+        """Registers getter() -> {counter: running total}; every frame records how much each total grew."""
+        self._trackers.append([getter, getter() if self._enabled else None]) # Disabled: counted from when enabled
+
+    def end_frame(self):
+        """Closes the current frame: its phase times, calls and counters go into the rolling windows."""
+        if not self._enabled: return
+        for tracker in self._trackers:
+            totals = tracker[0](); previous = tracker[1] or {}
+            for name, total in totals.items():
+                grown = total - previous.get(name, 0)
+                self.count(name, grown if grown >= 0 else total) # A total that went down was reset (e.g. a new map)
+            tracker[1] = totals
+        for rolling, frame, empty in ((self.times, self._frame_times, 0.0), (self.calls, self._frame_calls, 0),
+                                      (self.counts, self._frame_counts, 0)):
+            for name in frame:
+                if name not in rolling: rolling[name] = collections.deque(maxlen=self.window)
+            for name, values in rolling.items(): values.append(frame.get(name, empty))
+            frame.clear()
+        self.frames += 1
+
+    def reset(self):
+        """Forgets every recorded frame; tracked totals count on from their current values."""
+        self.times.clear(); self.calls.clear(); self.counts.clear(); self.frames = 0
+        self._frame_times.clear(); self._frame_calls.clear(); self._frame_counts.clear()
+        self._rebase_trackers()
+
+    def _rebase_trackers(self):
+        for tracker in self._trackers: tracker[1] = tracker[0]()
+
+    def stats(self) -> dict:
+        """
+        Plain-data summary of the window: per phase the mean, median, 95th percentile and
+        maximum time per frame in ms and the calls per frame; per counter the mean, maximum
+        and total per frame.
+        """
+        phases = {}
+        for name, values in self.times.items():
+            ordered = sorted(values); n = len(ordered)
+            phases[name] = {'mean_ms': sum(ordered) / n * 1000, 'p50_ms': ordered[n // 2] * 1000,
+                            'p95_ms': ordered[min(n - 1, n * 95 // 100)] * 1000, 'max_ms': ordered[-1] * 1000,
+                            'calls_per_frame': sum(self.calls[name]) / n}
+        counters = {name: {'mean': sum(values) / len(values), 'max': max(values), 'total': sum(values)}
+                    for name, values in self.counts.items()}
+        return {'frames': min(self.frames, self.window), 'phases': phases, 'counters': counters}
+
+    def histogram(self, name: str) -> list[int]:
+        """Frames of the window per PROFILER_HISTOGRAM_MS bucket of one phase's time (the last bucket is open)."""
+        buckets = [0] * (len(PROFILER_HISTOGRAM_MS) + 1)
+        for seconds in self.times.get(name, ()):
+            ms = seconds * 1000; i = 0
+            while i < len(PROFILER_HISTOGRAM_MS) and ms >= PROFILER_HISTOGRAM_MS[i]: i += 1
+            buckets[i] += 1
+        return buckets
+
+    def report(self) -> list[str]:
+        """stats() as text lines, one per phase and counter (for the overlay and the headless runner)."""
+        stats = self.stats()
+        lines = [f"{'phase':<12}{'mean':>7}{'p95':>7}{'max':>7}  ms ({stats['frames']} frames)"]
+        for name, phase in stats['phases'].items():
+            lines.append(f"{name:<12}{phase['mean_ms']:>7.2f}{phase['p95_ms']:>7.2f}{phase['max_ms']:>7.2f}")
+        for name, counter in stats['counters'].items():
+            lines.append(f"{name:<12}{counter['mean']:>7.1f}{'':>7}{counter['max']:>7}  per frame")
+        return lines
\ No newline at end of file
@@ -0,0 +1,67 @@
+# random_streams.py
+# Seeded, independent random number streams per subsystem, for reproducible runs.
+import random
+import numpy as np
+
+SEED_RANGE = 2**31 # New seeds are drawn from [0, SEED_RANGE)
+
+
+def new_seed() -> int:
+    """A fresh seed for runs that didn't ask for one (from the global random module)."""
+    return random.randrange(SEED_RANGE)
+
+
+class RandomStreams:
+    """
+    One random.Random per subsystem ('terrain', 'resources', 'respawns', 'spawns', ...),
+    each seeded from the run seed and the stream name. Draws in one subsystem never
+    shift another's sequence, so e.g. an extra enemy spawn leaves the map and respawns
+    unchanged. String seeds go through SHA-512, so streams are the same in every
+    interpreter run (unlike hash(), which is randomized per process).
+    """
+    def __init__(self, seed: int):
+        self.seed = seed
+        self._streams: dict[str, random.Random] = {}
+
+    def stream(self, name: str) -> random.Random:
+        rng = self._streams.get(name)
+        if rng is None:
+            rng = self._streams[name] = random.Random(f"{self.seed}/{name}")
+        return rng
+
+    def derived(self, name: str) -> random.Random:
+        """
+        A one-off stream for name, not kept (or saved) with the others. For randomness
+        tied to a place rather than a sequence, e.g. one stream per map chunk.
+        """
+        return random.Random(f"{self.seed}/{name}")
+
+    def get_states(self) -> dict[str, list]:
+        """Internal state of every stream used so far, as JSON-ready lists (for saving)."""
+        states = {}
+        for name, rng in self._streams.items():
+            version, internal, gauss_next = rng.getstate()
+            states[name] = [version, list(internal), gauss_next]
+        return states
+
+    def set_states(self, states: dict[str, list]):
+        """Restores streams from get_states(), so they continue exactly where they were saved."""
+        for name, (version, internal, gauss_next) in states.items():
+            self.stream(name).setstate((version, tuple(internal), gauss_next))
+
+    def __repr__(self):
+        return f"RandomStreams(seed={self.seed})"
+
+
+def tile_variant(x: int, y: int) -> int:
+    """Deterministic 0/1 per tile (integer hash of the coordinates), for alternating tile colors."""
+    h = (x * 374761393 + y * 668265263) & 0xFFFFFFFF
+    h = ((h ^ (h >> 13)) * 1274126177) & 0xFFFFFFFF
+    return (h ^ (h >> 16)) & 1
+
+
+def tile_variants(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """tile_variant for arrays of coordinates (broadcast together); uint32 arithmetic wraps like the masks above."""
+    h = xs.astype(np.uint32) * np.uint32(374761393) + ys.astype(np.uint32) * np.uint32(668265263)
+    h = (h ^ (h >> 13)) * np.uint32(1274126177)
+    return (h ^ (h >> 16)) & 1
\ No newline at end of file
@@ -0,0 +1,243 @@
+# savegame.py
+# Versioned binary snapshots of a whole Simulation; tile layers are memory-mapped on load.
+#
+# File layout (little-endian):
+#   prefix   8-byte magic, uint32 format version, uint32 header length
+#   header   UTF-8 JSON: simulation, map, buildings, units, RNG states, and for each
+#            tile layer its dtype, shape and offset into the data section
+#   data     raw C-order tile layers, each starting on a LAYER_ALIGNMENT boundary
+#            (the data section itself starts at the first aligned offset after the header)
+import json
+import os
+import struct
+import numpy as np
+from constants import * # Import constants
+from tile import TileGrid
+from map import GameMap
+from building import Building, TownHall, House
+from unit import Worker, Enemy
+
+SAVE_MAGIC = b'CIVSAVE\0'
+SAVE_VERSION = 1
+LAYER_ALIGNMENT = 64 # Bytes; lets every layer be mapped and read as an aligned array
+_PREFIX = struct.Struct('<8sII') # magic, version, header length
+
+BUILDING_CLASSES = {BUILDING_TOWNHALL: TownHall, BUILDING_HOUSE: House}
+
+
+class SaveFormatError(Exception):
+    """The file is not a save game, or one written by an unsupported format version."""
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // LAYER_ALIGNMENT) * LAYER_ALIGNMENT
+
+
+# --- Saving ---
+
+def save_game(sim, path: str):
+    """
+    Writes sim (a Simulation or Game) to path. The file is written next to path and
+    then renamed over it, so a save replacing the file a running game was loaded
+    (and is still memory-mapped) from never changes the data under that game.
+    Of a lazy map only the generated chunks are written; the rest of each layer is
+    left as a hole in the file, which reads back as zeros (ungenerated).
+    """
+    game_map = sim.game_map; grid = game_map.grid
+    layers = {}; offset = 0
+    for name in TileGrid.LAYER_NAMES:
+        layer = getattr(grid, name)
+        layers[name] = {'dtype': layer.dtype.str, 'shape': list(layer.shape), 'offset': offset}
+        offset = _aligned(offset + layer.nbytes)
+
+    header = json.dumps(_snapshot(sim, layers), separators=(',', ':')).encode('utf-8')
+    data_start = _aligned(_PREFIX.size + len(header))
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_PREFIX.pack(SAVE_MAGIC, SAVE_VERSION, len(header)))
+        f.write(header)
+        for name in TileGrid.LAYER_NAMES:
+            layer = np.ascontiguousarray(getattr(grid, name)); start = data_start + layers[name]['offset']
+            if not game_map.lazy:
+                f.seek(start); layer.tofile(f)
+                continue
+            for x0, y0, x1, y1 in game_map.generated_windows():
+                for y in range(y0, y1):
+                    f.seek(start + (y * grid.width + x0) * layer.itemsize); f.write(layer[y, x0:x1].tobytes())
+        f.truncate(data_start + offset)
+    os.replace(temp_path, path)
+
+
+def _snapshot(sim, layers: dict) -> dict:
+    """Everything but the tile layers, as JSON-ready data. Object links become ['kind', index] refs."""
+    refs = {}
+    for kind, objects in (('building', sim.buildings), ('worker', sim.workers), ('enemy', sim.enemies)):
+        for index, obj in enumerate(objects): refs[id(obj)] = [kind, index]
+
+    def ref(obj):
+        if obj is None: return None
+        if isinstance(obj, tuple): return ['point', obj[0], obj[1]]
+        return refs.get(id(obj)) # None for objects no longer in the game (e.g. a destroyed target)
+
+    game_map = sim.game_map
+    params = sim.params
+    return {
+        'layers': layers,
+        'simulation': {
+            'seed': sim.seed, 'map_radius': sim.map_radius, 'timestep_ms': sim.timestep_ms,
+            'batched_units': sim.unit_store is not None,
+            'params': {'sim_speed': params.sim_speed, 'consumption': params.consumption,
+                       'respawn': params.respawn, 'monster_spawn': params.monster_spawn},
+            'applied_sim_speed': sim.applied_sim_speed, 'resources': sim.resources,
+            'population': sim.population, 'population_cap': sim.population_cap,
+            'game_time_ms': sim.game_time_ms, 'last_consumption_check_time': sim.last_consumption_check_time,
+            'last_enemy_spawn_time': sim.last_enemy_spawn_time, 'game_over': sim.game_over,
+            'town_hall': ref(sim.town_hall), 'random': sim.random.get_states()},
+        'map': {
+            'radius': game_map.radius, 'seed': game_map.seed, 'random': game_map.random.get_states(),
+            'lazy': game_map.lazy, 'generated': np.flatnonzero(game_map.generated).tolist() if game_map.lazy else None,
+            'respawn_rate_modifier': game_map.respawn_rate_modifier, 'game_time_ms': game_map.game_time_ms,
+            'respawns': [[x, y, due] for due, (x, y) in game_map.respawns.pending()]},
+        'buildings': [_building_state(b) for b in sim.buildings],
+        'workers': [_unit_state(sim, w, ref) for w in sim.workers],
+        'enemies': [_unit_state(sim, e, ref) for e in sim.enemies],
+    }
+
+
+def _building_state(building: Building) -> dict:
+    state = {'type': building.type, 'x': building.x, 'y': building.y, 'hp': building.hp, 'max_hp': building.max_hp}
+    if isinstance(building, TownHall): state['worker_spawn_timer'] = building.worker_spawn_timer
+    return state
+
+
+def _unit_state(sim, unit, ref) -> dict:
+    state = {'x': unit.x, 'y': unit.y, 'grid_x': unit.grid_x, 'grid_y': unit.grid_y, 'state': unit.state,
+             'hp': unit.hp, 'max_hp': unit.max_hp, 'speed': unit.speed,
+             'game_speed_modifier': unit.game_speed_modifier,
+             'path': unit.path, 'path_index': unit.path_index, 'path_goal': unit.path_goal,
+             'target': ref(unit.target),
+             'target_tile': [unit.target_tile.x, unit.target_tile.y] if unit.target_tile else None,
+             'asleep_since': sim.asleep.get(unit), 'wake_at': sim.wakeups.due_time(unit),
+             'lod_asleep': unit in sim.lod_sleepers}
+    if isinstance(unit, Worker):
+        state.update(resource_carried=unit.resource_carried, carry_amount=unit.carry_amount,
+                     gather_timer=unit.gather_timer, path_retry_timer=unit._path_retry_timer,
+                     cant_find_th_logged=unit._cant_find_th_logged, claim=sim.game_map.claims.amount(unit))
+    else:
+        state.update(damage=unit.damage, attack_rate=unit.attack_rate, attack_timer=unit.attack_timer,
+                     scan_timer=unit.scan_timer, target_object=ref(unit.target_object))
+    return state
+
+
+# --- Loading ---
+
+def read_save(path: str, mmap: bool = True) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Returns (header, tile layers) of a save. With mmap the layers are copy-on-write
+    memory maps: nothing is read until a page is touched, and changes stay in memory.
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size: raise SaveFormatError(f"{path}: truncated save file")
+        magic, version, header_length = _PREFIX.unpack(prefix)
+        if magic != SAVE_MAGIC: raise SaveFormatError(f"{path}: not a save file")
+        if version != SAVE_VERSION: raise SaveFormatError(f"{path}: unsupported save version {version}")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        data_start = _aligned(_PREFIX.size + header_length)
+        layers = {}
+        for name, info in header['layers'].items():
+            dtype = np.dtype(info['dtype']); shape = tuple(info['shape'])
+            if mmap:
+                layers[name] = np.asarray(np.memmap(path, dtype=dtype, mode='c', offset=data_start + info['offset'],
+                                                    shape=shape))
+            else:
+                f.seek(data_start + info['offset'])
+                layers[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+    return header, layers
+
+
+def load_game(path: str, mmap: bool = True):
+    """Loads a save into a new (headless) Simulation."""
+    from simulation import Simulation
+    sim = Simulation.__new__(Simulation)
+    restore(sim, path, mmap)
+    return sim
+
+
+def restore(sim, path: str, mmap: bool = True):
+    """Replaces the whole state of sim (a Simulation or Game) with the save at path."""
+    from simulation import SimulationParams
+    header, layers = read_save(path, mmap)
+    saved = header['simulation']
+    sim._init_state(saved['map_radius'], SimulationParams(**saved['params']), saved['timestep_ms'],
+                    saved['batched_units'], saved['seed'])
+    for name in ('applied_sim_speed', 'resources', 'population', 'population_cap', 'game_time_ms',
+                 'last_consumption_check_time', 'last_enemy_spawn_time', 'game_over'):
+        setattr(sim, name, saved[name])
+    sim.random.set_states(saved['random'])
+
+    # Map: layers as saved (buildings are already unwalkable in them), indexes rebuilt around them
+    saved_map = header['map']
+    grid = TileGrid.from_layers(layers)
+    buildings = [_make_building(state) for state in header['buildings']]
+    for building in buildings: grid.buildings[(building.x, building.y)] = building
+    generated = None
+    if saved_map.get('generated') is not None: # Lazy map: only these chunks exist yet
+        chunks = -(-grid.width // MAP_CHUNK_TILES)
+        generated = np.zeros(chunks * chunks, dtype=bool); generated[saved_map['generated']] = True
+        generated = generated.reshape(chunks, chunks)
+    game_map = GameMap(saved_map['radius'], seed=saved_map['seed'], grid=grid, lazy=saved_map.get('lazy', False),
+                       generated=generated)
+    game_map.random.set_states(saved_map['random'])
+    game_map.respawn_rate_modifier = saved_map['respawn_rate_modifier']
+    game_map.game_time_ms = saved_map['game_time_ms']
+    for x, y, due in saved_map['respawns']: game_map.respawns.schedule((x, y), due)
+    sim.game_map = game_map
+    sim.buildings = buildings
+    for building in buildings: game_map.building_grid.add(building, building.x, building.y)
+
+    # Units: create them all first, then resolve the links between them
+    sim.workers = [_make_unit(sim, sim.worker_class, state) for state in header['workers']]
+    sim.enemies = [_make_unit(sim, sim.enemy_class, state) for state in header['enemies']]
+    objects = {'building': sim.buildings, 'worker': sim.workers, 'enemy': sim.enemies}
+
+    def deref(ref):
+        if ref is None: return None
+        if ref[0] == 'point': return (ref[1], ref[2])
+        return objects[ref[0]][ref[1]]
+
+    for units, states in ((sim.workers, header['workers']), (sim.enemies, header['enemies'])):
+        for unit, state in zip(units, states):
+            unit.target = deref(state['target'])
+            if state['target_tile']: unit.target_tile = game_map.get_tile(*state['target_tile'])
+            if state.get('claim') and unit.target_tile: unit.claim_target(game_map, state['claim'])
+            if isinstance(unit, Enemy): unit.target_object = deref(state['target_object'])
+    sim.town_hall = deref(saved['town_hall'])
+
+
+def _make_building(state: dict) -> Building:
+    building = BUILDING_CLASSES[state['type']](state['x'], state['y'])
+    building.hp = state['hp']; building.max_hp = state['max_hp']
+    if 'worker_spawn_timer' in state: building.worker_spawn_timer = state['worker_spawn_timer']
+    return building
+
+
+def _make_unit(sim, unit_class, state: dict):
+    unit = unit_class(state['grid_x'], state['grid_y'], state['game_speed_modifier'])
+    unit.x = state['x']; unit.y = state['y']
+    unit.state = state['state']; unit.hp = state['hp']; unit.max_hp = state['max_hp']; unit.speed = state['speed']
+    unit.path = [tuple(step) for step in state['path']] if state['path'] is not None else None
+    unit.path_index = state['path_index']
+    unit.path_goal = tuple(state['path_goal']) if state['path_goal'] is not None else None
+    if isinstance(unit, Worker):
+        unit.resource_carried = state['resource_carried']; unit.carry_amount = state['carry_amount']
+        unit.gather_timer = state['gather_timer']; unit._path_retry_timer = state['path_retry_timer']
+        unit._cant_find_th_logged = state['cant_find_th_logged']
+    else:
+        unit.damage = state['damage']; unit.attack_rate = state['attack_rate']
+        unit.attack_timer = state['attack_timer']; unit.scan_timer = state['scan_timer']
+    sim._add_unit(unit)
+    if state['wake_at'] is not None:
+        sim.asleep[unit] = state['asleep_since']; sim.wakeups.schedule(unit, state['wake_at'])
+        if state.get('lod_asleep'): sim.lod_sleepers.add(unit)
+    return unit
\ No newline at end of file
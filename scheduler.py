@@ -0,0 +1,73 @@
+# scheduler.py
+# Events keyed on absolute game time, so each frame only touches what is actually due.
+import heapq
+import itertools
+
+
+class EventScheduler:
+    """
+    Min-heap of (due_ms, key) events keyed on absolute game time in milliseconds.
+
+    Each key has at most one pending event: scheduling it again replaces the old
+    due time and cancelling just forgets it. Replaced/cancelled heap entries are
+    left in place and skipped when they surface (lazy deletion), so both are O(log n)
+    or better.
+    """
+    def __init__(self):
+        self._heap: list[tuple[float, int, object]] = [] # (due_ms, tie-break counter, key)
+        self._due: dict[object, float] = {} # key -> due_ms of its live entry
+        self._counter = itertools.count() # Keeps equal due times in scheduling order
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, key) -> bool:
+        return key in self._due
+
+    def schedule(self, key, due_ms: float):
+        """Schedules (or reschedules) key to become due at game time due_ms."""
+        self._due[key] = due_ms
+        heapq.heappush(self._heap, (due_ms, next(self._counter), key))
+
+    def cancel(self, key) -> bool:
+        """Drops key's pending event. Returns True if there was one."""
+        return self._due.pop(key, None) is not None
+
+    def due_time(self, key) -> float | None:
+        """Game time at which key is due, or None if it is not scheduled."""
+        return self._due.get(key)
+
+    def pending(self) -> list[tuple[float, object]]:
+        """Every pending (due_ms, key), earliest first (e.g. for saving)."""
+        return sorted(((due, key) for key, due in self._due.items()), key=lambda event: event[0])
+
+    def next_due(self) -> float | None:
+        """Earliest pending due time, or None if nothing is scheduled."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now_ms: float) -> list:
+        """Removes and returns every key due at or before now_ms, earliest first."""
+        due_keys = []
+        heap = self._heap
+        while heap:
+            self._discard_stale()
+            if not heap or heap[0][0] > now_ms: break
+            _, _, key = heapq.heappop(heap)
+            del self._due[key]
+            due_keys.append(key)
+        return due_keys
+
+    def rescale(self, now_ms: float, factor: float):
+        """
+        Stretches the remaining time of every pending event by factor around now_ms
+        (e.g. when a rate slider changes). O(n), but only called on changes.
+        """
+        self._due = {key: now_ms + max(0.0, due - now_ms) * factor for key, due in self._due.items()}
+        self._heap = [(due, next(self._counter), key) for key, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
\ No newline at end of file
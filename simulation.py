@@ -0,0 +1,415 @@
+# simulation.py
+# Headless game core: world state and rules, advanced at a fixed timestep. No pygame needed.
+# Usage: python simulation.py [--minutes 60] [--radius 50] [--seed 1234] [--timestep 50] [--batched]
+#                            [--load world.civsave] [--save world.civsave] [--profile] [--path-budget 2] [--lod]
+import argparse
+import itertools
+import math
+import time
+from constants import * # Import constants
+from map import GameMap
+from building import Building, TownHall, House
+from unit import Worker, Enemy, ENEMY_SCAN_RADIUS_TILES
+from unit_store import UnitStore, stored_class
+from scheduler import EventScheduler
+from random_streams import RandomStreams, new_seed
+from profiler import FrameProfiler
+import savegame
+
+
+class SimulationParams:
+    """The tunables exposed as UI sliders, as plain values (all multipliers, 1.0 = default)."""
+    def __init__(self, sim_speed: float = 1.0, consumption: float = 1.0, respawn: float = 1.0,
+                 monster_spawn: float = 1.0):
+        self.sim_speed = sim_speed # Unit movement multiplier (the interactive game also scales time by it)
+        self.consumption = consumption # Food/Water consumption rate
+        self.respawn = respawn # Resource respawn rate
+        self.monster_spawn = monster_spawn # Enemy spawn rate
+
+    def __repr__(self):
+        return (f"SimulationParams(sim_speed={self.sim_speed}, consumption={self.consumption}, "
+                f"respawn={self.respawn}, monster_spawn={self.monster_spawn})")
+
+
+class Simulation:
+    """
+    The game world and its rules, without any display.
+    Game wraps this with a window, input and drawing; batch runs use it directly
+    and call step() / run() to advance at a fixed timestep as fast as the CPU allows.
+    With batched_units, units keep their positions, speeds, HP and states in a NumPy
+    UnitStore and all movement of a step runs as one vectorized pass.
+    All randomness comes from per-subsystem streams of seed (random if not given), so the
+    same seed, parameters and timestep reproduce a run exactly.
+    profiler times the phases of each step (and counts path searches) once enabled;
+    run() ends one profiler frame per step.
+    With path_budget_ms, workers queue their path searches and each step runs queued
+    searches for at most that much wall time, so bursts of idle workers are spread over
+    several steps (the game runs them once per frame instead, see paths_each_step). Runs then depend on machine speed; without it (the default) every
+    path is planned on the spot and runs stay reproducible.
+    With lod (level of detail), workers walking far from the view (lod_view, set by the game)
+    and from every enemy are updated only every LOD_UPDATE_INTERVAL_MS, each update walking
+    the whole time; they get every update again before they arrive or once either comes
+    close. Enemies always get every update. Not used with batched_units (the UnitStore moves
+    every unit by the same timestep).
+    """
+    paths_each_step = True # Run queued path searches at the start of every step (Game: once per frame)
+
+    def __init__(self, map_radius: int = DEFAULT_MAP_RADIUS, params: SimulationParams | None = None,
+                 timestep_ms: float = SIM_TIMESTEP_MS, batched_units: bool = False, seed: int | None = None,
+                 path_budget_ms: float | None = None, lod: bool = False):
+        self.path_budget_ms = path_budget_ms; self.lod = lod
+        self._init_state(map_radius, params, timestep_ms, batched_units, seed)
+        print(f"Initializing Game with map radius: {self.map_radius}")
+        self.game_map = GameMap(self.map_radius, seed=self.seed)
+        self.town_hall = self._spawn_initial_town_hall()
+        self.population = len(self.workers) # Correct initial population
+
+    def _init_state(self, map_radius: int, params: SimulationParams | None, timestep_ms: float,
+                    batched_units: bool, seed: int | None):
+        """Sets up everything except the map and the starting objects (shared with savegame.restore)."""
+        self.seed = seed if seed is not None else new_seed()
+        self.random = RandomStreams(self.seed) # Unit spawning; the map has its own streams of the same seed
+        self.params = params or SimulationParams()
+        self.applied_sim_speed = self.params.sim_speed # Speed modifier the units currently have
+        self.timestep_ms = timestep_ms
+        self.resources = INITIAL_RESOURCES.copy()
+        self.population = 0
+        self.population_cap = INITIAL_POPULATION_CAP
+        self.game_time_ms = 0
+        self.last_consumption_check_time = 0
+        self.last_enemy_spawn_time = 0
+        self.game_over = False # Set when the Town Hall is destroyed
+
+        self.map_radius = map_radius
+        self.game_map: GameMap | None = None
+        self.town_hall: TownHall | None = None
+        self.buildings: list[Building] = []
+        self.workers: list[Worker] = []
+        self.enemies: list[Enemy] = []
+        self.unit_store = UnitStore() if batched_units else None
+        self.worker_class = stored_class(Worker) if batched_units else Worker
+        self.enemy_class = stored_class(Enemy) if batched_units else Enemy
+        # Units only counting down a timer sleep until it runs out (see Worker/Enemy.wait_time_ms)
+        self.wakeups = EventScheduler() # Sleeping unit -> game time it needs its next update
+        self.asleep: dict[Worker | Enemy, float] = {} # Sleeping unit -> game time of its last update
+        if not hasattr(self, 'path_budget_ms'): self.path_budget_ms = None # A loaded save plans paths on the spot
+        if not hasattr(self, 'lod'): self.lod = False # ... and updates every unit every step
+        self.lod_view: tuple[int, int, int, int] | None = None # Tiles (x0, y0, x1, y1) on screen, kept at full detail
+        self.lod_sleepers: set[Worker] = set() # Asleep units that only sleep for level of detail
+        self._lod_hot: tuple[tuple, set[tuple[int, int]]] = ((), set()) # (view, enemy buckets) -> hot buckets
+        if getattr(self, 'profiler', None) is None: # Kept (with its settings) when a save is restored into this object
+            self.profiler = FrameProfiler()
+            self.profiler.track(lambda: self.game_map.search_stats() if self.game_map else {})
+
+    def _spawn_initial_town_hall(self) -> TownHall:
+        """Finds a suitable location and spawns the starting Town Hall and worker."""
+        print("Attempting to spawn initial Town Hall...")
+        start_tile = self.game_map.get_random_walkable_tile()
+        if not start_tile: raise RuntimeError("CRITICAL ERROR: No valid starting tile found!")
+
+        town_hall = TownHall(start_tile.x, start_tile.y)
+        if not start_tile.set_building(town_hall):
+            raise RuntimeError("CRITICAL ERROR: Failed to place TH on selected tile!")
+        self.buildings.append(town_hall); self.game_map.building_grid.add(town_hall, town_hall.x, town_hall.y)
+        print(f"Spawned Town Hall at ({start_tile.x}, {start_tile.y})")
+        if not self.try_spawn_worker(town_hall, self.params.sim_speed):
+             print("Warning: Could not spawn initial worker.")
+        return town_hall
+
+    def try_spawn_worker(self, town_hall: TownHall, current_sim_speed: float) -> bool:
+        """Attempts to spawn a worker near the town hall."""
+        if self.population >= self.population_cap: return False
+
+        spawn_tile = None
+        for r in range(1, 4):
+            possible_spawns = []
+            for dx in range(-r, r + 1):
+                for dy in range(-r, r + 1):
+                     if abs(dx) != r and abs(dy) != r: continue
+                     check_x, check_y = town_hall.x + dx, town_hall.y + dy
+                     tile = self.game_map.get_tile(check_x, check_y)
+                     if tile and tile.walkable and tile.building is None and tile.resource_type == RESOURCE_NONE:
+                         if not self.game_map.unit_grid.occupied(check_x, check_y): possible_spawns.append(tile)
+            if possible_spawns:
+                spawn_tile = self.random.stream('workers').choice(possible_spawns); break
+
+        if spawn_tile:
+            new_worker = self.worker_class(spawn_tile.x, spawn_tile.y, current_sim_speed)
+            self._add_unit(new_worker)
+            self.workers.append(new_worker); self.population += 1
+            return True
+        return False
+
+    def _add_unit(self, unit: Worker | Enemy):
+        unit.attach_to(self.game_map.unit_grid)
+        if self.unit_store is not None: unit.attach_store(self.unit_store)
+
+    def step(self, dt_ms_simulated: float | None = None):
+        """Advances the game by one timestep (default: the fixed timestep) of game time."""
+        if dt_ms_simulated is None: dt_ms_simulated = self.timestep_ms
+        self.game_time_ms += dt_ms_simulated
+        if self.params.sim_speed != self.applied_sim_speed: # New units are created with the current speed
+            if self.unit_store is not None: self.unit_store.set_speed_modifier(self.params.sim_speed)
+            else:
+                for unit in self.workers + self.enemies: unit.set_speed_modifier(self.params.sim_speed)
+            self.applied_sim_speed = self.params.sim_speed
+        self.update(dt_ms_simulated / 1000.0, dt_ms_simulated)
+
+    def run(self, duration_ms: float) -> dict:
+        """Steps at the fixed timestep for duration_ms of game time (or until game over). Returns summary()."""
+        end_time = self.game_time_ms + duration_ms
+        while self.game_time_ms < end_time and not self.game_over:
+            self.step(); self.profiler.end_frame()
+        return self.summary()
+
+    def process_path_requests(self):
+        """Runs queued path searches for at most path_budget_ms of wall time."""
+        with self.profiler.phase('paths'): self.game_map.process_path_requests(self.path_budget_ms)
+
+    def update(self, dt_simulated: float, dt_ms_simulated: float):
+        """Updates game state."""
+        params = self.params
+        current_sim_speed = params.sim_speed
+        profiler = self.profiler
+
+        # --- Updates ---
+        # Queued path searches, under the time budget (workers pick up the results below)
+        if self.path_budget_ms is not None and self.paths_each_step: self.process_path_requests()
+
+        # Town Hall Spawning
+        with profiler.phase('buildings'):
+            for building in self.buildings:
+                if isinstance(building, TownHall):
+                    building.worker_spawn_timer -= dt_ms_simulated
+                    if building.worker_spawn_timer <= 0:
+                        self.try_spawn_worker(building, current_sim_speed)
+                        building.worker_spawn_timer = WORKER_SPAWN_TIME
+
+        # Wake units whose timer ran out; their next update covers all the time they slept
+        woken = {unit: self.game_time_ms - self.asleep.pop(unit) for unit in self.wakeups.pop_due(self.game_time_ms)}
+        asleep = self.asleep
+        if self.lod_sleepers: self.lod_sleepers.difference_update(woken)
+
+        # Worker Updates
+        with profiler.phase('workers'):
+            hot = None
+            if self.lod and self.unit_store is None:
+                hot = self._lod_hot_buckets(); self._wake_lod_sleepers(hot, woken)
+                profiler.count('lod asleep', len(self.lod_sleepers))
+            for worker in self.workers:
+                if worker in asleep: continue
+                dt = dt_simulated if worker not in woken else woken[worker] / 1000.0
+                worker.update(dt, self.game_map, self.buildings, self.resources, self.population)
+                self._sleep_if_waiting(worker, hot)
+
+        # Resource Consumption
+        if self.game_time_ms - self.last_consumption_check_time >= 1000:
+            time_passed = (self.game_time_ms - self.last_consumption_check_time) / 1000.0
+            food_need = self.population * FOOD_CONSUMPTION_RATE_BASE * params.consumption * time_passed
+            water_need = self.population * WATER_CONSUMPTION_RATE_BASE * params.consumption * time_passed
+            self.resources['Food'] = max(0, self.resources['Food'] - food_need)
+            self.resources['Water'] = max(0, self.resources['Water'] - water_need)
+            self.last_consumption_check_time = self.game_time_ms
+
+        # Resource Respawns
+        with profiler.phase('respawns'): self.game_map.update_respawns(self.game_time_ms, params.respawn)
+
+        with profiler.phase('enemies'):
+            # Enemy Spawning
+            time_since_spawn = self.game_time_ms - self.last_enemy_spawn_time
+            spawn_interval = ENEMY_SPAWN_TIME_BASE / max(0.01, params.monster_spawn)
+            if time_since_spawn >= spawn_interval:
+                 self.spawn_enemy(current_sim_speed)
+                 self.last_enemy_spawn_time = self.game_time_ms
+
+            # Enemy Updates (targets are looked up in the map's unit/building grids)
+            for enemy in self.enemies:
+                if enemy in asleep: continue
+                enemy.update(dt_simulated if enemy not in woken else woken[enemy] / 1000.0, self.game_map)
+                self._sleep_if_waiting(enemy)
+
+        # Batched movement: carry out the move_towards orders given above
+        if self.unit_store is not None:
+            with profiler.phase('movement'): self.unit_store.step(dt_simulated)
+
+        # Cleanup Dead Entities
+        with profiler.phase('cleanup'): self.cleanup_entities()
+
+    def _sleep_if_waiting(self, unit: Worker | Enemy, hot: set[tuple[int, int]] | None = None):
+        """
+        Puts a unit that is only waiting on a timer to sleep until the timer runs out. Given
+        the level-of-detail hot buckets, a unit walking outside them sleeps too, for up to
+        LOD_UPDATE_INTERVAL_MS but not into the last step before it arrives.
+        """
+        wait_ms = unit.wait_time_ms()
+        if wait_ms <= 0 and hot is not None:
+            size = self.game_map.unit_grid.bucket_size
+            if (unit.grid_x // size, unit.grid_y // size) in hot: return
+            wait_ms = min(LOD_UPDATE_INTERVAL_MS, unit.walk_time_ms() - self.timestep_ms)
+            if wait_ms <= self.timestep_ms: return # Nothing to gain
+            self.lod_sleepers.add(unit)
+        if wait_ms > 0:
+            self.asleep[unit] = self.game_time_ms; self.wakeups.schedule(unit, self.game_time_ms + wait_ms)
+
+    def _lod_hot_buckets(self) -> set[tuple[int, int]]:
+        """
+        UnitGrid buckets whose workers get every update: those around the view and within
+        reach of an enemy's scan, both widened by LOD_MARGIN_TILES. Only rebuilt when the
+        view moves or an enemy enters another bucket.
+        """
+        size = self.game_map.unit_grid.bucket_size; margin = LOD_MARGIN_TILES
+        key = (self.lod_view, frozenset((enemy.grid_x // size, enemy.grid_y // size) for enemy in self.enemies))
+        if key == self._lod_hot[0]: return self._lod_hot[1]
+        areas = []
+        if self.lod_view is not None:
+            x0, y0, x1, y1 = self.lod_view; areas.append((x0 - margin, y0 - margin, x1 + margin, y1 + margin))
+        reach = ENEMY_SCAN_RADIUS_TILES + margin
+        for bx, by in key[1]: # One area per bucket holding enemies
+            areas.append((bx * size - reach, by * size - reach, bx * size + size - 1 + reach, by * size + size - 1 + reach))
+        hot = set()
+        for x0, y0, x1, y1 in areas:
+            hot.update(itertools.product(range(x0 // size, x1 // size + 1), range(y0 // size, y1 // size + 1)))
+        self._lod_hot = (key, hot)
+        return hot
+
+    def _wake_lod_sleepers(self, hot: set[tuple[int, int]], woken: dict):
+        """Wakes units sleeping for level of detail that are now in a hot bucket (adding them to woken)."""
+        if not self.lod_sleepers: return
+        for key, bucket in self.game_map.unit_grid.buckets.get(UNIT_WORKER, {}).items():
+            if key not in hot: continue
+            for unit in bucket:
+                if unit in self.lod_sleepers:
+                    self.lod_sleepers.discard(unit); self.wakeups.cancel(unit)
+                    woken[unit] = self.game_time_ms - self.asleep.pop(unit)
+
+    def cleanup_entities(self):
+        """Removes dead units/buildings and updates state."""
+        if self.unit_store is not None: dead = self.unit_store.dead_units() # One array check instead of a loop
+        else: dead = [unit for unit in self.workers + self.enemies if unit.hp <= 0]
+        if dead:
+            for unit in dead:
+                unit.detach(); self.wakeups.cancel(unit); self.asleep.pop(unit, None); self.lod_sleepers.discard(unit)
+                self.game_map.claims.release(unit)
+            self.workers = [w for w in self.workers if w.hp > 0]
+            self.enemies = [e for e in self.enemies if e.hp > 0]
+        destroyed = [b for b in self.buildings if b.hp <= 0]
+        self.buildings = [b for b in self.buildings if b.hp > 0]
+
+        self.population = len(self.workers) # Recalculate population
+
+        pop_cap_loss = 0
+        for b in destroyed:
+            tile = self.game_map.get_tile(b.x, b.y)
+            if tile: tile.remove_building()
+            self.game_map.building_grid.remove(b, b.x, b.y)
+            if b.type == BUILDING_HOUSE: pop_cap_loss += HOUSE_POP_BONUS
+            elif b.type == BUILDING_TOWNHALL: self.game_over = True
+
+        if pop_cap_loss > 0:
+            self.population_cap = max(INITIAL_POPULATION_CAP, self.population_cap - pop_cap_loss)
+
+    def spawn_enemy(self, current_sim_speed: float):
+        """Spawns an enemy near map edge (on lazy maps, near the edge of the start area instead)."""
+        attempts = 0; max_attempts = 50
+        center_x, center_y = self.game_map.radius, self.game_map.radius
+        spawn_radius = min(self.map_radius, MAP_LAZY_ENEMY_SPAWN_RADIUS) if self.game_map.lazy else self.map_radius
+        rng = self.random.stream('enemies')
+        while attempts < max_attempts:
+            angle = rng.uniform(0, 2 * math.pi)
+            dist = spawn_radius * rng.uniform(0.80, 0.98)
+            sx = int(center_x + dist * math.cos(angle))
+            sy = int(center_y + dist * math.sin(angle))
+            sx = max(0, min(self.game_map.diameter - 1, sx))
+            sy = max(0, min(self.game_map.diameter - 1, sy))
+            tile = self.game_map.get_tile(sx, sy)
+            if tile and tile.walkable and tile.building is None and tile.resource_type == RESOURCE_NONE:
+                if not self.game_map.unit_grid.occupied(sx, sy):
+                    enemy = self.enemy_class(sx, sy, current_sim_speed); self._add_unit(enemy)
+                    self.enemies.append(enemy); return
+            attempts += 1
+
+    def can_place_building(self, grid_x: int | None, grid_y: int | None, building_type: int | None) -> bool:
+        """Checks if building placement is valid."""
+        if grid_x is None or grid_y is None or building_type is None: return False
+        tile = self.game_map.get_tile(grid_x, grid_y)
+        if not tile or tile.terrain_type != TERRAIN_GROUND or not tile.walkable: return False
+        if self.game_map.unit_grid.occupied(grid_x, grid_y): return False # Don't wall a unit in
+        cost = BUILDING_COSTS.get(building_type, {})
+        if not all(self.resources.get(res, 0) >= amount for res, amount in cost.items()): return False
+        return True
+
+    def place_building(self, grid_x: int, grid_y: int, building_type: int) -> bool:
+        """Places building, deducts cost, updates state. Returns True on success."""
+        if not self.can_place_building(grid_x, grid_y, building_type): return False
+        tile = self.game_map.get_tile(grid_x, grid_y)
+        if not tile: return False
+
+        cost = BUILDING_COSTS.get(building_type, {}); new_building: Building | None = None # Use base type hint
+        for res, amount in cost.items(): self.resources[res] -= amount
+
+        if building_type == BUILDING_HOUSE: new_building = House(grid_x, grid_y)
+        # Add elif for other types...
+
+        if new_building and tile.set_building(new_building):
+            self.buildings.append(new_building); self.game_map.building_grid.add(new_building, grid_x, grid_y)
+            print(f"Placed {BUILDING_NAMES.get(building_type, 'Building')} at ({grid_x},{grid_y}).")
+            if building_type == BUILDING_HOUSE:
+                self.population_cap += HOUSE_POP_BONUS
+                print(f"Pop Cap: {self.population_cap}")
+            return True
+        else: # Placement failed or unknown type
+            for res, amount in cost.items(): self.resources[res] += amount # Refund
+            if not new_building: print(f"ERROR: Unknown building type {building_type}.")
+            else: print("CRITICAL ERROR: Failed tile.set_building after validation!")
+            return False
+
+    def summary(self) -> dict:
+        """Plain-data snapshot of the headline numbers, e.g. for batch balancing runs."""
+        return {'game_time_ms': self.game_time_ms, 'game_over': self.game_over,
+                'population': self.population, 'population_cap': self.population_cap,
+                'enemies': len(self.enemies), 'buildings': len(self.buildings),
+                'resources': {name: round(amount, 2) for name, amount in self.resources.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Civ Sim headless at a fixed timestep")
+    parser.add_argument('--minutes', type=float, default=60, help="Game time to simulate")
+    parser.add_argument('--radius', type=int, default=DEFAULT_MAP_RADIUS, help="Map radius")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--timestep', type=float, default=SIM_TIMESTEP_MS, help="Fixed timestep (ms)")
+    parser.add_argument('--batched', action='store_true', help="Keep units in a NumPy UnitStore")
+    parser.add_argument('--load', metavar='PATH', help="Resume a saved game (map, parameters and seed come from it)")
+    parser.add_argument('--save', metavar='PATH', help="Save the game when the run ends")
+    parser.add_argument('--profile', action='store_true', help="Print per-phase step timings at the end")
+    parser.add_argument('--path-budget', type=float, default=None, metavar='MS',
+                        help="Queue path searches and run at most MS of them per step (not reproducible)")
+    parser.add_argument('--lod', action='store_true', help="Update workers walking far from enemies less often")
+    for name in ('sim_speed', 'consumption', 'respawn', 'monster_spawn'):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=1.0, dest=name,
+                            help=f"{name.replace('_', ' ').capitalize()} multiplier")
+    args = parser.parse_args()
+
+    if args.load:
+        start = time.perf_counter()
+        sim = savegame.load_game(args.load)
+        sim.path_budget_ms = args.path_budget; sim.lod = args.lod
+        print(f"Loaded {args.load} in {time.perf_counter() - start:.3f} s")
+    else:
+        params = SimulationParams(args.sim_speed, args.consumption, args.respawn, args.monster_spawn)
+        sim = Simulation(args.radius, params, args.timestep, args.batched, args.seed, args.path_budget, args.lod)
+    sim.profiler.enabled = args.profile
+    start_time_ms = sim.game_time_ms
+    start = time.perf_counter()
+    summary = sim.run(args.minutes * 60 * 1000)
+    elapsed = time.perf_counter() - start
+    simulated_minutes = (sim.game_time_ms - start_time_ms) / 60000
+    print(f"Seed: {sim.seed}")
+    print(summary)
+    if args.profile: print("\n".join(sim.profiler.report()))
+    if args.save: savegame.save_game(sim, args.save); print(f"Saved to {args.save}")
+    print(f"Simulated {simulated_minutes:.1f} min in {elapsed:.1f} s "
+          f"({simulated_minutes / max(elapsed / 60, 1e-9):.0f} simulated min per wall-clock min)")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
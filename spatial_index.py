@@ -0,0 +1,251 @@
+# spatial_index.py
+# Spatial indexes that answer "what is near (x, y)?" without flood-filling the map.
+import numpy as np
+from constants import * # Import constants
+from tile import TileGrid, TILE_CHANGE_RESOURCE
+
+RESOURCE_BUCKET_SIZE = 8 # Side length (in tiles) of one ResourceIndex bucket
+
+
+class ResourceIndex:
+    """Per-resource-type index of resource tiles, bucketed on a coarse grid.
+
+    Each resource type maps (bucket_x, bucket_y) -> set of (x, y) tiles that
+    currently hold that resource. The index listens to its TileGrid and is
+    updated incrementally whenever a tile's resource changes, so a nearest
+    query only looks at the buckets around the start position.
+    """
+    def __init__(self, grid: TileGrid, bucket_size: int = RESOURCE_BUCKET_SIZE,
+                 areas: list[tuple[int, int, int, int]] | None = None):
+        """areas: the (x0, y0, x1, y1) windows to index, if not the whole grid (a partly generated lazy map)."""
+        self.grid = grid
+        self.bucket_size = bucket_size
+        self.buckets: dict[int, dict[tuple[int, int], set[tuple[int, int]]]] = {}
+        self._indexed_type: dict[tuple[int, int], int] = {} # (x, y) -> resource type currently indexed
+        self.rebuild(areas)
+        grid.add_listener(self)
+
+    def rebuild(self, areas: list[tuple[int, int, int, int]] | None = None):
+        """Re-indexes every resource tile in the grid, or in areas (used after bulk edits like map generation)."""
+        self.buckets = {res_type: {} for res_type in RESOURCE_BASE_AMOUNT}
+        self._indexed_type.clear()
+        if areas is not None:
+            for area in areas: self.area_generated(*area)
+            return
+        has_resource = (self.grid.resource_type != RESOURCE_NONE) & (self.grid.resource_amount > 0)
+        ys, xs = np.nonzero(has_resource)
+        for x, y, res_type in zip(xs.tolist(), ys.tolist(), self.grid.resource_type[ys, xs].tolist()):
+            self._add(x, y, res_type)
+
+    def count(self, resource_type: int) -> int:
+        """Number of tiles currently holding the given resource."""
+        return sum(len(cell) for cell in self.buckets.get(resource_type, {}).values())
+
+    def tile_changed(self, x: int, y: int, change: int):
+        """TileGrid listener: keeps the tile's bucket membership in sync with its resource."""
+        if not change & TILE_CHANGE_RESOURCE: return
+        new_type = int(self.grid.resource_type[y, x])
+        if self.grid.resource_amount[y, x] <= 0: new_type = RESOURCE_NONE
+        old_type = self._indexed_type.get((x, y), RESOURCE_NONE)
+        if new_type == old_type: return
+        if old_type != RESOURCE_NONE: self._remove(x, y, old_type)
+        if new_type != RESOURCE_NONE: self._add(x, y, new_type)
+
+    def area_generated(self, x0: int, y0: int, x1: int, y1: int):
+        """TileGrid listener: indexes the resource tiles of a freshly generated window."""
+        resource_type = self.grid.resource_type[y0:y1, x0:x1]
+        ys, xs = np.nonzero((resource_type != RESOURCE_NONE) & (self.grid.resource_amount[y0:y1, x0:x1] > 0))
+        for x, y, res_type in zip(xs.tolist(), ys.tolist(), resource_type[ys, xs].tolist()):
+            self._add(x0 + x, y0 + y, res_type)
+
+    def _add(self, x: int, y: int, resource_type: int):
+        buckets = self.buckets.setdefault(resource_type, {})
+        key = (x // self.bucket_size, y // self.bucket_size)
+        buckets.setdefault(key, set()).add((x, y))
+        self._indexed_type[(x, y)] = resource_type
+
+    def _remove(self, x: int, y: int, resource_type: int):
+        buckets = self.buckets.get(resource_type, {})
+        key = (x // self.bucket_size, y // self.bucket_size)
+        cell = buckets.get(key)
+        if cell:
+            cell.discard((x, y))
+            if not cell: del buckets[key]
+        self._indexed_type.pop((x, y), None)
+
+    def nearest(self, x: int, y: int, resource_type: int, max_distance: int,
+                accept=None) -> tuple[int, int] | None:
+        """
+        Returns the (x, y) of the closest tile holding resource_type whose Manhattan
+        distance from (x, y) is below max_distance, or None. Ties go to the lowest
+        (y, x). accept(tx, ty), if given, can reject candidates (e.g. unreachable ones).
+        Buckets are visited in rings around the start and the search stops as soon
+        as no unvisited ring can hold anything closer than the best match.
+        """
+        buckets = self.buckets.get(resource_type)
+        if not buckets: return None
+        size = self.bucket_size
+        start_bx, start_by = x // size, y // size
+        max_ring = (max_distance - 1) // size + 1
+        best_key = None
+
+        for ring in range(max_ring + 1):
+            # Every tile in this ring is at least this far away
+            ring_min_distance = (ring - 1) * size + 1 if ring > 0 else 0
+            if best_key is not None and ring_min_distance > best_key[0]: break
+            for key in self._ring_keys(start_bx, start_by, ring):
+                cell = buckets.get(key)
+                if not cell: continue
+                for tx, ty in cell:
+                    distance = abs(tx - x) + abs(ty - y)
+                    if distance >= max_distance: continue
+                    candidate = (distance, ty, tx)
+                    if (best_key is None or candidate < best_key) and (accept is None or accept(tx, ty)):
+                        best_key = candidate
+
+        if best_key is None: return None
+        return best_key[2], best_key[1]
+
+    @staticmethod
+    def _ring_keys(center_x: int, center_y: int, ring: int):
+        """Yields the bucket keys on the square ring at Chebyshev distance 'ring' from the center."""
+        if ring == 0:
+            yield center_x, center_y
+            return
+        for bx in range(center_x - ring, center_x + ring + 1):
+            yield bx, center_y - ring
+            yield bx, center_y + ring
+        for by in range(center_y - ring + 1, center_y + ring):
+            yield center_x - ring, by
+            yield center_x + ring, by
+
+class ResourceClaims:
+    """Amounts of tile resources promised to workers on their way to gather them.
+
+    Each owner (a worker) holds at most one claim: a tile and the amount it still
+    expects to gather there. Gathering uses the claim up; giving up the target
+    releases it. Nearest-resource queries skip tiles whose claims already cover
+    everything left on them, so workers spread over nearby tiles instead of all
+    walking to the same one.
+    """
+    def __init__(self):
+        self.claimed: dict[tuple[int, int], int] = {} # (x, y) -> total amount claimed on the tile
+        self.owners: dict[object, tuple[int, int, int]] = {} # owner -> (x, y, amount)
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def claim(self, owner, x: int, y: int, amount: int):
+        """Promises amount of tile (x, y)'s resource to owner, replacing the owner's previous claim."""
+        self.release(owner)
+        if amount <= 0: return
+        self.owners[owner] = (x, y, amount)
+        self.claimed[(x, y)] = self.claimed.get((x, y), 0) + amount
+
+    def consume(self, owner, amount: int):
+        """owner gathered amount from its claimed tile: that much is no longer outstanding."""
+        claim = self.owners.get(owner)
+        if claim is None: return
+        x, y, claimed = claim
+        self.release(owner)
+        if claimed > amount: self.claim(owner, x, y, claimed - amount)
+
+    def release(self, owner):
+        """Drops owner's claim, if it has one."""
+        claim = self.owners.pop(owner, None)
+        if claim is None: return
+        x, y, amount = claim
+        left = self.claimed[(x, y)] - amount
+        if left > 0: self.claimed[(x, y)] = left
+        else: del self.claimed[(x, y)]
+
+    def amount(self, owner) -> int:
+        """Amount still claimed by owner (0 without a claim)."""
+        claim = self.owners.get(owner)
+        return claim[2] if claim else 0
+
+    def claimed_at(self, x: int, y: int) -> int:
+        """Total amount claimed on tile (x, y)."""
+        return self.claimed.get((x, y), 0)
+
+UNIT_BUCKET_SIZE = 8 # Side length (in tiles) of one UnitGrid bucket
+
+
+class UnitGrid:
+    """Spatial hash of movable or placed objects (units, buildings) by tile.
+
+    Objects are registered with their tile and must report tile changes through
+    move() (Unit.update_grid_pos does this). Buckets are kept separately per
+    object type (obj.type), so a query for workers never walks past enemies.
+    Per-tile counts make occupancy checks O(1), and radius queries only visit the
+    buckets the circle overlaps. Buckets are insertion-ordered dicts, so queries
+    are deterministic.
+    """
+    def __init__(self, bucket_size: int = UNIT_BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets: dict[int, dict[tuple[int, int], dict]] = {} # type -> (bucket_x, bucket_y) -> {object: None}
+        self.tile_counts: dict[tuple[int, int], int] = {} # (x, y) -> number of objects on the tile
+        self.on_bucket_entered = None # Optional callback(x, y) when an object is added or enters a new bucket
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for buckets in self.buckets.values() for bucket in buckets.values())
+
+    def add(self, obj, x: int, y: int):
+        key = (x // self.bucket_size, y // self.bucket_size)
+        self.buckets.setdefault(obj.type, {}).setdefault(key, {})[obj] = None
+        self.tile_counts[(x, y)] = self.tile_counts.get((x, y), 0) + 1
+        if self.on_bucket_entered is not None: self.on_bucket_entered(x, y)
+
+    def remove(self, obj, x: int, y: int):
+        buckets = self.buckets.get(obj.type, {})
+        key = (x // self.bucket_size, y // self.bucket_size)
+        bucket = buckets.get(key)
+        if bucket is None or obj not in bucket: return
+        del bucket[obj]
+        if not bucket: del buckets[key]
+        self._uncount(x, y)
+
+    def move(self, obj, old_x: int, old_y: int, new_x: int, new_y: int):
+        """Updates the object's tile. Cheap when it stays within its bucket."""
+        size = self.bucket_size
+        old_key = (old_x // size, old_y // size); new_key = (new_x // size, new_y // size)
+        if old_key != new_key:
+            buckets = self.buckets[obj.type]
+            bucket = buckets[old_key]
+            del bucket[obj]
+            if not bucket: del buckets[old_key]
+            buckets.setdefault(new_key, {})[obj] = None
+            if self.on_bucket_entered is not None: self.on_bucket_entered(new_x, new_y)
+        self._uncount(old_x, old_y)
+        self.tile_counts[(new_x, new_y)] = self.tile_counts.get((new_x, new_y), 0) + 1
+
+    def _uncount(self, x: int, y: int):
+        count = self.tile_counts[(x, y)] - 1
+        if count: self.tile_counts[(x, y)] = count
+        else: del self.tile_counts[(x, y)]
+
+    def occupied(self, x: int, y: int) -> bool:
+        """True if any object is on tile (x, y)."""
+        return (x, y) in self.tile_counts
+
+    def query(self, x: int, y: int, radius: int, obj_type: int | None = None) -> list:
+        """
+        Returns the objects (of obj_type, or of any type) in every bucket within
+        'radius' tiles of (x, y). Callers check the exact distance.
+        """
+        size = self.bucket_size
+        min_bx, max_bx = (x - radius) // size, (x + radius) // size
+        min_by, max_by = (y - radius) // size, (y + radius) // size
+        type_buckets = [self.buckets.get(obj_type, {})] if obj_type is not None else list(self.buckets.values())
+        found = []
+        for buckets in type_buckets:
+            if len(buckets) < (max_bx - min_bx + 1) * (max_by - min_by + 1):
+                # Fewer occupied buckets than the query covers: filter them instead of probing every key
+                for (bx, by), bucket in buckets.items():
+                    if min_bx <= bx <= max_bx and min_by <= by <= max_by: found.extend(bucket)
+            else:
+                for by in range(min_by, max_by + 1):
+                    for bx in range(min_bx, max_bx + 1):
+                        bucket = buckets.get((bx, by))
+                        if bucket: found.extend(bucket)
+        return found
\ No newline at end of file
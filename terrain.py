@@ -0,0 +1,206 @@
+# terrain.py
+# Procedural terrain generation: noise fields and terrain/biome classification.
+# Two implementations are kept side by side:
+#   * the original per-cell loop (noise.pnoise2 + Python if/else), used as the reference
+#   * a NumPy port that computes whole fields at once and produces identical output
+import math
+import random
+import noise # Perlin noise (reference implementation)
+import numpy as np
+from constants import * # Import constants
+
+# Permutation table used by the 'noise' C extension (Ken Perlin's reference table, doubled)
+_PERM_BASE = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140, 36, 103, 30,
+    69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148, 247, 120, 234, 75, 0, 26, 197, 62, 94,
+    252, 219, 203, 117, 35, 11, 32, 57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171,
+    168, 68, 175, 74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122, 60,
+    211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54, 65, 25, 63, 161, 1,
+    216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169, 200, 196, 135, 130, 116, 188, 159, 86,
+    164, 100, 109, 198, 173, 186, 3, 64, 52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118,
+    126, 255, 82, 85, 212, 207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170,
+    213, 119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9, 129, 22, 39,
+    253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104, 218, 246, 97, 228, 251, 34,
+    242, 193, 238, 210, 144, 12, 191, 179, 162, 241, 81, 51, 145, 235, 249, 14, 239, 107, 49,
+    192, 214, 31, 181, 199, 106, 157, 184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254,
+    138, 236, 205, 93, 222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+]
+_PERM = np.array(_PERM_BASE * 2, dtype=np.intp)
+# x/y components of the GRAD3 table used by noise2 (z is unused in 2D)
+_GRAD2_X = np.array([1, -1, 1, -1, 1, -1, 1, -1, 0, 0, 0, 0, 1, -1, 0, 0], dtype=np.float32)
+_GRAD2_Y = np.array([1, 1, -1, -1, 0, 0, 0, 0, 1, -1, 1, -1, 0, 0, -1, 1], dtype=np.float32)
+# Gradient for corner index (PERM[x cell] + y cell), folding noise2's double PERM lookup into one gather
+_CORNER_GRAD_X = _GRAD2_X[_PERM[_PERM] & 15]
+_CORNER_GRAD_Y = _GRAD2_Y[_PERM[_PERM] & 15]
+
+NOISE_REPEAT = 1024.0 # pnoise2's default repeat period
+NOISE_OFFSET_RANGE = 256.0 # Seeds shift the sampling window within one 256-unit noise period
+
+
+def noise_offset(seed_offset: int) -> tuple[float, float]:
+    """Returns the (x, y) sampling offset used for a noise field.
+
+    Seeds shift where the field is sampled instead of using pnoise2's 'base'
+    argument: the C extension indexes its permutation table with base added
+    and reads past the end of it for anything but base=0, so those values
+    are neither portable nor reproducible.
+    """
+    rng = random.Random(seed_offset)
+    return rng.uniform(0, NOISE_OFFSET_RANGE), rng.uniform(0, NOISE_OFFSET_RANGE)
+
+
+def generate_noise_map_loop(diameter: int, seed_offset: int) -> list[list[float]]:
+    """Generates a 2D noise map one cell at a time with noise.pnoise2 (reference)."""
+    offset_x, offset_y = noise_offset(seed_offset)
+    map_data = [[0.0 for _ in range(diameter)] for _ in range(diameter)]
+    for y in range(diameter):
+        for x in range(diameter):
+            map_data[y][x] = noise.pnoise2(
+                x * NOISE_SCALE + offset_x, y * NOISE_SCALE + offset_y,
+                octaves=NOISE_OCTAVES, persistence=NOISE_PERSISTENCE,
+                lacunarity=NOISE_LACUNARITY
+            )
+    return map_data
+
+
+def _lattice(coord: np.ndarray, repeat: np.float32) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per-axis part of noise2(): lattice cell, next cell, fractional offset and fade curve."""
+    cell = np.floor(np.fmod(coord, repeat)).astype(np.intp)
+    next_cell = np.fmod((cell + 1).astype(np.float32), repeat).astype(np.intp) & 255
+    cell &= 255
+    frac = coord - np.floor(coord)
+    fade = frac * frac * frac * (frac * (frac * 6 - 15) + 10)
+    return cell, next_cell, frac, fade
+
+
+def _noise2(x: np.ndarray, y: np.ndarray, repeat_x: np.float32, repeat_y: np.float32) -> np.ndarray:
+    """Single octave of 2D Perlin noise. Mirrors noise2() in the C extension (base=0),
+    including its float32 arithmetic, so results match pnoise2 bit for bit.
+    x must be a row vector (1, W) and y a column vector (H, 1); the result is (H, W)."""
+    i, ii, x, fx = _lattice(x, repeat_x)
+    j, jj, y, fy = _lattice(y, repeat_y)
+
+    a = _PERM[i]; b = _PERM[ii]
+    aa = a + j; ab = a + jj; ba = b + j; bb = b + jj
+
+    x1 = x - 1; y1 = y - 1
+    g_aa = x * _CORNER_GRAD_X[aa] + y * _CORNER_GRAD_Y[aa]
+    g_ba = x1 * _CORNER_GRAD_X[ba] + y * _CORNER_GRAD_Y[ba]
+    g_ab = x * _CORNER_GRAD_X[ab] + y1 * _CORNER_GRAD_Y[ab]
+    g_bb = x1 * _CORNER_GRAD_X[bb] + y1 * _CORNER_GRAD_Y[bb]
+
+    lower = g_aa + fx * (g_ba - g_aa)
+    upper = g_ab + fx * (g_bb - g_ab)
+    return lower + fy * (upper - lower)
+
+
+def pnoise2_array(x: np.ndarray, y: np.ndarray, octaves: int = 1, persistence: float = 0.5,
+                  lacunarity: float = 2.0, repeat_x: float = NOISE_REPEAT,
+                  repeat_y: float = NOISE_REPEAT) -> np.ndarray:
+    """Vectorized equivalent of noise.pnoise2 (base=0) over a grid of coordinates.
+    x is a row vector of sample columns, y a column vector of sample rows."""
+    x = np.asarray(x, dtype=np.float32).reshape(1, -1); y = np.asarray(y, dtype=np.float32).reshape(-1, 1)
+    persistence = np.float32(persistence); lacunarity = np.float32(lacunarity)
+    repeat_x = np.float32(repeat_x); repeat_y = np.float32(repeat_y)
+    freq = np.float32(1.0); amp = np.float32(1.0); max_amp = np.float32(0.0)
+    total = np.zeros(np.broadcast(x, y).shape, dtype=np.float32)
+    for _ in range(octaves):
+        total += _noise2(x * freq, y * freq, repeat_x * freq, repeat_y * freq) * amp
+        max_amp += amp
+        freq *= lacunarity
+        amp *= persistence
+    return (total / max_amp).astype(np.float64)
+
+
+def generate_noise_map(diameter: int, seed_offset: int,
+                       window: tuple[int, int, int, int] | None = None) -> np.ndarray:
+    """Generates a (diameter x diameter) noise field in one vectorized pass.
+    window = (x0, y0, x1, y1) computes only that part ([y0:y1, x0:x1]) of the field;
+    every value is the same as in the full field."""
+    offset_x, offset_y = noise_offset(seed_offset)
+    x0, y0, x1, y1 = window or (0, 0, diameter, diameter)
+    # Same float64 -> float32 conversion pnoise2 applies to its arguments
+    xs = (np.arange(x0, x1, dtype=np.float64) * NOISE_SCALE + offset_x).astype(np.float32)[np.newaxis, :]
+    ys = (np.arange(y0, y1, dtype=np.float64) * NOISE_SCALE + offset_y).astype(np.float32)[:, np.newaxis]
+    return pnoise2_array(xs, ys, octaves=NOISE_OCTAVES, persistence=NOISE_PERSISTENCE,
+                         lacunarity=NOISE_LACUNARITY)
+
+
+def classify_terrain_loop(radius: int, seed: int) -> tuple[list[list[int]], list[list[int]]]:
+    """Per-cell reference classification. Returns (terrain, biome) as nested lists [y][x]."""
+    diameter = radius * 2 + 1
+    center_x, center_y = radius, radius
+
+    elevation_map = generate_noise_map_loop(diameter, seed + 0)
+    temperature_map = generate_noise_map_loop(diameter, seed + 1)
+    moisture_map = generate_noise_map_loop(diameter, seed + 2)
+
+    terrain = [[TERRAIN_WATER] * diameter for _ in range(diameter)]
+    biomes = [[BIOME_WATER] * diameter for _ in range(diameter)]
+    for y in range(diameter):
+        for x in range(diameter):
+            dist_from_center = math.sqrt((x - center_x)**2 + (y - center_y)**2)
+            dist_ratio = dist_from_center / max(1, radius)
+
+            elevation = elevation_map[y][x]
+            edge_start_ratio = 1.0 - WATER_EDGE_PERCENT
+            if dist_ratio > edge_start_ratio and WATER_EDGE_PERCENT > 0:
+                edge_factor = (dist_ratio - edge_start_ratio) / WATER_EDGE_PERCENT
+                elevation -= edge_factor * 0.8 # Make edges water
+
+            temp = temperature_map[y][x]
+            moisture = moisture_map[y][x]
+
+            # Determine Terrain Type
+            if elevation < ELEVATION_THRESHOLD:
+                terrain_type = TERRAIN_WATER
+                if temp < TEMP_THRESHOLD_LOW - 0.1: terrain_type = TERRAIN_ICE
+            else: terrain_type = TERRAIN_GROUND
+
+            # Determine Biome
+            biome = BIOME_WATER
+            if terrain_type == TERRAIN_GROUND:
+                if temp < TEMP_THRESHOLD_LOW: biome = BIOME_ARCTIC
+                elif temp > TEMP_THRESHOLD_HIGH and moisture < MOISTURE_THRESHOLD_LOW: biome = BIOME_DESERT
+                elif moisture > MOISTURE_THRESHOLD_HIGH: biome = BIOME_FOREST
+                else: biome = BIOME_FOREST # Default ground biome
+            elif terrain_type == TERRAIN_ICE: biome = BIOME_ARCTIC
+
+            terrain[y][x] = terrain_type
+            biomes[y][x] = biome
+    return terrain, biomes
+
+
+def classify_terrain(radius: int, seed: int,
+                     window: tuple[int, int, int, int] | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized classification. Returns (terrain, biome) as uint8 arrays indexed [y, x].
+    window = (x0, y0, x1, y1) classifies only tiles [y0:y1, x0:x1] (lazily generated maps)."""
+    diameter = radius * 2 + 1
+    x0, y0, x1, y1 = window or (0, 0, diameter, diameter)
+    elevation = generate_noise_map(diameter, seed + 0, window)
+    temperature = generate_noise_map(diameter, seed + 1, window)
+    moisture = generate_noise_map(diameter, seed + 2, window)
+
+    xs = np.arange(x0, x1, dtype=np.float64) - radius; ys = np.arange(y0, y1, dtype=np.float64) - radius
+    dist_ratio = np.sqrt(xs[np.newaxis, :]**2 + ys[:, np.newaxis]**2) / max(1, radius)
+    edge_start_ratio = 1.0 - WATER_EDGE_PERCENT
+    if WATER_EDGE_PERCENT > 0:
+        edge = dist_ratio > edge_start_ratio
+        edge_factor = (dist_ratio[edge] - edge_start_ratio) / WATER_EDGE_PERCENT
+        elevation[edge] -= edge_factor * 0.8 # Make edges water
+
+    # Terrain: water by default, ground above threshold, ice for frozen water
+    terrain = np.full(elevation.shape, TERRAIN_WATER, dtype=np.uint8)
+    is_ground = elevation >= ELEVATION_THRESHOLD
+    terrain[is_ground] = TERRAIN_GROUND
+    is_ice = ~is_ground & (temperature < TEMP_THRESHOLD_LOW - 0.1)
+    terrain[is_ice] = TERRAIN_ICE
+
+    # Biome: forest is the default ground biome; arctic/desert override it
+    biome = np.full(elevation.shape, BIOME_WATER, dtype=np.uint8)
+    biome[is_ground] = BIOME_FOREST
+    is_desert = is_ground & (temperature > TEMP_THRESHOLD_HIGH) & (moisture < MOISTURE_THRESHOLD_LOW)
+    biome[is_desert] = BIOME_DESERT
+    biome[is_ground & (temperature < TEMP_THRESHOLD_LOW)] = BIOME_ARCTIC
+    biome[is_ice] = BIOME_ARCTIC
+    return terrain, biome
\ No newline at end of file
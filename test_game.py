@@ -0,0 +1,53 @@
+# test_game.py
+# Regression tests for queued path searches (run: python -m unittest test_game).
+import contextlib
+import io
+import os
+import random
+import unittest
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # No display needed
+from constants import * # Import constants
+from simulation import Simulation
+
+
+def _add_workers(sim, count: int, seed: int = 1):
+    """Adds count workers on free walkable tiles around the Town Hall."""
+    rng = random.Random(seed); hall = sim.town_hall
+    tiles = [(x, y) for y in range(hall.y - 6, hall.y + 7) for x in range(hall.x - 6, hall.x + 7)
+             if sim.game_map.get_tile(x, y).walkable and not sim.game_map.unit_grid.occupied(x, y)]
+    for x, y in rng.sample(tiles, count):
+        worker = sim.worker_class(x, y, 1.0); sim._add_unit(worker); sim.workers.append(worker)
+    sim.population_cap = 50; sim.population = len(sim.workers)
+
+
+class GameAdvanceTest(unittest.TestCase):
+    def test_short_frames_still_gather(self):
+        """Frames shorter than a tick (60 FPS at 1x) must not drop queued search results before workers read them."""
+        import game # Imports pygame and opens the (dummy) display
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = game.Game(seed=1234)
+            _add_workers(g, 15)
+            start = dict(g.resources)
+            for _ in range(900): g.advance(SIM_TIMESTEP_MS / 3) # 15 s of game time, a tick every third frame
+        self.assertGreater(g.resources['Wood'] + g.resources['Food'], start['Wood'] + start['Food'])
+        self.assertLess(sum(worker.state == 'searching' for worker in g.workers), len(g.workers))
+
+
+class StaleSearchResultTest(unittest.TestCase):
+    def test_stale_resource_result_is_searched_again(self):
+        """A nearest-resource result that is used up by the time it is read is dropped, not handed out again."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim = Simulation(seed=1234, path_budget_ms=2)
+        _add_workers(sim, 1); sim.process_path_requests() # The first pass creates the queue
+        worker = sim.workers[-1]; queue = sim.game_map.path_requests
+        types = (RESOURCE_WOOD,)
+        key = ('resource', worker.grid_x, worker.grid_y, types)
+        queue.results[key] = (sim.town_hall.x, sim.town_hall.y) # A tile without a resource: stale
+        worker.state = 'searching'; worker._search_types = types
+        worker._poll_search(sim.game_map)
+        self.assertEqual(worker.state, 'idle')
+        self.assertEqual(queue.request(key), (False, None)) # Queued for a fresh search
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
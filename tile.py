@@ -1,104 +1,266 @@
 # tile.py
 import random
+import numpy as np
 # NOTE: No 'import pygame' needed here as Tile itself doesn't use pygame functions directly.
 # Pygame is used by the main loop to *draw* the tile using its attributes.
 from constants import * # Import necessary constants
+from random_streams import tile_variant, tile_variants # Stable per-tile color choice (hash() changes every run)
+
+# Change flags passed to TileGrid listeners
+TILE_CHANGE_RESOURCE = 1 # Resource type or amount changed
+TILE_CHANGE_BUILDING = 2 # Building placed or removed
+TILE_CHANGE_WALKABLE = 4 # Walkability flipped
+
+BIOME_COLORS = { # Ground colors per biome, alternating between the two by tile_variant
+    BIOME_FOREST: (GREEN_FOREST_1, GREEN_FOREST_2),
+    BIOME_DESERT: (BEIGE_DESERT_1, BROWN_DESERT_2),
+    BIOME_ARCTIC: (SILVER_ARCTIC_1, WHITE_ARCTIC_2),
+}
+
+class TileGrid:
+    """Struct-of-arrays storage for every tile on the map.
+
+    Each per-tile attribute lives in its own NumPy layer indexed [y, x];
+    buildings are sparse, so they are kept in a dict keyed by (x, y).
+    Tile objects are lightweight views onto one cell of these layers.
+    """
+    LAYER_NAMES = ('terrain', 'biome', 'resource_type', 'resource_amount', 'walkable', 'resource_original_type')
+
+    def __init__(self, terrain: np.ndarray, biome: np.ndarray):
+        self.height, self.width = terrain.shape
+        self.terrain = np.ascontiguousarray(terrain, dtype=np.uint8)
+        self.biome = np.ascontiguousarray(biome, dtype=np.uint8)
+        self.resource_type = np.zeros(terrain.shape, dtype=np.uint8)
+        self.resource_amount = np.zeros(terrain.shape, dtype=np.int16)
+        self.walkable = self.walkable_terrain(self.terrain)
+        self.resource_original_type = np.zeros(terrain.shape, dtype=np.uint8) # Remember what was here
+        self.buildings: dict[tuple[int, int], object] = {} # (x, y) -> Building
+        self.listeners: list = [] # Objects with tile_changed(x, y, change), e.g. spatial indexes
+
+    @classmethod
+    def from_layers(cls, layers: dict[str, np.ndarray]) -> 'TileGrid':
+        """Grid over existing layers (e.g. memory-mapped from a save), keyed by LAYER_NAMES. No copies."""
+        grid = cls.__new__(cls)
+        for name in cls.LAYER_NAMES: setattr(grid, name, layers[name])
+        grid.height, grid.width = grid.terrain.shape
+        grid.buildings = {}; grid.listeners = []
+        return grid
+
+    @classmethod
+    def empty(cls, height: int, width: int) -> 'TileGrid':
+        """
+        Grid with every layer zeroed and no walkable tile, filled in later with set_terrain
+        (lazily generated maps). The OS only commits memory for pages of a layer once written.
+        """
+        shape = (height, width)
+        return cls.from_layers({'terrain': np.zeros(shape, dtype=np.uint8), 'biome': np.zeros(shape, dtype=np.uint8),
+                                'resource_type': np.zeros(shape, dtype=np.uint8),
+                                'resource_amount': np.zeros(shape, dtype=np.int16),
+                                'walkable': np.zeros(shape, dtype=bool),
+                                'resource_original_type': np.zeros(shape, dtype=np.uint8)})
+
+    @staticmethod
+    def walkable_terrain(terrain: np.ndarray) -> np.ndarray:
+        """Walkability of bare terrain: ground and ice can be walked on, water can't."""
+        return (terrain == TERRAIN_GROUND) | (terrain == TERRAIN_ICE)
+
+    def set_terrain(self, x0: int, y0: int, terrain: np.ndarray, biome: np.ndarray):
+        """Writes generated terrain and biomes into the window starting at (x0, y0). Listeners are not told."""
+        height, width = terrain.shape
+        window = (slice(y0, y0 + height), slice(x0, x0 + width))
+        self.terrain[window] = terrain; self.biome[window] = biome
+        self.walkable[window] = self.walkable_terrain(terrain)
+
+    def add_listener(self, listener):
+        """
+        Registers an object to be told about tile changes via listener.tile_changed(x, y, change),
+        and about freshly generated parts of a lazy map via listener.area_generated(x0, y0, x1, y1).
+        """
+        self.listeners.append(listener)
+
+    def notify(self, x: int, y: int, change: int):
+        """Tells every listener that tile (x, y) changed. change is a mask of TILE_CHANGE_* flags."""
+        for listener in self.listeners:
+            listener.tile_changed(x, y, change)
+
+    def notify_area(self, x0: int, y0: int, x1: int, y1: int):
+        """Tells every listener that the tiles [y0:y1, x0:x1] were just generated."""
+        for listener in self.listeners:
+            listener.area_generated(x0, y0, x1, y1)
+
+    def colors(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Colors of the tiles in columns xs and rows ys at one pixel per tile, as a (len(ys), len(xs), 3)
+        uint8 array: a resource's color where there is one, otherwise the tile's terrain color.
+        """
+        cells = np.ix_(ys, xs)
+        terrain = self.terrain[cells]; biome = self.biome[cells]
+        variant = tile_variants(xs[None, :], ys[:, None])
+        colors = np.empty(terrain.shape + (3,), dtype=np.uint8); colors[:] = GRAY
+        for biome_type, pair in BIOME_COLORS.items():
+            in_biome = biome == biome_type
+            colors[in_biome & (variant == 0)] = pair[0]; colors[in_biome & (variant == 1)] = pair[1]
+        colors[terrain == TERRAIN_WATER] = BLUE; colors[terrain == TERRAIN_ICE] = CYAN_ICE
+        resource_type = self.resource_type[cells]
+        for res_type, color in RESOURCE_COLORS.items(): colors[resource_type == res_type] = color
+        return colors
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the tile layers (excluding the sparse building dict)."""
+        return sum(getattr(self, name).nbytes for name in self.LAYER_NAMES)
+
 
 class Tile:
-    def __init__(self, x: int, y: int, terrain_type: int, biome: int):
+    """View of a single map cell stored in a TileGrid.
+
+    Views are cheap to create and hold no state of their own, so any number of
+    them may refer to the same cell; all reads and writes go to the grid.
+    """
+    __slots__ = ('grid', 'x', 'y')
+
+    def __init__(self, grid: TileGrid, x: int, y: int):
+        self.grid = grid
         self.x = x # Grid coordinates
         self.y = y
-        self.terrain_type = terrain_type
-        self.biome = biome
-        self.resource_type = RESOURCE_NONE
-        self.resource_amount = 0
-        self.building = None # Reference to Building object if present
-        self.walkable = (terrain_type == TERRAIN_GROUND or terrain_type == TERRAIN_ICE)
-        self.color = self._get_base_color()
-        self.resource_color = None
-        self.resource_respawn_timer = 0 # Time until this tile can respawn
-        self.resource_original_type = RESOURCE_NONE # Remember what was here
+
+    def __eq__(self, other):
+        return isinstance(other, Tile) and other.grid is self.grid and other.x == self.x and other.y == self.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"Tile({self.x}, {self.y})"
+
+    # --- Layer accessors (return plain Python values, never NumPy scalars) ---
+    @property
+    def terrain_type(self) -> int:
+        return int(self.grid.terrain[self.y, self.x])
+
+    @property
+    def biome(self) -> int:
+        return int(self.grid.biome[self.y, self.x])
+
+    @property
+    def resource_type(self) -> int:
+        return int(self.grid.resource_type[self.y, self.x])
+
+    @resource_type.setter
+    def resource_type(self, value: int):
+        self.grid.resource_type[self.y, self.x] = value
+
+    @property
+    def resource_amount(self) -> int:
+        return int(self.grid.resource_amount[self.y, self.x])
+
+    @resource_amount.setter
+    def resource_amount(self, value: int):
+        self.grid.resource_amount[self.y, self.x] = value
+
+    @property
+    def walkable(self) -> bool:
+        return bool(self.grid.walkable[self.y, self.x])
+
+    @walkable.setter
+    def walkable(self, value: bool):
+        self.grid.walkable[self.y, self.x] = value
+
+    @property
+    def resource_original_type(self) -> int:
+        return int(self.grid.resource_original_type[self.y, self.x])
+
+    @resource_original_type.setter
+    def resource_original_type(self, value: int):
+        self.grid.resource_original_type[self.y, self.x] = value
+
+    @property
+    def building(self):
+        """Reference to Building object if present."""
+        return self.grid.buildings.get((self.x, self.y))
+
+    @property
+    def color(self) -> tuple[int, int, int]:
+        return self._get_base_color()
+
+    @property
+    def resource_color(self) -> tuple[int, int, int] | None:
+        resource_type = self.resource_type
+        if resource_type == RESOURCE_NONE: return None
+        return RESOURCE_COLORS.get(resource_type)
 
     def _get_base_color(self):
         """Determines the base color of the tile based on terrain and biome."""
-        if self.terrain_type == TERRAIN_WATER: return BLUE
-        if self.terrain_type == TERRAIN_ICE: return CYAN_ICE
+        terrain_type = self.terrain_type
+        if terrain_type == TERRAIN_WATER: return BLUE
+        if terrain_type == TERRAIN_ICE: return CYAN_ICE
         # Ground types:
-        if self.biome == BIOME_FOREST:
-            return GREEN_FOREST_1 if hash(f"{self.x},{self.y}") % 2 == 0 else GREEN_FOREST_2
-        if self.biome == BIOME_DESERT:
-            return BEIGE_DESERT_1 if hash(f"{self.x},{self.y}") % 2 == 0 else BROWN_DESERT_2
-        if self.biome == BIOME_ARCTIC:
-            return SILVER_ARCTIC_1 if hash(f"{self.x},{self.y}") % 2 == 0 else WHITE_ARCTIC_2
+        pair = BIOME_COLORS.get(self.biome)
+        if pair: return pair[tile_variant(self.x, self.y)]
         return GRAY # Fallback
 
+    def _notify(self, change: int, was_walkable: bool):
+        """Reports a change to the grid's listeners, adding TILE_CHANGE_WALKABLE if walkability flipped."""
+        if self.walkable != was_walkable: change |= TILE_CHANGE_WALKABLE
+        self.grid.notify(self.x, self.y, change)
+
     def set_resource(self, resource_type: int, amount: int):
         """Places a resource on the tile if possible."""
+        was_walkable = self.walkable
         if self.terrain_type == TERRAIN_GROUND and self.building is None:
             self.resource_type = resource_type
             self.resource_amount = amount
             if resource_type != RESOURCE_NONE:
-                self.resource_color = RESOURCE_COLORS.get(resource_type)
                 self.walkable = False
                 self.resource_original_type = resource_type
             else: # Clearing the resource
-                self.resource_color = None
                 self.walkable = True
                 # Don't clear original_type here, respawn logic handles it
+            self._notify(TILE_CHANGE_RESOURCE, was_walkable)
         elif resource_type == RESOURCE_NONE: # Explicit clear allowed even if not ground
             self.resource_type = RESOURCE_NONE
             self.resource_amount = 0
-            self.resource_color = None
             self.walkable = (self.terrain_type == TERRAIN_GROUND or self.terrain_type == TERRAIN_ICE)
+            self._notify(TILE_CHANGE_RESOURCE, was_walkable)
 
     def set_building(self, building): # Building type hint would require forward ref or import
         """Places a building on the tile if possible. Returns True on success."""
         if self.terrain_type == TERRAIN_GROUND and self.resource_type == RESOURCE_NONE and self.building is None:
-            self.building = building
+            was_walkable = self.walkable
+            self.grid.buildings[(self.x, self.y)] = building
             self.walkable = False
+            self._notify(TILE_CHANGE_BUILDING, was_walkable)
             return True
         return False
 
     def remove_building(self):
         """Removes a building from the tile."""
-        self.building = None
+        was_walkable = self.walkable
+        self.grid.buildings.pop((self.x, self.y), None)
         self.walkable = (self.terrain_type == TERRAIN_GROUND or self.terrain_type == TERRAIN_ICE)
+        self._notify(TILE_CHANGE_BUILDING, was_walkable)
 
     def gather_resource(self, amount_to_gather: int) -> tuple[int, int]:
         """Removes resources, returns (amount_gathered, resource_type_gathered)."""
         if self.resource_type == RESOURCE_NONE or self.resource_amount <= 0:
             return 0, RESOURCE_NONE
 
+        was_walkable = self.walkable
         gathered = min(amount_to_gather, self.resource_amount)
         self.resource_amount -= gathered
         resource_type_gathered = self.resource_type
 
         if self.resource_amount <= 0:
-            # Depleted: clear visual/type, make walkable, keep original type for respawn
+            # Depleted: clear type, make walkable, keep original type for respawn
             self.resource_type = RESOURCE_NONE
             self.resource_amount = 0
-            self.resource_color = None
             self.walkable = True
 
+        self._notify(TILE_CHANGE_RESOURCE, was_walkable)
         return gathered, resource_type_gathered
 
-    def start_respawn_timer(self, respawn_rate_modifier: float):
-        """Initiates the countdown for resource respawn."""
-        if self.resource_original_type != RESOURCE_NONE and self.resource_respawn_timer <= 0:
-            # Higher modifier = faster respawn (shorter time)
-            self.resource_respawn_timer = RESOURCE_RESPAWN_TIME_BASE / max(0.1, respawn_rate_modifier)
-
-    def update_respawn_timer(self, dt_ms_simulated: float) -> bool:
-        """Counts down timer. Returns True if ready to respawn."""
-        if self.resource_respawn_timer > 0:
-            self.resource_respawn_timer -= dt_ms_simulated
-            if self.resource_respawn_timer <= 0:
-                self.resource_respawn_timer = 0
-                return True # Ready
-        return False
-
-    def respawn_resource(self) -> bool:
-        """Respawns the original resource if tile is suitable. Returns True on success."""
+    def respawn_resource(self, rng: random.Random = random) -> bool:
+        """Respawns the original resource if tile is suitable (amount drawn from rng). Returns True on success."""
         # Check if eligible: had an original resource, is currently clear ground
         if self.resource_original_type != RESOURCE_NONE and \
            self.resource_type == RESOURCE_NONE and \
@@ -107,7 +269,7 @@ class Tile:
              # Use RESOURCE_BASE_AMOUNT (ensure it's imported via constants)
              if self.resource_original_type in RESOURCE_BASE_AMOUNT:
                 min_amount, max_amount = RESOURCE_BASE_AMOUNT[self.resource_original_type]
-                amount = random.randint(min_amount, max_amount)
+                amount = rng.randint(min_amount, max_amount)
                 self.set_resource(self.resource_original_type, amount)
                 self.resource_original_type = RESOURCE_NONE # Clear original type after respawn
                 return True
@@ -132,19 +294,20 @@ class Tile:
         screen_y = self.y * TILE_SIZE - camera_y
 
         # Culling
-        if screen_x + TILE_SIZE < 0 or screen_x > GAME_AREA_WIDTH or \
-           screen_y + TILE_SIZE < 0 or screen_y > SCREEN_HEIGHT:
+        if screen_x + TILE_SIZE < 0 or screen_x > surface.get_width() or \
+           screen_y + TILE_SIZE < 0 or screen_y > surface.get_height():
             return
 
         pygame.draw.rect(surface, self.color, (screen_x, screen_y, TILE_SIZE, TILE_SIZE))
 
         # Draw resource indicator
-        if self.resource_type != RESOURCE_NONE and self.resource_color:
+        resource_color = self.resource_color
+        if resource_color:
             center_x = screen_x + TILE_SIZE // 2
             center_y = screen_y + TILE_SIZE // 2
             radius = max(2, TILE_SIZE // 5)
             pygame.draw.circle(surface, BLACK, (center_x, center_y), radius + 1) # Outline
-            pygame.draw.circle(surface, self.resource_color, (center_x, center_y), radius)
+            pygame.draw.circle(surface, resource_color, (center_x, center_y), radius)
 
         # Optional grid lines for debugging
         # pygame.draw.rect(surface, BLACK, (screen_x, screen_y, TILE_SIZE, TILE_SIZE), 1)
\ No newline at end of file
@@ -1,7 +1,21 @@
 # ui.py
+import collections
 import pygame
 from constants import *
 
+_text_cache: collections.OrderedDict = collections.OrderedDict() # (font, text, color, background) -> Surface
+
+def render_text(font, text: str, color, background=None):
+    """font.render(text, True, color, background), cached by content: only new strings are rasterized."""
+    key = (font, text, color, background)
+    surf = _text_cache.get(key)
+    if surf is None:
+        surf = _text_cache[key] = font.render(text, True, color, background)
+        if len(_text_cache) > UI_TEXT_CACHE_SIZE: _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surf
+
 class Slider:
     """A simple horizontal slider UI element."""
     def __init__(self, x, y, w, h, min_val, max_val, initial_val, label):
@@ -66,27 +80,32 @@ class Slider:
         # Calculate knob's x position based on the ratio and track width
         return self.rect.left + ratio * self.rect.width
 
-    def draw(self, surface):
-        """Draws the slider label, track, and knob."""
+    def draw_state(self):
+        """Everything draw() depends on; the slider looks the same while this doesn't change."""
+        return int(self._get_knob_x()), f"{self.get_value():.1f}", self.dragging
+
+    def draw(self, surface, origin=(0, 0)):
+        """Draws the slider label, track, and knob. origin: screen position of surface's top-left."""
+        rect = self.rect.move(-origin[0], -origin[1])
         # Draw label above the slider
-        label_surf = self.font_label.render(f"{self.label}:", True, WHITE)
-        label_rect = label_surf.get_rect(left=self.rect.x, bottom=self.rect.y - 3)
+        label_surf = render_text(self.font_label, f"{self.label}:", WHITE)
+        label_rect = label_surf.get_rect(left=rect.x, bottom=rect.y - 3)
         surface.blit(label_surf, label_rect)
 
         # Draw value next to label
-        value_surf = self.font_value.render(f"{self.get_value():.1f}x", True, LIGHT_GRAY)
+        value_surf = render_text(self.font_value, f"{self.get_value():.1f}x", LIGHT_GRAY)
         value_rect = value_surf.get_rect(left=label_rect.right + 5, centery=label_rect.centery)
         surface.blit(value_surf, value_rect)
 
         # Draw the track
-        pygame.draw.rect(surface, LIGHT_GRAY, self.rect, border_radius=5)
-        pygame.draw.rect(surface, GRAY, self.rect, width=1, border_radius=5) # Outline
+        pygame.draw.rect(surface, LIGHT_GRAY, rect, border_radius=5)
+        pygame.draw.rect(surface, GRAY, rect, width=1, border_radius=5) # Outline
 
         # Draw the knob
-        knob_x = self._get_knob_x()
+        knob_x = self._get_knob_x() - origin[0]
         knob_color = RED if self.dragging else BLUE # Change color when dragging
-        pygame.draw.circle(surface, knob_color, (int(knob_x), self.rect.centery), self.knob_radius)
-        pygame.draw.circle(surface, BLACK, (int(knob_x), self.rect.centery), self.knob_radius, 1) # Outline
+        pygame.draw.circle(surface, knob_color, (int(knob_x), rect.centery), self.knob_radius)
+        pygame.draw.circle(surface, BLACK, (int(knob_x), rect.centery), self.knob_radius, 1) # Outline
 
 
 class Button:
@@ -112,25 +131,31 @@ class Button:
         # Can add MOUSEBUTTONUP logic if needed (e.g., for click release)
         return False
 
-    def draw(self, surface):
-        """Draws the button background, icon or text, and tooltip on hover."""
+    def draw_state(self):
+        """Everything draw() depends on; the button looks the same while this doesn't change."""
+        return self.is_hovered, self.is_active
+
+    def draw(self, surface, origin=(0, 0)):
+        """Draws the button background and icon or text. origin: screen position of surface's top-left."""
+        rect = self.rect.move(-origin[0], -origin[1])
         # Determine background color based on hover state
         bg_color = WHITE if self.is_hovered else LIGHT_GRAY
-        pygame.draw.rect(surface, bg_color, self.rect, border_radius=3)
-        pygame.draw.rect(surface, BLACK, self.rect, width=1, border_radius=3) # Outline
+        pygame.draw.rect(surface, bg_color, rect, border_radius=3)
+        pygame.draw.rect(surface, BLACK, rect, width=1, border_radius=3) # Outline
 
         # Draw icon or text centered on the button
         if self.icon_surf:
-            icon_rect = self.icon_surf.get_rect(center=self.rect.center)
+            icon_rect = self.icon_surf.get_rect(center=rect.center)
             surface.blit(self.icon_surf, icon_rect)
         elif self.text:
-            text_surf = self.font.render(self.text, True, BLACK)
-            text_rect = text_surf.get_rect(center=self.rect.center)
+            text_surf = render_text(self.font, self.text, BLACK)
+            text_rect = text_surf.get_rect(center=rect.center)
             surface.blit(text_surf, text_rect)
 
-        # Draw tooltip if hovered
+    def draw_tooltip(self, surface):
+        """Draws the tooltip above the button while it is hovered (surface: the whole screen)."""
         if self.is_hovered and self.tooltip:
-            tooltip_surf = self.font_tooltip.render(self.tooltip, True, BLACK, LIGHT_GRAY) # Black text on light gray bg
+            tooltip_surf = render_text(self.font_tooltip, self.tooltip, BLACK, LIGHT_GRAY) # Black text on light gray bg
             tooltip_rect = tooltip_surf.get_rect(midbottom=(self.rect.centerx, self.rect.top - 5))
             # Ensure tooltip stays on screen
             tooltip_rect.clamp_ip(surface.get_rect())
@@ -144,6 +169,10 @@ class UI:
         self.font_resource = pygame.font.SysFont(None, UI_DEFAULT_FONT_SIZE)
         self.font_pop = pygame.font.SysFont(None, UI_SMALL_FONT_SIZE)
         self.font_header = pygame.font.SysFont(None, UI_DEFAULT_FONT_SIZE, bold=True)
+        self.font_overlay = pygame.font.SysFont('monospace', UI_SMALL_FONT_SIZE - 4) # Columns line up
+        self.panel_surface = pygame.Surface(self.panel_rect.size) # The panel as last drawn
+        self._panel_state = None # What panel_surface shows; it is redrawn only when this changes
+        self._panel_target = None # Surface panel_surface was last blitted to
 
         # --- Sliders ---
         self.sliders = {}
@@ -186,6 +215,12 @@ class UI:
         # next_button_x = build_x + button_size + button_margin
         # self.build_buttons[BUILDING_TYPE_2] = Button(next_button_x, build_y, ...)
 
+        # --- Minimap (bottom of the panel; its image comes from the game every frame) ---
+        self.minimap_rect = pygame.Rect(GAME_AREA_WIDTH + UI_PADDING, SCREEN_HEIGHT - UI_PADDING - MINIMAP_SIZE,
+                                        MINIMAP_SIZE, MINIMAP_SIZE)
+        self.minimap_header_y = self.minimap_rect.top - 30
+        self.minimap_dragging = False # Left button held since a click on the minimap: the view follows the mouse
+
 
     def handle_event(self, event):
         """Handles events for all UI elements. Returns data if element handled event."""
@@ -201,6 +236,16 @@ class UI:
                  # Return the type of building button clicked
                  return {'type': 'build_button_click', 'building': building_type}
 
+        # Minimap: clicking (or dragging with the left button held) jumps the view there
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.minimap_rect.collidepoint(event.pos):
+            self.minimap_dragging = True
+        if (event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEMOTION) and self.minimap_dragging:
+            # Position on the minimap, in minimap pixels
+            return {'type': 'minimap_click', 'pos': (event.pos[0] - self.minimap_rect.left, event.pos[1] - self.minimap_rect.top)}
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.minimap_dragging:
+            self.minimap_dragging = False
+            return {'type': 'minimap_release'}
+
         # Allow clicking anywhere on the panel background? Maybe not needed.
         # if self.panel_rect.collidepoint(event.pos):
         #     return {'type': 'panel_click'} # Generic panel interaction
@@ -208,36 +253,75 @@ class UI:
         return None # Event not handled by the UI
 
 
-    def draw(self, surface, resources, population, pop_cap):
-        """Draws the entire UI panel."""
+    def draw_overlay(self, surface, lines: list[str]):
+        """Draws text lines (e.g. the profiler report) in a translucent box at the top left of surface."""
+        if not lines: return
+        line_height = self.font_overlay.get_linesize()
+        width = max(self.font_overlay.size(line)[0] for line in lines) + UI_PADDING * 2
+        box = pygame.Surface((width, line_height * len(lines) + UI_PADDING * 2), pygame.SRCALPHA)
+        box.fill((*BLACK[:3], PROFILER_OVERLAY_ALPHA))
+        for i, line in enumerate(lines):
+            box.blit(self.font_overlay.render(line, True, WHITE), (UI_PADDING, UI_PADDING + i * line_height))
+        surface.blit(box, (UI_PADDING, UI_PADDING))
+
+    def draw(self, surface, resources, population, pop_cap, minimap=None):
+        """
+        Draws the entire UI panel. The panel is kept on panel_surface and only redrawn (and
+        blitted) when what it shows changed: displayed resource counts, population, sliders or
+        button hover. Nothing else draws over the panel area of the screen, so otherwise the
+        last blit is still there and a frame only draws the minimap image (which changes
+        as units move) and the hovered button's tooltip.
+        """
+        state = (tuple((name, int(amount)) for name, amount in resources.items()), population, pop_cap,
+                 tuple(slider.draw_state() for slider in self.sliders.values()),
+                 tuple(button.draw_state() for button in self.build_buttons.values()))
+        if state != self._panel_state:
+            self._draw_panel(resources, population, pop_cap)
+            self._panel_state = state; self._panel_target = None
+        if surface is not self._panel_target:
+            surface.blit(self.panel_surface, self.panel_rect); self._panel_target = surface
+        if minimap is not None: surface.blit(minimap, self.minimap_rect)
+
+        # Tooltips may reach past the panel, so they go straight onto the screen
+        for button in self.build_buttons.values():
+            button.draw_tooltip(surface)
+
+    def _draw_panel(self, resources, population, pop_cap):
+        """Redraws panel_surface (in panel coordinates: screen positions minus the panel's origin)."""
+        surface = self.panel_surface; origin = self.panel_rect.topleft
         # Draw Panel Background
-        pygame.draw.rect(surface, DARK_BLUE, self.panel_rect)
+        surface.fill(DARK_BLUE)
 
         # --- Draw Resource Counts ---
         res_y = UI_PADDING + 5
-        res_x = GAME_AREA_WIDTH + UI_PADDING
+        res_x = UI_PADDING
         for name, amount in resources.items():
             # Skip "Water" if you don't want it displayed, or handle specially
             # if name == 'Water': continue
             text = f"{name}: {int(amount)}"
-            res_surf = self.font_resource.render(text, True, WHITE)
+            res_surf = render_text(self.font_resource, text, WHITE)
             surface.blit(res_surf, (res_x, res_y))
             res_y += 25 # Spacing between resource lines
 
          # --- Draw Population ---
         pop_text = f"Pop: {population} / {pop_cap}"
-        pop_surf = self.font_pop.render(pop_text, True, WHITE)
+        pop_surf = render_text(self.font_pop, pop_text, WHITE)
         # Position population below resources
         surface.blit(pop_surf, (res_x, res_y + 5))
 
         # --- Draw Sliders ---
         for slider in self.sliders.values():
-            slider.draw(surface)
+            slider.draw(surface, origin)
 
         # --- Draw Build Header ---
-        build_header_surf = self.font_header.render("BUILD:", True, WHITE)
-        surface.blit(build_header_surf, (res_x, self.build_button_header_y))
+        build_header_surf = render_text(self.font_header, "BUILD:", WHITE)
+        surface.blit(build_header_surf, (res_x, self.build_button_header_y - origin[1]))
 
         # --- Draw Build Buttons ---
         for button in self.build_buttons.values():
-            button.draw(surface)
\ No newline at end of file
+            button.draw(surface, origin)
+
+        # --- Draw Minimap Header and Frame ---
+        minimap_header_surf = render_text(self.font_header, "MAP:", WHITE)
+        surface.blit(minimap_header_surf, (res_x, self.minimap_header_y - origin[1]))
+        pygame.draw.rect(surface, LIGHT_GRAY, self.minimap_rect.move(-origin[0], -origin[1]).inflate(2, 2), 1)
\ No newline at end of file
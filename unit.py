@@ -1,10 +1,12 @@
 # unit.py
-import pygame # Needed for drawing
 import math
 from constants import * # Import constants
 from tile import Tile
 from building import Building, TownHall # Need TownHall specifically
 
+ENEMY_SCAN_RADIUS_TILES = int(math.sqrt(ENEMY_SCAN_RADIUS_SQ) // TILE_SIZE) + 1 # Grid query radius covering the scan circle
+MAX_MOVE_STEP_S = SIM_TIMESTEP_MS / 1000 # Longer updates (level of detail) walk as far as steps of this would
+
 # Type hinting for complex types passed from Game
 BuildingList = list[Building]
 ResourceDict = dict[str, int | float]
@@ -24,29 +26,129 @@ class Unit:
         self.game_speed_modifier: float = game_speed_modifier
         self.hp: int = 100
         self.max_hp: int = 100
+        self.path: list[tuple[int, int]] | None = None # Tile waypoints from GameMap.find_path
+        self.path_index: int = 0 # Next waypoint to walk to (path[0] is the tile it was planned from)
+        self.path_goal: tuple[int, int] | None = None # Goal tile the path was planned for
+        self.unit_grid = None # UnitGrid tracking this unit's tile, set by attach_to
 
     def update_grid_pos(self):
-        self.grid_x = int(self.x // TILE_SIZE); self.grid_y = int(self.y // TILE_SIZE)
+        grid_x = int(self.x // TILE_SIZE); grid_y = int(self.y // TILE_SIZE)
+        if grid_x != self.grid_x or grid_y != self.grid_y:
+            if self.unit_grid is not None: self.unit_grid.move(self, self.grid_x, self.grid_y, grid_x, grid_y)
+            self.grid_x = grid_x; self.grid_y = grid_y
+
+    def attach_to(self, unit_grid):
+        """Registers the unit in a UnitGrid, which update_grid_pos then keeps current."""
+        self.unit_grid = unit_grid; unit_grid.add(self, self.grid_x, self.grid_y)
+
+    def detach(self):
+        """Removes the unit from its UnitGrid (e.g. when it dies)."""
+        if self.unit_grid is not None: self.unit_grid.remove(self, self.grid_x, self.grid_y)
+        self.unit_grid = None
 
     def set_speed_modifier(self, modifier: float):
         self.game_speed_modifier = max(0.01, modifier)
 
-    def move_towards(self, target_x_px: float, target_y_px: float, dt_simulated: float) -> bool:
+    def move_towards(self, target_x_px: float, target_y_px: float, dt_simulated: float,
+                     stop_distance: float | None = None) -> bool:
         dx = target_x_px - self.x; dy = target_y_px - self.y
         dist_sq = dx*dx + dy*dy
-        stop_distance = TILE_SIZE / 4
-        if isinstance(self.target, (Tile, Building, Unit)): stop_distance = TILE_SIZE * 0.6
+        if stop_distance is None: stop_distance = self.default_stop_distance()
         if dist_sq < stop_distance * stop_distance: return True
         dist = math.sqrt(dist_sq)
         if dist > 0: dx /= dist; dy /= dist
         else: return True
-        effective_speed_pixels = self.speed * TILE_SIZE * self.game_speed_modifier * dt_simulated
+        effective_speed_pixels = min(dist, self.speed * TILE_SIZE * self.game_speed_modifier * dt_simulated) # Don't overshoot
         self.x += dx * effective_speed_pixels; self.y += dy * effective_speed_pixels
         self.update_grid_pos(); return False
 
-    def draw(self, surface: pygame.Surface, camera_x: int, camera_y: int):
-        screen_x = int(self.x - camera_x); screen_y = int(self.y - camera_y)
-        radius = TILE_SIZE // 3
+    def default_stop_distance(self) -> float:
+        """How close move_towards gets before arriving: closer for points than for objects."""
+        return TILE_SIZE * 0.6 if isinstance(self.target, (Tile, Building, Unit)) else TILE_SIZE / 4
+
+    def follow_path(self, game_map, goal_x: int, goal_y: int, dt_simulated: float) -> bool | None:
+        """
+        Walks along an A* path into tile (goal_x, goal_y), planning it when the goal changes
+        and re-planning if the next waypoint gets blocked. Returns True on arrival,
+        False while still walking, None if the goal can't be reached.
+        An update longer than MAX_MOVE_STEP_S walks as far as that many regular ones would.
+        """
+        if self.path_goal != (goal_x, goal_y) or self._next_waypoint_blocked(game_map):
+            path = game_map.find_path(self.grid_x, self.grid_y, goal_x, goal_y)
+            if path is None: self.clear_path(); return None
+            self.path = [(self.grid_x, self.grid_y)] + path; self.path_index = 0
+            self.path_goal = (goal_x, goal_y)
+        goal_blocked = not game_map.grid.walkable[goal_y, goal_x]
+        if dt_simulated > MAX_MOVE_STEP_S: return self._walk_steps(goal_x, goal_y, goal_blocked, dt_simulated)
+        # Walk through the waypoints, turning a little before each tile center. Blocked goals
+        # (resources, buildings) are approached straight from the center of the tile before them.
+        last_waypoint = len(self.path) - 2
+        while self.path_index <= last_waypoint:
+            wx, wy = self.path[self.path_index]
+            stop_distance = 0.5 if goal_blocked and self.path_index == last_waypoint else TILE_SIZE / 4
+            if not self.move_towards(wx * TILE_SIZE + TILE_SIZE / 2, wy * TILE_SIZE + TILE_SIZE / 2,
+                                     dt_simulated, stop_distance):
+                return False
+            self.path_index += 1
+        return self.move_towards(goal_x * TILE_SIZE + TILE_SIZE / 2, goal_y * TILE_SIZE + TILE_SIZE / 2,
+                                 dt_simulated, TILE_SIZE * 0.6 if goal_blocked else None)
+
+    def _walk_steps(self, goal_x: int, goal_y: int, goal_blocked: bool, dt_simulated: float) -> bool:
+        """
+        follow_path over several steps' worth of time at once (level of detail): works out per
+        waypoint how many regular steps it takes to get within the stop distance and where
+        they end, so the unit ends up where step by step walking would have taken it.
+        """
+        steps = max(1, round(dt_simulated / MAX_MOVE_STEP_S))
+        step_px = self.speed * TILE_SIZE * self.game_speed_modifier * dt_simulated / steps
+        last_waypoint = len(self.path) - 2
+        while steps > 0:
+            if self.path_index <= last_waypoint:
+                wx, wy = self.path[self.path_index]
+                stop_distance = 0.5 if goal_blocked and self.path_index == last_waypoint else TILE_SIZE / 4
+            else:
+                wx, wy = goal_x, goal_y
+                stop_distance = TILE_SIZE * 0.6 if goal_blocked else self.default_stop_distance()
+            dx = wx * TILE_SIZE + TILE_SIZE / 2 - self.x; dy = wy * TILE_SIZE + TILE_SIZE / 2 - self.y
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist < stop_distance: # Arrived: on to the next waypoint within the same step
+                if self.path_index > last_waypoint: self.update_grid_pos(); return True
+                self.path_index += 1; continue
+            moves = min(steps, int((dist - stop_distance) // step_px) + 1) # Steps until inside the stop distance
+            moved = min(dist, moves * step_px) # The last step never overshoots
+            self.x += dx / dist * moved; self.y += dy / dist * moved
+            steps -= moves
+        self.update_grid_pos(); return False
+
+    def walk_time_ms(self) -> float:
+        """
+        Game time (ms) the unit keeps walking its path at least: the tiles still ahead, less
+        one for the corners it cuts and where it stops short of the goal. 0 without a path.
+        """
+        if not self.path: return 0
+        tiles = len(self.path) - self.path_index - 2
+        return tiles * 1000 / (self.speed * self.game_speed_modifier) if tiles > 0 else 0
+
+    def _next_waypoint_blocked(self, game_map) -> bool:
+        # The start tile (index 0) is where the unit stands and the goal may be blocked: only check in between
+        if not self.path or not 0 < self.path_index < len(self.path) - 1: return False
+        wx, wy = self.path[self.path_index]
+        return not game_map.grid.walkable[wy, wx]
+
+    def clear_path(self):
+        self.path = None; self.path_index = 0; self.path_goal = None
+
+    def draw(self, surface: 'pygame.Surface', camera_x: int, camera_y: int,
+             position: tuple[float, float] | None = None, tile_px: int = TILE_SIZE):
+        """
+        position: world pixel position to draw at instead of the unit's own (render interpolation).
+        tile_px: screen pixels per tile (zoom); the camera is in screen pixels at that zoom.
+        """
+        import pygame # Only needed when rendering; headless simulations never import it
+        x, y = position if position is not None else (self.x, self.y)
+        scale = tile_px / TILE_SIZE
+        screen_x = int(x * scale - camera_x); screen_y = int(y * scale - camera_y)
+        radius = tile_px // 3
         if not pygame.Rect(screen_x - radius, screen_y - radius, radius*2, radius*2).colliderect(surface.get_rect()): return
         color = WHITE
         if self.type == UNIT_WORKER: color = GREEN
@@ -55,7 +157,7 @@ class Unit:
         pygame.draw.circle(surface, BLACK, (screen_x, screen_y), radius, 1)
         if self.hp < self.max_hp and self.max_hp > 0:
             hp_ratio = max(0.0, float(self.hp) / self.max_hp)
-            bar_width = TILE_SIZE * 0.6; bar_height = 4
+            bar_width = tile_px * 0.6; bar_height = max(2, tile_px // 8)
             bar_x = int(screen_x - bar_width / 2); bar_y = int(screen_y - radius - bar_height - 2)
             pygame.draw.rect(surface, DARK_RED, (bar_x, bar_y, int(bar_width), bar_height))
             pygame.draw.rect(surface, GREEN_GRASS, (bar_x, bar_y, int(bar_width * hp_ratio), bar_height))
@@ -71,11 +173,12 @@ class Worker(Unit):
         # --- Add flag to prevent error spam ---
         self._cant_find_th_logged: bool = False
         self._path_retry_timer: float = 0 # Timer to wait before retrying pathfinding
+        self._search_types: tuple[int, ...] | None = None # Resource types of a queued nearest-resource search
+        self._claims = None # The map's ResourceClaims while this worker holds a claim on its target tile
 
     def update(self, dt_simulated: float, game_map, buildings: BuildingList,
                resources: ResourceDict, current_population: int):
         dt_ms = dt_simulated * 1000
-        retry_delay = 3000 # Wait 3 seconds (in ms) before retrying path if failed
 
         # Update path retry timer if active
         if self._path_retry_timer > 0:
@@ -93,12 +196,15 @@ class Worker(Unit):
             if self.carry_amount > 0: self.find_town_hall_and_return(game_map, buildings)
             else: self.find_resource_and_move(game_map, resources, current_population)
 
+        elif self.state == 'searching':
+            self._poll_search(game_map) # Waits for its queued search (resource, then path) to be answered
+
         elif self.state == 'moving_to_resource':
             # ... (moving logic remains the same as previous version) ...
             if self.target_tile and self.target_tile.resource_type != RESOURCE_NONE and self.target_tile.resource_amount > 0:
-                target_cx = self.target_tile.x * TILE_SIZE + TILE_SIZE / 2
-                target_cy = self.target_tile.y * TILE_SIZE + TILE_SIZE / 2
-                if self.move_towards(target_cx, target_cy, dt_simulated):
+                arrived = self.follow_path(game_map, self.target_tile.x, self.target_tile.y, dt_simulated)
+                if arrived is None: self.state = 'idle'; self.clear_target() # Cut off since it was chosen
+                elif arrived:
                     if self.target_tile.resource_type != RESOURCE_NONE and self.target_tile.resource_amount > 0:
                         self.state = 'gathering'; self.gather_timer = 0
                     else: self.state = 'idle'; self.clear_target()
@@ -111,11 +217,12 @@ class Worker(Unit):
                 if self.target_tile and self.target_tile.resource_amount > 0:
                     gathered, res_type = self.target_tile.gather_resource(WORKER_GATHER_RATE)
                     if gathered > 0:
+                        if self._claims is not None: self._claims.consume(self, gathered)
                         if self.carry_amount == 0: self.resource_carried = res_type
                         if self.resource_carried == res_type: self.carry_amount += gathered
                         else: self.find_town_hall_and_return(game_map, buildings)
 
-                    if self.state != 'moving_to_townhall':
+                    if self.state == 'gathering': # Not already heading (or searching a path) to the Town Hall
                         if self.target_tile.resource_amount <= 0 or self.carry_amount >= WORKER_CAPACITY:
                             if self.target_tile.resource_amount <= 0:
                                 game_map.mark_for_respawn(self.target_tile.x, self.target_tile.y)
@@ -128,9 +235,9 @@ class Worker(Unit):
         elif self.state == 'moving_to_townhall':
             # Target should be TownHall object
             if isinstance(self.target, TownHall):
-                target_cx = self.target.x * TILE_SIZE + TILE_SIZE / 2
-                target_cy = self.target.y * TILE_SIZE + TILE_SIZE / 2
-                if self.move_towards(target_cx, target_cy, dt_simulated):
+                arrived = self.follow_path(game_map, self.target.x, self.target.y, dt_simulated)
+                if arrived is None: self.target = None; self.clear_path() # Cut off: look for a Town Hall again
+                elif arrived:
                      self.state = 'dropping_off'
                      self._cant_find_th_logged = False # Reset log flag on successful arrival
                      self._path_retry_timer = 0 # Reset retry timer
@@ -152,23 +259,42 @@ class Worker(Unit):
             self._path_retry_timer = 0 # Reset retry timer
             self.state = 'idle'; self.clear_target()
 
+    def wait_time_ms(self) -> float:
+        """
+        Game time (ms) the worker will spend only counting down a timer (path retry or
+        gathering), so it can skip updates until then; 0 if it has something to do each step.
+        """
+        if self._path_retry_timer > 0: return self._path_retry_timer # update() returns early until it runs out
+        if self.state == 'gathering' and self.gather_timer > 0: return self.gather_timer
+        return 0
+
     def find_resource_and_move(self, game_map, resources: ResourceDict, current_population: int):
-        # ... (logic remains the same as previous version) ...
-        self.clear_target(); found_tile = None
-        for res_type in self.preferred_resource_order:
-             needed = True
-             if res_type == RESOURCE_FOOD and resources.get('Food', 0) > current_population * 15: needed = False
-             if needed:
-                found_tile = game_map.find_nearest_resource(self.grid_x, self.grid_y, res_type)
-                if found_tile: break
-        if not found_tile:
-             for res_type in [RESOURCE_WOOD, RESOURCE_FOOD, RESOURCE_STONE, RESOURCE_IRON]:
-                 found_tile = game_map.find_nearest_resource(self.grid_x, self.grid_y, res_type)
-                 if found_tile: break
+        self.clear_target()
+        search_types = self._resource_search_order(resources, current_population)
+        if game_map.path_requests is not None: # Queued: wait in 'searching' for the answer
+            self._search_types = search_types; self.state = 'searching'
+            self._poll_search(game_map)
+            return
+        found_tile = None
+        for res_type in search_types:
+            found_tile = game_map.find_nearest_resource(self.grid_x, self.grid_y, res_type)
+            if found_tile: break
+        self._set_resource_target(game_map, found_tile)
+
+    def _resource_search_order(self, resources: ResourceDict, current_population: int) -> tuple[int, ...]:
+        """Resource types to look for, first found wins: preferred ones (food only while short), then the rest."""
+        order = [res_type for res_type in self.preferred_resource_order
+                 if not (res_type == RESOURCE_FOOD and resources.get('Food', 0) > current_population * 15)]
+        return tuple(order + [res_type for res_type in (RESOURCE_WOOD, RESOURCE_FOOD, RESOURCE_STONE, RESOURCE_IRON)
+                              if res_type not in order])
+
+    def _set_resource_target(self, game_map, found_tile: Tile | None):
         if found_tile:
             self.target_tile = found_tile; self.target = (found_tile.x, found_tile.y)
-            self.state = 'moving_to_resource'
-        else: self.state = 'idle'
+            self.claim_target(game_map, min(WORKER_CAPACITY - self.carry_amount,
+                                            game_map.unclaimed_amount(found_tile.x, found_tile.y)))
+            self.state = 'moving_to_resource'; self._request_path(game_map)
+        else: self.state = 'idle'; self._path_retry_timer = WORKER_IDLE_RETRY_TIME # Nothing in range: look again later
 
     def find_town_hall_and_return(self, game_map, buildings: BuildingList) -> bool:
         """
@@ -179,11 +305,12 @@ class Worker(Unit):
         if self._path_retry_timer > 0:
             return False # Still waiting to retry
 
+        self.release_claim() # Done with the resource tile
         town_hall = game_map.find_nearest_building(self.grid_x, self.grid_y, BUILDING_TOWNHALL)
         if town_hall:
             self.target = town_hall
             self.target_tile = None
-            self.state = 'moving_to_townhall'
+            self.state = 'moving_to_townhall'; self._request_path(game_map)
             # If we successfully found it *now*, reset the logged flag
             self._cant_find_th_logged = False
             return True
@@ -192,19 +319,70 @@ class Worker(Unit):
             if not self._cant_find_th_logged: # Log only once
                 print(f"CRITICAL: Worker at ({self.grid_x},{self.grid_y}) cannot find path to Town Hall!")
                 self._cant_find_th_logged = True
+                print(f"Worker at ({self.grid_x},{self.grid_y}) will retry finding TH every {WORKER_TOWNHALL_RETRY_TIME/1000:.1f}s.") # Feedback
             # Don't change state back to idle immediately if carrying resources.
             # Stay in current state (or moving_to_townhall if called from idle/gather)
-            # Set a timer to retry pathfinding after a delay
-            self._path_retry_timer = 3000 # e.g., wait 3 seconds
-            print(f"Worker at ({self.grid_x},{self.grid_y}) will retry finding TH in {self._path_retry_timer/1000:.1f}s.") # Feedback
+            # Set a timer to retry pathfinding after a delay (the retry itself is an O(1) region check)
+            self._path_retry_timer = WORKER_TOWNHALL_RETRY_TIME
             # Ensure state is set to moving_to_townhall so it keeps trying (or stays put)
             self.state = 'moving_to_townhall'
             self.target = None # Clear specific target object, but keep state
             return False # Pathfinding failed for now
 
+    def _search_goal(self) -> tuple[int, int] | None:
+        """Tile a 'searching' worker waits for a path to: its resource, its Town Hall, or None (no target yet)."""
+        if self.target_tile: return self.target_tile.x, self.target_tile.y
+        if isinstance(self.target, TownHall): return self.target.x, self.target.y
+        return None
+
+    def _request_path(self, game_map):
+        """
+        With a request queue, waits in 'searching' for the path to the new target (and
+        walks it once it arrives). Without one, follow_path plans it on the spot.
+        """
+        if game_map.path_requests is None: return
+        self.clear_path(); self.state = 'searching'
+        self._poll_search(game_map)
+
+    def _poll_search(self, game_map):
+        """
+        'searching': asks the request queue for the nearest resource (no target yet) or
+        for the path to the target, and acts on the answer once it is there.
+        """
+        queue = game_map.path_requests; goal = self._search_goal()
+        if queue is None or (goal is None and self._search_types is None):
+            # Queue gone (a save was loaded) or nothing left to look for: carry on without it
+            self.state = 'idle' if goal is None else 'moving_to_resource' if self.target_tile else 'moving_to_townhall'
+            return
+        if goal is None: # Nearest resource
+            key = ('resource', self.grid_x, self.grid_y, self._search_types)
+            done, found = queue.request(key)
+            if not done: return
+            self._search_types = None
+            tile = game_map.get_tile(*found) if found else None
+            if tile and (tile.resource_type == RESOURCE_NONE or game_map.unclaimed_amount(tile.x, tile.y) <= 0):
+                # Taken or claimed since the search (e.g. by a merged request): look again with a fresh search
+                queue.discard_result(key); self.state = 'idle'
+                return
+            self._set_resource_target(game_map, tile)
+            return
+        done, path = queue.request(('path', self.grid_x, self.grid_y, *goal))
+        if not done: return
+        if path is not None: # An unreachable goal is found out again by follow_path, as without the queue
+            self.path = [(self.grid_x, self.grid_y)] + path; self.path_index = 0; self.path_goal = goal
+        self.state = 'moving_to_resource' if self.target_tile else 'moving_to_townhall'
+
+    def claim_target(self, game_map, amount: int):
+        """Claims amount of the target tile's resource, so other workers look for unclaimed tiles."""
+        self._claims = game_map.claims
+        game_map.claims.claim(self, self.target_tile.x, self.target_tile.y, amount)
+
+    def release_claim(self):
+        if self._claims is not None: self._claims.release(self); self._claims = None
+
     def clear_target(self):
         """Resets target info."""
-        self.target = None; self.target_tile = None
+        self.target = None; self.target_tile = None; self.clear_path(); self.release_claim()
 
 # --- Enemy Unit ---
 # ... (Enemy class remains the same as previous correct version) ...
@@ -214,24 +392,31 @@ class Enemy(Unit):
         self.speed = ENEMY_SPEED; self.hp = ENEMY_HP; self.max_hp = ENEMY_HP
         self.damage = ENEMY_DAMAGE; self.attack_rate = ENEMY_ATTACK_RATE
         self.attack_timer: float = 0
+        self.scan_timer: float = 0 # Time until an idle enemy looks for targets again
         self.target_object: Unit | Building | None = None
 
-    def update(self, dt_simulated: float, buildings: BuildingList, workers: list['Worker']):
+    def update(self, dt_simulated: float, game_map):
         dt_ms = dt_simulated * 1000
         if self.attack_timer > 0: self.attack_timer -= dt_ms
 
         if self.state == 'idle':
-            found_target = self.find_target(workers, buildings)
-            if found_target:
-                self.target_object = found_target; self.target = self.target_object
-                self.state = 'moving_to_target'
+            self.scan_timer -= dt_ms
+            if self.scan_timer <= 0:
+                self.scan_timer = ENEMY_IDLE_SCAN_TIME
+                found_target = self.find_target(game_map)
+                if found_target:
+                    self.target_object = found_target; self.target = self.target_object
+                    self.state = 'moving_to_target'
         elif self.state == 'moving_to_target':
              if self.target_object and self.target_object.hp > 0:
                  target_px, target_py = self.get_target_pixel_coords()
                  dx, dy = target_px - self.x, target_py - self.y
                  if dx*dx + dy*dy < (TILE_SIZE * 1.1)**2:
                      self.state = 'attacking'; self.attack_timer = 0
-                 else: self.move_towards(target_px, target_py, dt_simulated)
+                 else:
+                     goal_x, goal_y = self.get_target_grid_coords()
+                     if self.follow_path(game_map, goal_x, goal_y, dt_simulated) is None:
+                         self.state = 'idle'; self.clear_target() # Target got out of reach
              else: self.state = 'idle'; self.clear_target()
         elif self.state == 'attacking':
             if self.target_object and self.target_object.hp > 0:
@@ -247,18 +432,32 @@ class Enemy(Unit):
                     else: self.attack_timer = self.attack_rate
             else: self.state = 'idle'; self.clear_target()
 
-    def find_target(self, workers: list['Worker'], buildings: BuildingList) -> Unit | Building | None:
+    def wait_time_ms(self) -> float:
+        """
+        Game time (ms) the enemy will spend only counting down a timer: the idle scan timer,
+        or the attack cooldown against a building (which can't walk away). 0 if it acts each step.
+        """
+        if self.state == 'idle': return max(0, self.scan_timer)
+        if self.state == 'attacking' and isinstance(self.target_object, Building) and self.target_object.hp > 0:
+            return max(0, self.attack_timer)
+        return 0
+
+    def find_target(self, game_map) -> Unit | Building | None:
+        """Nearest reachable worker or building within ENEMY_SCAN_RADIUS_SQ, from the map's spatial grids."""
         nearest_target = None; min_dist_sq = ENEMY_SCAN_RADIUS_SQ
-        for worker in workers:
+        x, y, grid_x, grid_y = self.x, self.y, self.grid_x, self.grid_y # Read once (may be UnitStore fields)
+        for worker in game_map.unit_grid.query(grid_x, grid_y, ENEMY_SCAN_RADIUS_TILES, UNIT_WORKER):
             if worker.hp > 0:
-                dist_sq = (worker.x - self.x)**2 + (worker.y - self.y)**2
-                if dist_sq < min_dist_sq: min_dist_sq = dist_sq; nearest_target = worker
-        for building in buildings:
+                dist_sq = (worker.x - x)**2 + (worker.y - y)**2
+                if dist_sq < min_dist_sq and game_map.is_reachable(grid_x, grid_y, worker.grid_x, worker.grid_y):
+                    min_dist_sq = dist_sq; nearest_target = worker
+        for building in game_map.building_grid.query(grid_x, grid_y, ENEMY_SCAN_RADIUS_TILES):
              if building.hp > 0:
                  b_cx = building.x * TILE_SIZE + TILE_SIZE / 2
                  b_cy = building.y * TILE_SIZE + TILE_SIZE / 2
-                 dist_sq = (b_cx - self.x)**2 + (b_cy - self.y)**2
-                 if dist_sq < min_dist_sq: min_dist_sq = dist_sq; nearest_target = building
+                 dist_sq = (b_cx - x)**2 + (b_cy - y)**2
+                 if dist_sq < min_dist_sq and game_map.is_reachable(grid_x, grid_y, building.x, building.y):
+                     min_dist_sq = dist_sq; nearest_target = building
         return nearest_target
 
     def get_target_pixel_coords(self) -> tuple[float, float]:
@@ -268,5 +467,10 @@ class Enemy(Unit):
                      self.target_object.y * TILE_SIZE + TILE_SIZE / 2)
          return self.x, self.y
 
+    def get_target_grid_coords(self) -> tuple[int, int]:
+         if isinstance(self.target_object, Unit): return self.target_object.grid_x, self.target_object.grid_y
+         if isinstance(self.target_object, Building): return self.target_object.x, self.target_object.y
+         return self.grid_x, self.grid_y
+
     def clear_target(self):
-        self.target = None; self.target_object = None
\ No newline at end of file
+        self.target = None; self.target_object = None; self.clear_path()
\ No newline at end of file
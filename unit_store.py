@@ -0,0 +1,209 @@
+# unit_store.py
+# Optional struct-of-arrays storage for units, with movement run as vectorized NumPy passes.
+import numpy as np
+from constants import * # Import constants
+
+# State names <-> the small integer codes kept in UnitStore.state
+UNIT_STATES = ['idle', 'moving_to_resource', 'gathering', 'moving_to_townhall', 'dropping_off',
+               'moving_to_target', 'attacking', 'searching']
+UNIT_STATE_CODES = {name: code for code, name in enumerate(UNIT_STATES)}
+
+INITIAL_UNIT_CAPACITY = 256
+
+
+class StoreField:
+    """
+    Unit attribute that lives in the unit's UnitStore while it is attached to one,
+    and in the instance dict (under '_' + name) before that. Reads come from the
+    store's Python-side copy of the column; writes go to both copy and array.
+    Positions are not StoreFields: step() writes them back to the units it moved.
+    """
+    def __init__(self, encode=None):
+        self.encode = encode # Python value -> array element (e.g. state name -> code)
+
+    def __set_name__(self, owner, name):
+        self.name = name; self.private_name = '_' + name
+
+    def __get__(self, unit, owner=None):
+        if unit is None: return self
+        store = unit.store
+        if store is None: return unit.__dict__[self.private_name]
+        return store.values[self.name][unit.slot]
+
+    def __set__(self, unit, value):
+        store = unit.store
+        if store is None: unit.__dict__[self.private_name] = value; return
+        slot = unit.slot
+        store.values[self.name][slot] = value
+        getattr(store, self.name)[slot] = self.encode(value) if self.encode else value
+
+
+# Unit attributes kept in UnitStore arrays and read through StoreFields: name -> dtype,
+# and how to encode values that aren't numbers
+STORE_FIELDS = {'hp': np.int32, 'speed': np.float64, 'game_speed_modifier': np.float64, 'state': np.int8}
+STORE_ENCODERS = {'state': UNIT_STATE_CODES.__getitem__}
+# Position arrays: copied from the unit when added, afterwards only changed by UnitStore.step
+POSITION_FIELDS = {'x': np.float64, 'y': np.float64, 'grid_x': np.int32, 'grid_y': np.int32}
+
+
+class StoredUnit:
+    """
+    Mixin for units whose fields live in a UnitStore (see stored_class).
+    move_towards() only records a movement order; UnitStore.step() carries it out
+    and reports arrival back on the unit's next move_towards() to the same point.
+    """
+    store = None # UnitStore holding this unit's fields, set by attach_store
+    slot: int = -1
+
+    def attach_store(self, store: 'UnitStore'):
+        self.slot = store.add(self); self.store = store
+
+    def detach(self):
+        """Removes the unit from its UnitGrid and UnitStore, keeping its last field values on the instance."""
+        super().detach()
+        store = self.store
+        if store is None: return
+        for name in STORE_FIELDS: self.__dict__['_' + name] = getattr(self, name)
+        self.store = None; store.remove(self.slot); self.slot = -1
+
+    def move_towards(self, target_x_px: float, target_y_px: float, dt_simulated: float,
+                     stop_distance: float | None = None) -> bool:
+        store = self.store
+        if store is None: return super().move_towards(target_x_px, target_y_px, dt_simulated, stop_distance)
+        # True if the unit arrived at this target on an earlier step, else queue an order for UnitStore.step
+        slot = self.slot
+        goal = store.arrived_goal[slot]
+        if goal is not None:
+            if goal[0] == target_x_px and goal[1] == target_y_px: return True
+            store.arrived_goal[slot] = None
+        if stop_distance is None: stop_distance = self.default_stop_distance()
+        store.order_slots.append(slot); store.order_x.append(target_x_px); store.order_y.append(target_y_px)
+        store.order_stop.append(stop_distance)
+        return False
+
+
+_stored_classes: dict[type, type] = {}
+
+def stored_class(unit_class: type) -> type:
+    """Subclass of unit_class (e.g. Worker) whose instances can be kept in a UnitStore."""
+    cls = _stored_classes.get(unit_class)
+    if cls is None:
+        fields = {name: StoreField(STORE_ENCODERS.get(name)) for name in STORE_FIELDS}
+        cls = type(unit_class.__name__, (StoredUnit, unit_class), fields)
+        _stored_classes[unit_class] = cls
+    return cls
+
+
+class UnitStore:
+    """
+    Positions, velocities, speeds, HP and state codes of many units as NumPy arrays,
+    one slot per unit.
+
+    Attached units (see stored_class) read and write HP, state and speeds through
+    StoreField descriptors. Instead of moving itself, an attached unit's move_towards()
+    queues a movement order; step() then moves every unit with an order in one
+    vectorized pass (distances, arrival checks, each unit's velocity for the step,
+    positions integrated from it, and grid positions) and writes the new positions
+    back to the units that moved. Units whose tile changed are reported to their UnitGrid. Positions must only change through
+    these orders while a unit is stored.
+    Per-unit calls only touch Python lists (values, the order queue, arrived_goal);
+    the arrays are read and written in bulk, once per step.
+    """
+    def __init__(self, capacity: int = INITIAL_UNIT_CAPACITY):
+        self.capacity = 0
+        self.size = 0 # Slots in use or freed; arrays are only looked at up to here
+        self.units: list = [] # slot -> Unit (None if free)
+        self.free_slots: list[int] = []
+        self.values: dict[str, list] = {name: [] for name in STORE_FIELDS} # Python copies of the field arrays
+        self.arrived_goal: list[tuple[float, float] | None] = [] # slot -> point the unit last arrived at
+        self.vx = np.zeros(0); self.vy = np.zeros(0) # Pixels per second moved in the last step (0: no order)
+        self.used = np.zeros(0, dtype=np.bool_) # Slot holds a unit
+        self._grow(capacity)
+        # Movement orders of the current step: slot, target pixel, stop distance
+        self.order_slots: list[int] = []; self.order_x: list[float] = []; self.order_y: list[float] = []
+        self.order_stop: list[float] = []
+
+    def _grow(self, capacity: int):
+        extra = capacity - self.capacity
+        array_fields = list(STORE_FIELDS.items()) + list(POSITION_FIELDS.items())
+        for name, dtype in array_fields + [('vx', np.float64), ('vy', np.float64), ('used', np.bool_)]:
+            new = np.zeros(capacity, dtype=dtype)
+            if self.capacity: new[:self.capacity] = getattr(self, name)
+            setattr(self, name, new)
+        for column in self.values.values(): column.extend([None] * extra)
+        self.units.extend([None] * extra); self.arrived_goal.extend([None] * extra)
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return self.size - len(self.free_slots)
+
+    def add(self, unit) -> int:
+        """Copies the unit's fields into a free slot and returns the slot."""
+        if self.free_slots: slot = self.free_slots.pop()
+        else:
+            if self.size == self.capacity: self._grow(self.capacity * 2)
+            slot = self.size; self.size += 1
+        self.units[slot] = unit; self.arrived_goal[slot] = None; self.used[slot] = True
+        for name in STORE_FIELDS:
+            value = unit.__dict__['_' + name]; encode = STORE_ENCODERS.get(name)
+            self.values[name][slot] = value
+            getattr(self, name)[slot] = encode(value) if encode else value
+        for name in POSITION_FIELDS: getattr(self, name)[slot] = getattr(unit, name)
+        self.vx[slot] = 0.0; self.vy[slot] = 0.0
+        return slot
+
+    def remove(self, slot: int):
+        """Frees the slot, dropping any order it queued this step."""
+        self.units[slot] = None; self.used[slot] = False
+        self.free_slots.append(slot)
+        if slot in self.order_slots:
+            keep = [i for i, order_slot in enumerate(self.order_slots) if order_slot != slot]
+            for name in ('order_slots', 'order_x', 'order_y', 'order_stop'):
+                column = getattr(self, name); setattr(self, name, [column[i] for i in keep])
+
+    def dead_units(self) -> list:
+        """Stored units with hp <= 0, found with one array comparison."""
+        size = self.size
+        return [self.units[slot] for slot in np.flatnonzero(self.used[:size] & (self.hp[:size] <= 0)).tolist()]
+
+    def set_speed_modifier(self, modifier: float):
+        """Unit.set_speed_modifier for every stored unit at once."""
+        modifier = max(0.01, modifier)
+        self.game_speed_modifier[:self.size] = modifier
+        self.values['game_speed_modifier'] = self.game_speed_modifier.tolist()
+
+    def step(self, dt_simulated: float):
+        """Carries out this step's movement orders in one pass, then clears them."""
+        self.vx[:self.size] = 0.0; self.vy[:self.size] = 0.0 # Units without an order stand still
+        if not self.order_slots: return
+        slots = np.array(self.order_slots, dtype=np.intp)
+        goal_x = np.array(self.order_x); goal_y = np.array(self.order_y); stop = np.array(self.order_stop)
+        self.order_slots = []; self.order_x = []; self.order_y = []; self.order_stop = []
+        units = self.units
+
+        x = self.x[slots]; y = self.y[slots]
+        dx = goal_x - x; dy = goal_y - y
+        dist = np.hypot(dx, dy)
+        # Same rule as the scalar Unit.move_towards: inside the stop distance means arrived, no move;
+        # otherwise move up to speed * dt, never past the target
+        max_step = self.speed[slots] * TILE_SIZE * self.game_speed_modifier[slots] * dt_simulated
+        step = np.where(dist < stop, 0.0, np.minimum(dist, max_step))
+        # Velocity along the way to the target, covering exactly this step's distance; positions integrate it
+        scale = np.divide(step, dist * dt_simulated, out=np.zeros_like(dist), where=(dist > 0) & (step > 0))
+        vx = dx * scale; vy = dy * scale
+        self.vx[slots] = vx; self.vy[slots] = vy
+        x += vx * dt_simulated; y += vy * dt_simulated
+        self.x[slots] = x; self.y[slots] = y
+        arrived_goal = self.arrived_goal
+        for i in np.flatnonzero(dist - step < stop).tolist(): # Arrivals only
+            arrived_goal[slots[i]] = (goal_x[i].item(), goal_y[i].item())
+
+        new_grid_x = (x // TILE_SIZE).astype(np.int32); new_grid_y = (y // TILE_SIZE).astype(np.int32)
+        changed = np.flatnonzero((new_grid_x != self.grid_x[slots]) | (new_grid_y != self.grid_y[slots]))
+        self.grid_x[slots] = new_grid_x; self.grid_y[slots] = new_grid_y
+        moved = [units[slot] for slot in slots.tolist()]
+        for unit, unit_x, unit_y in zip(moved, x.tolist(), y.tolist()): unit.x = unit_x; unit.y = unit_y
+        for i, grid_x, grid_y in zip(changed.tolist(), new_grid_x[changed].tolist(), new_grid_y[changed].tolist()):
+            unit = moved[i] # Only units that crossed into another tile
+            if unit.unit_grid is not None: unit.unit_grid.move(unit, unit.grid_x, unit.grid_y, grid_x, grid_y)
+            unit.grid_x = grid_x; unit.grid_y = grid_y
\ No newline at end of file